@@ -76,7 +76,27 @@ def create_app():
     db.init_app(app)
     migrate.init_app(app, db)
     # Initialize SocketIO with CORS for the frontend
-    socketio.init_app(app, cors_allowed_origins="*")
+    # wire_json splices pre-serialized update frames into packets instead of re-encoding them
+    from app.utils.realtime_wire import wire_json
+    from app.services.realtime_hub import realtime_hub, create_client_manager
+    socketio_options = {"cors_allowed_origins": "*", "json": wire_json}
+    # With a message queue, emits made in the scheduler's worker reach clients on every worker
+    message_queue = app.config.get('SOCKETIO_MESSAGE_QUEUE')
+    if message_queue:
+        socketio_options["client_manager"] = create_client_manager(
+            message_queue, channel=app.config.get('SOCKETIO_CHANNEL', 'flask-socketio'))
+    socketio.init_app(app, **socketio_options)
+    # Per-hive / per-apiary rooms: clients subscribe instead of receiving every hive
+    realtime_hub.init_app(socketio, replicate=bool(message_queue))
+
+    # Invalidate cached analytics responses when new hive data is committed
+    from app.utils.response_cache import register_invalidation_hooks
+    register_invalidation_hooks()
+
+    # Load ML models once, before any worker fork, so pages are shared
+    if app.config.get('PRELOAD_MODELS'):
+        from app.services.model_preloader import model_preloader
+        model_preloader.preload()
 
     # --- Register Blueprints ---
     from app.routes.api import api_bp
@@ -85,9 +105,12 @@ def create_app():
     # --- Start Background Scheduler ---
     # Ensures the scheduler runs only once in the main process
     if not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
-        from app.scheduler import start_scheduler
+        from app.scheduler import start_background_services
+        # Every worker campaigns; only the elected leader runs the scheduled jobs.
+        # Under gunicorn --preload this runs in the master, so the workers start
+        # them after the fork instead (see gunicorn.conf.py).
         # Pass the socketio instance to the scheduler for real-time updates
-        start_scheduler(app, socketio)
+        start_background_services(app, socketio, defer=app.config.get('BACKGROUND_SERVICES_AFTER_FORK', False))
     
     # ========== 🆕 REGISTER THREAT DETECTION ROUTES ==========
     from app.routes.threat_detection_routes import register_threat_routes
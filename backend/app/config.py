@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -36,5 +37,66 @@ class Config:
     DEFAULT_LATITUDE = float(os.environ.get("DEFAULT_LATITUDE", 6.900562))
     DEFAULT_LONGITUDE = float(os.environ.get("DEFAULT_LONGITUDE", 80.922718))
 
+    # ----------------------------
+    # Analytics Response Cache
+    # ----------------------------
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 256))
+    RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", 300))
+    RESPONSE_CACHE_BUCKET_SECONDS = int(os.environ.get("RESPONSE_CACHE_BUCKET_SECONDS", 60))
+
+    # ----------------------------
+    # ML Model Preloading
+    # ----------------------------
+    # Load all models in create_app (before gunicorn --preload forks workers; see gunicorn.conf.py)
+    PRELOAD_MODELS = os.environ.get("PRELOAD_MODELS", "true").lower() in ("1", "true", "yes")
 
+    # ----------------------------
+    # Threat Inference Micro-batching (/api/threat/predict)
+    # ----------------------------
+    # Off by default: below a few dozen concurrent clients the hand-off costs more than it saves
+    THREAT_BATCH_ENABLED = os.environ.get("THREAT_BATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+    THREAT_BATCH_WINDOW_MS = float(os.environ.get("THREAT_BATCH_WINDOW_MS", 1))
+    THREAT_BATCH_MAX_SIZE = int(os.environ.get("THREAT_BATCH_MAX_SIZE", 64))
+    THREAT_BATCH_TIMEOUT_SECONDS = float(os.environ.get("THREAT_BATCH_TIMEOUT_SECONDS", 5))
+
+    # ----------------------------
+    # Threat Inference Result Cache (per synchronized_data row and model version)
+    # ----------------------------
+    THREAT_INFERENCE_CACHE_SIZE = int(os.environ.get("THREAT_INFERENCE_CACHE_SIZE", 4096))
+
+    # ----------------------------
+    # Threat Rolling Features (per-hive streaming windows)
+    # ----------------------------
+    # Re-seed a hive's window from synchronized_data when its next reading comes later
+    # than this (the scheduler collects every 60s; other workers' readings were missed)
+    THREAT_FEATURE_RESEED_GAP_SECONDS = float(os.environ.get("THREAT_FEATURE_RESEED_GAP_SECONDS", 90))
+
+    # ----------------------------
+    # Real-time Updates (Socket.IO hive / apiary rooms)
+    # ----------------------------
+    # Apiary groups clients can subscribe to, e.g. "north:1,2,3;south:4,5"
+    APIARY_GROUPS = os.environ.get("APIARY_GROUPS", "")
+    REALTIME_MAX_SUBSCRIPTIONS = int(os.environ.get("REALTIME_MAX_SUBSCRIPTIONS", 100))
+    # Every Nth update per hive and event is sent whole; the rest only carry changed fields
+    REALTIME_KEYFRAME_INTERVAL = int(os.environ.get("REALTIME_KEYFRAME_INTERVAL", 10))
+    # Message queue shared by web workers so emits reach clients on every worker:
+    # "broker://127.0.0.1:5055" (built-in broker), "redis://localhost:6379/0", ...
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE", "")
+    SOCKETIO_CHANNEL = os.environ.get("SOCKETIO_CHANNEL", "flask-socketio")
+
+    # ----------------------------
+    # Scheduler Leader Election (only one worker runs the scheduled jobs)
+    # ----------------------------
+    # "auto" (MySQL GET_LOCK with a MySQL database, else lock file), "mysql", "file" or "none" (always lead)
+    LEADER_ELECTION_BACKEND = os.environ.get("LEADER_ELECTION_BACKEND", "auto")
+    LEADER_LOCK_FILE = os.environ.get("LEADER_LOCK_FILE", os.path.join(tempfile.gettempdir(), "beehive-scheduler.lock"))
+    LEADER_LOCK_NAME = os.environ.get("LEADER_LOCK_NAME", "beehive_scheduler")
+    # A leader that stops renewing is replaced after at most lease + heartbeat seconds
+    LEADER_LEASE_SECONDS = float(os.environ.get("LEADER_LEASE_SECONDS", 20))
+    LEADER_HEARTBEAT_SECONDS = float(os.environ.get("LEADER_HEARTBEAT_SECONDS", 5))
+    # Start the alert writer, feature rebuild and election in each forked worker instead
+    # of in create_app (set by gunicorn.conf.py for --preload; see the notes there)
+    BACKGROUND_SERVICES_AFTER_FORK = os.environ.get("BACKGROUND_SERVICES_AFTER_FORK", "false").lower() in ("1", "true", "yes")
 
+    # Analyze dummy_data_service readings instead of synchronized_data rows (demo mode)
+    USE_DUMMY_DATA = os.environ.get("USE_DUMMY_DATA", "false").lower() in ("1", "true", "yes")
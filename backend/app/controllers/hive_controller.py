@@ -1,7 +1,7 @@
 # app/controllers/hive_controller.py
 
 from flask import Blueprint, request, jsonify
-from app.services.hive_service import get_all_hives, get_hive_by_id, create_hive, update_hive, delete_hive
+from app.services.hive_service import get_all_hives, get_hive_by_id, create_hive, update_hive, delete_hive, get_hives_snapshot
 
 hive_blueprint = Blueprint('hive_blueprint', __name__)
 
@@ -18,6 +18,17 @@ def get_hives():
     } for hive in hives]
     return jsonify(results), 200
 
+@hive_blueprint.route('/hives/snapshot', methods=['GET'])
+def get_snapshot():
+    """Get latest reading, threat prediction, alert count and weather for every hive."""
+    alert_hours = request.args.get('alert_hours', 24, type=int)
+    snapshot = get_hives_snapshot(alert_hours=alert_hours)
+    return jsonify({
+        'hive_count': len(snapshot),
+        'alert_window_hours': alert_hours,
+        'hives': snapshot
+    }), 200
+
 @hive_blueprint.route('/hives', methods=['POST'])
 def add_hive():
     """Create a new hive."""
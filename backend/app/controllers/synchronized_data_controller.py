@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from app.services.synchronized_data_service import synchronized_data_service
+from app.utils.response_cache import cached_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -80,6 +81,7 @@ def get_synchronized_data():
         }), 500
 
 @synchronized_data_blueprint.route('/synchronized/alignment-stats', methods=['GET'])
+@cached_response('synchronized_alignment_stats')
 def get_alignment_stats():
     """
     Get statistics about data alignment between sensor and weather data
@@ -139,6 +141,10 @@ def get_synchronized_status():
             ]
         }
         
+        # Stored record totals come from the per-hive daily counters
+        from app.services.synchronized_monitoring_service import synchronized_monitoring_service
+        status['stored_records'] = synchronized_monitoring_service.get_stored_record_counts()
+        
         return jsonify({
             'success': True,
             'status': status
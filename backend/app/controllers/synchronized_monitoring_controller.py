@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
 from app.services.synchronized_monitoring_service import synchronized_monitoring_service
 from app.models.synchronized_data import SynchronizedData
+from app.utils.response_cache import cached_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -126,6 +127,7 @@ def get_historical_synchronized_data():
         }), 500
 
 @synchronized_monitoring_blueprint.route('/synchronized/alignment-stats', methods=['GET'])
+@cached_response('monitoring_alignment_stats')
 def get_alignment_statistics():
     """
     Get statistics about data alignment quality
@@ -183,6 +185,7 @@ def get_synchronized_status():
         }), 500
 
 @synchronized_monitoring_blueprint.route('/synchronized/data-quality', methods=['GET'])
+@cached_response('data_quality')
 def get_data_quality_analysis():
     """
     Get data quality analysis for synchronized data
@@ -198,53 +201,30 @@ def get_data_quality_analysis():
         hive_id = request.args.get('hive_id', 1, type=int)
         hours = request.args.get('hours', 24, type=int)
         
-        # Get historical data
-        historical_data = SynchronizedData.get_historical_data(hive_id, hours)
+        # Single SQL aggregate over the window (scores are stored at insert time)
+        quality = SynchronizedData.get_data_quality_statistics(hive_id, hours)
         
-        if not historical_data:
+        if not quality['total_records']:
             return jsonify({
                 'success': False,
                 'message': 'No data available for analysis'
             }), 200
         
-        # Calculate quality metrics
-        total_records = len(historical_data)
-        perfect_alignment_count = sum(1 for record in historical_data if record.is_perfectly_aligned())
-        
-        quality_scores = [record.get_data_quality_score() for record in historical_data]
-        avg_quality_score = sum(quality_scores) / len(quality_scores) if quality_scores else 0
-        
-        # Temperature correlation analysis
-        temp_differences = []
-        humidity_differences = []
-        
-        for record in historical_data:
-            if record.is_perfectly_aligned():
-                temp_diff = record.calculate_temperature_difference()
-                humidity_diff = record.calculate_humidity_difference()
-                
-                if temp_diff is not None:
-                    temp_differences.append(temp_diff)
-                if humidity_diff is not None:
-                    humidity_differences.append(humidity_diff)
+        total_records = quality['total_records']
+        perfect_alignment_count = quality['perfect_alignment_count']
         
         analysis = {
             'total_records': total_records,
             'perfect_alignment_count': perfect_alignment_count,
             'alignment_percentage': (perfect_alignment_count / total_records * 100) if total_records > 0 else 0,
-            'average_quality_score': round(avg_quality_score, 2),
-            'temperature_analysis': {
-                'correlation_count': len(temp_differences),
-                'average_difference': round(sum(temp_differences) / len(temp_differences), 2) if temp_differences else None,
-                'min_difference': round(min(temp_differences), 2) if temp_differences else None,
-                'max_difference': round(max(temp_differences), 2) if temp_differences else None
+            'average_quality_score': quality['average_quality_score'],
+            'quality_score_range': {
+                'min': quality['min_quality_score'],
+                'max': quality['max_quality_score']
             },
-            'humidity_analysis': {
-                'correlation_count': len(humidity_differences),
-                'average_difference': round(sum(humidity_differences) / len(humidity_differences), 2) if humidity_differences else None,
-                'min_difference': round(min(humidity_differences), 2) if humidity_differences else None,
-                'max_difference': round(max(humidity_differences), 2) if humidity_differences else None
-            }
+            'quality_distribution': quality['quality_distribution'],
+            'temperature_analysis': quality['temperature_analysis'],
+            'humidity_analysis': quality['humidity_analysis']
         }
         
         return jsonify({
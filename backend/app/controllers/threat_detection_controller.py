@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from app.services.threat_detection_service import threat_detection_service
 from app.models.synchronized_data import SynchronizedData
+from app.utils.response_cache import cached_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -73,6 +74,7 @@ def predict_historical_threats():
         }), 500
 
 @threat_detection_bp.route('/threat/statistics', methods=['GET'])
+@cached_response('threat_statistics')
 def get_threat_statistics():
     """
     Get threat statistics for a hive
@@ -155,26 +157,17 @@ def get_data_quality():
         hive_id = request.args.get('hive_id', 1, type=int)
         hours = request.args.get('hours', 24, type=int)
         
-        # Get historical data
-        historical_data = SynchronizedData.get_historical_data(hive_id, hours)
+        # Single SQL aggregate over the window (scores are stored at insert time)
+        quality = SynchronizedData.get_data_quality_statistics(hive_id, hours)
         
-        if not historical_data:
+        if not quality['total_records']:
             return jsonify({
                 "success": False,
                 "error": f"No data found for hive {hive_id}"
             }), 404
         
-        # Calculate quality metrics
-        total_records = len(historical_data)
-        records_with_threat_fields = len([
-            record for record in historical_data 
-            if record.sensor_sound_peak_freq is not None and 
-               record.sensor_vibration_hz is not None and 
-               record.sensor_vibration_var is not None
-        ])
-        
-        quality_scores = [record.get_data_quality_score() for record in historical_data]
-        avg_quality_score = sum(quality_scores) / len(quality_scores) if quality_scores else 0
+        total_records = quality['total_records']
+        records_with_threat_fields = quality['records_with_threat_fields']
         
         return jsonify({
             "success": True,
@@ -182,11 +175,12 @@ def get_data_quality():
                 "total_records": total_records,
                 "records_with_threat_fields": records_with_threat_fields,
                 "threat_fields_completion_rate": (records_with_threat_fields / total_records * 100) if total_records > 0 else 0,
-                "average_quality_score": round(avg_quality_score, 2),
+                "average_quality_score": quality['average_quality_score'],
                 "quality_score_range": {
-                    "min": min(quality_scores) if quality_scores else 0,
-                    "max": max(quality_scores) if quality_scores else 0
+                    "min": quality['min_quality_score'],
+                    "max": quality['max_quality_score']
                 },
+                "quality_distribution": quality['quality_distribution'],
                 "hive_id": hive_id,
                 "hours_analyzed": hours
             }
@@ -198,3 +192,54 @@ def get_data_quality():
             "success": False,
             "error": f"Endpoint error: {str(e)}"
         }), 500
+
+@threat_detection_bp.route('/threat/features/state', methods=['GET'])
+def get_feature_state():
+    """
+    Get the streaming rolling-feature window used for live threat predictions
+    
+    Query Parameters:
+        hive_id (int): Hive ID (default: 1)
+    
+    Returns:
+        JSON response with the hive's current window and service counters
+    """
+    try:
+        from app.services.threat_feature_state import threat_feature_state
+        hive_id = request.args.get('hive_id', 1, type=int)
+        
+        return jsonify({
+            "success": True,
+            "state": threat_feature_state.get_state(hive_id),
+            "stats": threat_feature_state.get_stats()
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_feature_state endpoint: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Endpoint error: {str(e)}"
+        }), 500
+
+@threat_detection_bp.route('/threat/cache/stats', methods=['GET'])
+def get_inference_cache_stats():
+    """
+    Get hit rate and size of this worker's per-reading threat prediction cache
+    
+    Returns:
+        JSON response with cache counters
+    """
+    try:
+        from app.services.threat_inference_cache import threat_inference_cache
+        
+        return jsonify({
+            "success": True,
+            "stats": threat_inference_cache.get_stats()
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in get_inference_cache_stats endpoint: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Endpoint error: {str(e)}"
+        }), 500
@@ -0,0 +1,555 @@
+"""
+Compiled tree ensembles: export trained XGBoost / sklearn forests into flat
+NumPy arrays and evaluate them with a vectorized, NumPy-only walker.
+
+Compiled format (a directory, every array memory-mappable):
+    meta.json          kind, classes, features, n_trees, max_depth, base_score,
+                       source_version (content hash of the model files it was exported from)
+    feature.npy        int32   split feature per node (-1 for leaves)
+    threshold.npy      float32 (xgboost) / float64 (sklearn) split threshold
+    left.npy           int32   left child (global node index)
+    right.npy          int32   right child (global node index)
+    default_left.npy   bool    direction taken for missing values
+    value.npy          float32 leaf margin (xgboost) / float64 class fractions or leaf means (sklearn)
+    roots.npy          int32   root node of every tree
+    tree_class.npy     int32   output class of every tree (xgboost only)
+    input_scale.npy    float64 optional MinMaxScaler scale_ folded into the evaluator
+    input_offset.npy   float64 optional MinMaxScaler min_
+
+Leaf-bitmask layout used for evaluation (trees with at most 64 leaves):
+    qs_feature.npy     int32   split feature per internal node, grouped by tree
+    qs_threshold.npy   split threshold per internal node
+    qs_default_left.npy bool   missing-value direction per internal node
+    qs_mask.npy        uint8-64 leaves still reachable when the split goes right
+    qs_groups.npy      int32   (n_trees, internal nodes per tree) of each tree group
+    qs_tree.npy        int32   original tree index, in evaluation order
+    qs_leaf_start.npy  int32   first leaf of every tree in qs_value
+    qs_value.npy       leaf values ordered left to right within each tree
+
+Every false split ANDs its mask into the tree's candidate leaves; the exit
+leaf is the lowest remaining bit. Trees are grouped by internal node count so
+each group reduces as one (rows, trees, nodes) block, making evaluation a few
+streaming NumPy passes instead of a per-node walk.
+
+Exporting needs xgboost / sklearn; loading and evaluating only needs NumPy.
+
+Backend selection (TREE_MODEL_BACKEND env var):
+    auto      use compiled arrays when they exist, else the original model (default)
+    compiled  always use compiled arrays (fail if missing)
+    native    always use the original joblib model
+    onnx      serve the ONNX graphs with onnxruntime (see onnx_models; fail if missing)
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+
+KIND_XGBOOST = "xgboost_softprob"
+KIND_FOREST = "sklearn_forest"
+KIND_FOREST_REGRESSOR = "sklearn_forest_regressor"
+
+MAX_BITMASK_LEAVES = 64
+# Rows evaluated per chunk (bounds the rows x internal-nodes temporaries)
+EVAL_CHUNK_ROWS = 128
+
+
+def tree_backend():
+    """Configured backend: 'auto', 'compiled', 'native' or 'onnx'"""
+    backend = os.getenv("TREE_MODEL_BACKEND", "auto").strip().lower()
+    return backend if backend in ("auto", "compiled", "native", "onnx") else "auto"
+
+
+def use_compiled(compiled_dir):
+    """Whether the compiled artifact at compiled_dir should be served"""
+    backend = tree_backend()
+    if backend in ("native", "onnx"):
+        return False
+    exists = (Path(compiled_dir) / META_FILE).exists()
+    if backend == "compiled" and not exists:
+        raise FileNotFoundError(f"Compiled model not found: {compiled_dir}")
+    return exists
+
+
+def compiled_is_current(compiled_dir, source_version):
+    """Whether the compiled artifact was exported from the model files with source_version"""
+    exported_from = read_compiled_meta(compiled_dir).get("source_version")
+    # Artifacts exported before versions were recorded cannot be checked
+    return exported_from is None or exported_from == source_version
+
+
+# ========== EVALUATOR ==========
+class CompiledTreeEnsemble:
+    """NumPy evaluator for a compiled tree ensemble (loaded with mmap)"""
+
+    def __init__(self, arrays, meta):
+        self.meta = meta
+        self.kind = meta["kind"]
+        # Regressors have no classes; their outputs are the value columns
+        self.classes_ = np.asarray(meta["classes"]) if meta.get("classes") is not None else None
+        self.features = meta.get("features")
+        self.max_depth = int(meta["max_depth"])
+        self.n_trees = int(meta["n_trees"])
+
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.default_left = arrays["default_left"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+
+        self.input_scale = arrays.get("input_scale")
+        self.input_offset = arrays.get("input_offset")
+
+        # Leaves point at themselves so every row can take max_depth steps
+        self._is_leaf = self.feature < 0
+        self._split_feature = np.where(self._is_leaf, 0, self.feature)
+
+        n_classes = len(self.classes_) if self.classes_ is not None else self.value.shape[1]
+        if self.kind == KIND_XGBOOST:
+            self._tree_class = arrays["tree_class"]
+            self._base_margin = np.asarray(meta["base_score"], dtype=np.float64)
+            self._class_matrix = self._one_hot(self._tree_class, n_classes)
+
+        self.bitmask = "qs_mask" in arrays
+        if self.bitmask:
+            self._init_bitmask(arrays, n_classes)
+
+    @staticmethod
+    def _one_hot(tree_class, n_classes):
+        matrix = np.zeros((len(tree_class), n_classes), dtype=np.float64)
+        matrix[np.arange(len(tree_class)), tree_class] = 1.0
+        return matrix
+
+    def _init_bitmask(self, arrays, n_classes):
+        """Prepare the leaf-bitmask evaluation (stumps are folded into one matmul)"""
+        self._qs_feature = arrays["qs_feature"]
+        self._qs_threshold = arrays["qs_threshold"]
+        self._qs_default_left = arrays["qs_default_left"]
+        self._qs_mask = arrays["qs_mask"]
+        self._qs_all = np.iinfo(self._qs_mask.dtype).max
+        self._qs_value = arrays["qs_value"]
+        leaf_start = arrays["qs_leaf_start"]
+        groups = [(int(n), int(k)) for n, k in arrays["qs_groups"]]
+        tree_class = self._tree_class[arrays["qs_tree"]] if self.kind == KIND_XGBOOST else None
+
+        # Single-split trees: value = right + go_left * (left - right), linear in go_left
+        self._n_stumps = groups[0][0] if groups and groups[0][1] == 1 else 0
+        stumps = slice(0, self._n_stumps)
+        leaf_count = np.diff(np.append(leaf_start, len(self._qs_value)))
+        left_value = self._qs_value[leaf_start[stumps]]
+        right_value = self._qs_value[leaf_start[stumps] + (leaf_count[stumps] > 1)]
+        if self.kind == KIND_XGBOOST:
+            class_matrix = self._one_hot(tree_class[stumps], n_classes)
+            left_value = class_matrix * left_value[:, None]
+            right_value = class_matrix * right_value[:, None]
+        # XGBoost leaves are float32 already; forests keep float64 for exact averages
+        self._stump_dtype = np.float32 if self.kind == KIND_XGBOOST else np.float64
+        self._stump_delta = np.asarray(left_value - right_value, dtype=self._stump_dtype)
+        self._stump_base = np.asarray(right_value, dtype=np.float64).sum(axis=0)
+
+        # Deeper trees go through the bitmask reduction
+        self._deep_groups = groups[1:] if self._n_stumps else groups
+        self._deep_leaf_start = leaf_start[self._n_stumps:]
+        if self.kind == KIND_XGBOOST:
+            self._deep_class_matrix = self._one_hot(tree_class[self._n_stumps:], n_classes)
+
+    def transform(self, X):
+        """Apply the folded input scaler (same operation order as MinMaxScaler)"""
+        X = np.array(X, dtype=np.float64)
+        if self.input_scale is not None:
+            X *= self.input_scale
+            X += self.input_offset
+        return X
+
+    def apply(self, X):
+        """Leaf node index reached in every tree: (n_rows, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            leaf = self._is_leaf[node]
+            if leaf.all():
+                break
+            x = X[rows, self._split_feature[node]]
+            threshold = self.threshold[node]
+            if self.kind == KIND_XGBOOST:
+                go_left = x < threshold
+            else:
+                go_left = x <= threshold
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.default_left[node], go_left)
+            node = np.where(leaf, node, np.where(go_left, self.left[node], self.right[node]))
+        return node
+
+    def _bitmask_totals(self, X):
+        """Summed leaf contributions per class via the leaf-bitmask layout"""
+        x = X[:, self._qs_feature]
+        if self.kind == KIND_XGBOOST:
+            go_left = x < self._qs_threshold
+        else:
+            go_left = x <= self._qs_threshold
+        missing = np.isnan(x)
+        if missing.any():
+            go_left |= missing & self._qs_default_left
+
+        totals = go_left[:, :self._n_stumps].astype(self._stump_dtype) @ self._stump_delta + self._stump_base
+        if not self._deep_groups:
+            return totals
+
+        masks = np.where(go_left[:, self._n_stumps:], self._qs_all, self._qs_mask[self._n_stumps:])
+        blocks, column = [], 0
+        for n_trees, n_nodes in self._deep_groups:
+            block = masks[:, column:column + n_trees * n_nodes].reshape(len(X), n_trees, n_nodes)
+            blocks.append(np.bitwise_and.reduce(block, axis=2))
+            column += n_trees * n_nodes
+        candidates = np.concatenate(blocks, axis=1)
+
+        # Index of the lowest set bit = exit leaf (left-to-right order);
+        # read from the float64 exponent, exact for powers of two
+        lowest = (candidates & (~candidates + 1)).astype(np.float64)
+        leaf = (lowest.view(np.int64) >> 52) - 1023
+        values = self._qs_value[self._deep_leaf_start + leaf]
+        if self.kind == KIND_XGBOOST:
+            return totals + values @ self._deep_class_matrix
+        return totals + values.sum(axis=1)
+
+    def _leaf_totals(self, X):
+        """Sum of leaf values per class over all trees: (n_rows, n_classes)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if not self.bitmask:
+            values = self.value[self.apply(X)]
+            if self.kind == KIND_XGBOOST:
+                return values @ self._class_matrix
+            return values.sum(axis=1)
+        if len(X) <= EVAL_CHUNK_ROWS:
+            return self._bitmask_totals(X)
+        return np.concatenate([
+            self._bitmask_totals(X[start:start + EVAL_CHUNK_ROWS])
+            for start in range(0, len(X), EVAL_CHUNK_ROWS)
+        ])
+
+    def predict_proba(self, X):
+        """Class probabilities: (n_rows, n_classes)"""
+        if self.kind == KIND_FOREST_REGRESSOR:
+            raise AttributeError("predict_proba is not available for regression forests")
+        totals = self._leaf_totals(X)
+        if self.kind == KIND_XGBOOST:
+            margin = totals + self._base_margin
+            margin -= margin.max(axis=1, keepdims=True)
+            exp = np.exp(margin)
+            return exp / exp.sum(axis=1, keepdims=True)
+        return totals / self.n_trees
+
+    def predict(self, X):
+        """Predicted class labels (mean prediction for regression forests)"""
+        if self.kind == KIND_FOREST_REGRESSOR:
+            prediction = self._leaf_totals(X) / self.n_trees
+            return prediction[:, 0] if prediction.shape[1] == 1 else prediction
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def read_compiled_meta(compiled_dir):
+    """Read and version-check meta.json without loading any arrays"""
+    with open(Path(compiled_dir) / META_FILE, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compiled model format: {meta.get('format_version')}")
+    return meta
+
+
+def load_compiled(compiled_dir, mmap=True):
+    """Load a compiled ensemble directory (arrays memory-mapped by default)"""
+    compiled_dir = Path(compiled_dir)
+    meta = read_compiled_meta(compiled_dir)
+
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        path.stem: np.load(path, mmap_mode=mmap_mode)
+        for path in compiled_dir.glob("*.npy")
+    }
+    return CompiledTreeEnsemble(arrays, meta)
+
+
+def _bitmask_layout(arrays):
+    """
+    Derive the leaf-bitmask arrays from the flat node arrays.
+    Returns None when a tree has more than MAX_BITMASK_LEAVES leaves.
+    """
+    feature, left, right = arrays["feature"], arrays["left"], arrays["right"]
+    trees, max_leaves = [], 1
+
+    for root in arrays["roots"]:
+        # Left-to-right leaf order via iterative DFS
+        tree_leaves, subtree_leaves, internal = [], {}, []
+        stack = [(int(root), False)]
+        while stack:
+            node, visited = stack.pop()
+            if feature[node] < 0:
+                subtree_leaves[node] = (len(tree_leaves), len(tree_leaves) + 1)
+                tree_leaves.append(node)
+            elif visited:
+                subtree_leaves[node] = (subtree_leaves[left[node]][0], subtree_leaves[right[node]][1])
+            else:
+                internal.append(node)
+                stack.extend([(node, True), (int(right[node]), False), (int(left[node]), False)])
+        if len(tree_leaves) > MAX_BITMASK_LEAVES:
+            return None
+        max_leaves = max(max_leaves, len(tree_leaves))
+
+        masks = []
+        for node in internal:
+            first, last = subtree_leaves[left[node]]
+            masks.append(~(((1 << (last - first)) - 1) << first))
+        if not internal:
+            # Single-leaf tree: a split that never removes the only leaf
+            internal, masks = [-1], [~0]
+        trees.append((internal, masks, tree_leaves))
+
+    mask_dtype = next(dtype for dtype in (np.uint8, np.uint16, np.uint32, np.uint64)
+                      if np.iinfo(dtype).bits >= max_leaves)
+    all_bits = int(np.iinfo(mask_dtype).max)
+
+    # Group trees by internal node count (stable, so class order is kept per group)
+    order = sorted(range(len(trees)), key=lambda t: len(trees[t][0]))
+    qs_nodes, qs_masks, leaf_start, leaf_nodes, groups = [], [], [], [], []
+    for tree_index in order:
+        internal, masks, tree_leaves = trees[tree_index]
+        if groups and groups[-1][1] == len(internal):
+            groups[-1][0] += 1
+        else:
+            groups.append([1, len(internal)])
+        qs_nodes.extend(internal)
+        qs_masks.extend(mask & all_bits for mask in masks)
+        leaf_start.append(len(leaf_nodes))
+        leaf_nodes.extend(tree_leaves)
+
+    qs_nodes = np.asarray(qs_nodes, dtype=np.int64)
+    real = qs_nodes >= 0
+    safe_nodes = np.where(real, qs_nodes, 0)
+    threshold = arrays["threshold"]
+    return {
+        "qs_feature": np.where(real, feature[safe_nodes], 0).astype(np.int32),
+        "qs_threshold": np.where(real, threshold[safe_nodes], np.inf).astype(threshold.dtype),
+        "qs_default_left": np.where(real, arrays["default_left"][safe_nodes], True),
+        "qs_mask": np.asarray(qs_masks, dtype=mask_dtype),
+        "qs_groups": np.asarray(groups, dtype=np.int32),
+        "qs_tree": np.asarray(order, dtype=np.int32),
+        "qs_leaf_start": np.asarray(leaf_start, dtype=np.int32),
+        "qs_value": arrays["value"][np.asarray(leaf_nodes, dtype=np.int64)],
+    }
+
+
+def _save_compiled(compiled_dir, arrays, meta):
+    """Write arrays + meta.json (meta last, so a partial export is never loaded)"""
+    layout = _bitmask_layout(arrays)
+    if layout is not None:
+        arrays = dict(arrays, **layout)
+
+    compiled_dir = Path(compiled_dir)
+    compiled_dir.mkdir(parents=True, exist_ok=True)
+    meta_path = compiled_dir / META_FILE
+    if meta_path.exists():
+        meta_path.unlink()
+    for stale in compiled_dir.glob("*.npy"):
+        stale.unlink()
+    for name, array in arrays.items():
+        np.save(compiled_dir / f"{name}.npy", np.ascontiguousarray(array))
+    meta = dict(meta, format_version=FORMAT_VERSION, leaf_bitmask=layout is not None)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return compiled_dir
+
+
+# ========== EXPORTERS ==========
+def _tree_depth(left, right, root):
+    """Depth of one tree given its (local) child arrays"""
+    depth, stack = 0, [(root, 0)]
+    while stack:
+        node, d = stack.pop()
+        depth = max(depth, d)
+        if left[node] >= 0:
+            stack.append((left[node], d + 1))
+            stack.append((right[node], d + 1))
+    return depth
+
+
+def export_xgboost(model, compiled_dir, classes, features=None, source_version=None):
+    """
+    Flatten a multi:softprob XGBoost model (XGBClassifier or Booster).
+    classes: class names in model output order (label_encoder.classes_)
+    source_version: version of the model files, checked before serving
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    dump = json.loads(booster.save_raw("json"))
+    learner = dump["learner"]
+    objective = learner["objective"]["name"]
+    if objective != "multi:softprob":
+        raise ValueError(f"Unsupported XGBoost objective for compilation: {objective}")
+
+    gbtree = learner["gradient_booster"]["model"]
+    trees, tree_info = gbtree["trees"], gbtree["tree_info"]
+    base_score = learner["learner_model_param"]["base_score"]
+    base_score = json.loads(base_score) if base_score.startswith("[") else [float(base_score)] * len(classes)
+
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for tree in trees:
+        tree_left = np.asarray(tree["left_children"], dtype=np.int64)
+        tree_right = np.asarray(tree["right_children"], dtype=np.int64)
+        is_leaf = tree_left < 0
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+
+        feature.append(np.where(is_leaf, -1, tree["split_indices"]))
+        threshold.append(np.where(is_leaf, 0.0, conditions))
+        left.append(np.where(is_leaf, -1, tree_left + offset))
+        right.append(np.where(is_leaf, -1, tree_right + offset))
+        default_left.append(np.asarray(tree["default_left"], dtype=bool))
+        # Leaf values are stored in split_conditions for leaf nodes
+        value.append(np.where(is_leaf, conditions, 0.0))
+        roots.append(offset)
+        max_depth = max(max_depth, _tree_depth(tree_left, tree_right, 0))
+        offset += len(tree_left)
+
+    arrays = {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float32),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "default_left": np.concatenate(default_left),
+        "value": np.concatenate(value).astype(np.float32),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "tree_class": np.asarray(tree_info, dtype=np.int32),
+    }
+    meta = {
+        "kind": KIND_XGBOOST,
+        "classes": [str(c) for c in classes],
+        "features": list(features) if features is not None else booster.feature_names,
+        "n_trees": len(trees),
+        "n_nodes": offset,
+        "max_depth": max_depth,
+        "base_score": [float(b) for b in base_score],
+        "source_version": source_version,
+    }
+    return _save_compiled(compiled_dir, arrays, meta)
+
+
+def export_random_forest(model, compiled_dir, features=None, scaler=None, source_version=None):
+    """
+    Flatten a fitted sklearn RandomForest / ExtraTrees classifier or regressor.
+    scaler: optional fitted MinMaxScaler folded into the evaluator input
+    source_version: version of the model files, checked before serving
+    """
+    is_regressor = not hasattr(model, "classes_")
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        tree_left = tree.children_left.astype(np.int64)
+        tree_right = tree.children_right.astype(np.int64)
+        is_leaf = tree_left < 0
+
+        if is_regressor:
+            # (n_nodes, n_outputs) leaf means
+            fractions = tree.value[:, :, 0].astype(np.float64)
+        else:
+            fractions = tree.value[:, 0, :].astype(np.float64)
+            fractions /= np.maximum(fractions.sum(axis=1, keepdims=True), 1e-12)
+
+        feature.append(np.where(is_leaf, -1, tree.feature))
+        threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+        left.append(np.where(is_leaf, -1, tree_left + offset))
+        right.append(np.where(is_leaf, -1, tree_right + offset))
+        missing_left = getattr(tree, "missing_go_to_left", None)
+        default_left.append(np.asarray(missing_left, dtype=bool) if missing_left is not None
+                            else np.zeros(len(tree_left), dtype=bool))
+        value.append(fractions)
+        roots.append(offset)
+        max_depth = max(max_depth, int(tree.max_depth))
+        offset += len(tree_left)
+
+    arrays = {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "default_left": np.concatenate(default_left),
+        "value": np.concatenate(value),
+        "roots": np.asarray(roots, dtype=np.int32),
+    }
+    if scaler is not None:
+        arrays["input_scale"] = np.asarray(scaler.scale_, dtype=np.float64)
+        arrays["input_offset"] = np.asarray(scaler.min_, dtype=np.float64)
+
+    meta = {
+        "kind": KIND_FOREST_REGRESSOR if is_regressor else KIND_FOREST,
+        "classes": None if is_regressor else np.asarray(model.classes_).tolist(),
+        "features": list(features) if features is not None else None,
+        "n_trees": len(model.estimators_),
+        "n_nodes": offset,
+        "max_depth": max_depth,
+        "source_version": source_version,
+    }
+    return _save_compiled(compiled_dir, arrays, meta)
+
+
+# ========== REPO MODELS ==========
+ML_MODELS_DIR = Path(__file__).resolve().parent
+THREAT_MODEL_FILE = ML_MODELS_DIR / "threat_detection" / "models" / "threat_model.pkl"
+THREAT_COMPILED_DIR = ML_MODELS_DIR / "threat_detection" / "models" / "threat_model_compiled"
+PERFORMANCE_MODELS_DIR = ML_MODELS_DIR / "performance_prediction" / "models"
+PERFORMANCE_COMPILED_DIR = PERFORMANCE_MODELS_DIR / "performance_model_compiled"
+LOCATION_MODEL_FILE = ML_MODELS_DIR / "random_forest_model.pkl"
+LOCATION_COMPILED_DIR = ML_MODELS_DIR / "random_forest_model_compiled"
+
+# Files whose content hash is each model's version
+THREAT_SOURCE_FILES = [THREAT_MODEL_FILE]
+PERFORMANCE_SOURCE_FILES = [
+    PERFORMANCE_MODELS_DIR / "performance_model.pkl",
+    PERFORMANCE_MODELS_DIR / "scaler.pkl",
+    PERFORMANCE_MODELS_DIR / "performance_model_meta.json",
+]
+LOCATION_SOURCE_FILES = [LOCATION_MODEL_FILE]
+
+
+def compile_repo_models():
+    """Export the threat, performance and location models shipped with the repo"""
+    import joblib
+    from .model_registry import content_version
+
+    bundle = joblib.load(THREAT_MODEL_FILE)
+    export_xgboost(bundle["model"], THREAT_COMPILED_DIR,
+                   classes=bundle["label_encoder"].classes_, features=bundle["features"],
+                   source_version=content_version(THREAT_SOURCE_FILES))
+    print(f"✅ Compiled threat model -> {THREAT_COMPILED_DIR}")
+
+    with open(PERFORMANCE_MODELS_DIR / "performance_model_meta.json", "r", encoding="utf-8") as f:
+        performance_meta = json.load(f)
+    export_random_forest(
+        joblib.load(PERFORMANCE_MODELS_DIR / "performance_model.pkl"),
+        PERFORMANCE_COMPILED_DIR,
+        features=performance_meta["feature_columns"],
+        scaler=joblib.load(PERFORMANCE_MODELS_DIR / "scaler.pkl"),
+        source_version=content_version(PERFORMANCE_SOURCE_FILES)
+    )
+    print(f"✅ Compiled performance model -> {PERFORMANCE_COMPILED_DIR}")
+
+    location_model = joblib.load(LOCATION_MODEL_FILE)
+    export_random_forest(location_model, LOCATION_COMPILED_DIR,
+                         features=list(location_model.feature_names_in_),
+                         source_version=content_version(LOCATION_SOURCE_FILES))
+    print(f"✅ Compiled location model -> {LOCATION_COMPILED_DIR}")
+
+
+if __name__ == "__main__":
+    compile_repo_models()
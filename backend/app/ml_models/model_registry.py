@@ -0,0 +1,363 @@
+"""
+Versioned in-process model registry with background hot-reload.
+
+Each registered model has a loader, the files it is loaded from and a smoke
+validation. The registry serves one active version per model and keeps
+the previous one for rollback:
+
+    registry.get(name)       active LoadedModel (loads synchronously only the very first time)
+    registry.reload(name)    load + validate + atomic swap (used by the watcher)
+    registry.rollback(name)  swap back to the previous version
+
+A watcher thread (started lazily in every worker process) polls the watched
+files' mtime/size every MODEL_REGISTRY_POLL_SECONDS (default 30, 0 disables)
+and reloads changed models in the background. Requests never wait on a
+reload: they keep using the active version until the new one has loaded and
+passed validation, then pick it up via a single reference assignment.
+
+Operator actions go through a control file shared by the workers
+(MODEL_REGISTRY_CONTROL_FILE): reload_everywhere() bumps the model's
+generation and rollback_everywhere() pins the version to serve; every
+watcher follows it on its next poll, so the workers converge on one version.
+Under eventlet, loading and validation run in eventlet.tpool so they do not
+block the event loop.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl  # POSIX only: serializes control file updates between workers
+except ImportError:
+    fcntl = None
+
+try:
+    from eventlet import patcher as eventlet_patcher, tpool
+except ImportError:
+    eventlet_patcher = tpool = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_SECONDS = 30
+DEFAULT_CONTROL_FILE = os.path.join(tempfile.gettempdir(), "beehive-model-registry.json")
+
+
+def run_blocking(fn, *args):
+    """Call fn in a native thread when eventlet green threads are in use"""
+    if tpool is not None and eventlet_patcher.is_monkey_patched("thread"):
+        return tpool.execute(fn, *args)
+    return fn(*args)
+
+
+def file_fingerprint(paths):
+    """Cheap change detector: (path, mtime_ns, size) of every existing file"""
+    fingerprint = []
+    for path in paths:
+        path = Path(path)
+        if path.exists():
+            stat = path.stat()
+            fingerprint.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+def content_version(paths):
+    """Short sha256 over the contents of the given files (missing files are skipped)"""
+    digest = hashlib.sha256()
+    for path in paths:
+        path = Path(path)
+        if not path.exists():
+            continue
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class LoadedModel:
+    """One loaded version of a model: the served object plus where it came from"""
+
+    def __init__(self, name, model, version, backend, fingerprint, load_seconds, validation=None):
+        self.name = name
+        self.model = model
+        self.version = version
+        self.backend = backend
+        self.fingerprint = fingerprint
+        self.load_seconds = load_seconds
+        self.validation = validation or {}
+        self.loaded_at = time.time()
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "backend": self.backend,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 3),
+            "validation": self.validation
+        }
+
+
+class _Entry:
+    def __init__(self, name, loader, watch_paths, validate):
+        self.name = name
+        self.loader = loader
+        self.watch_paths = list(watch_paths)
+        self.validate = validate
+        self.active = None
+        self.previous = None
+        self.seen_fingerprint = None
+        self.last_error = None
+        self.reloads = 0
+        self.rollbacks = 0
+        self.reload_lock = threading.Lock()
+        # Shared control state last applied in this worker
+        self.generation = 0
+        self.pinned = None
+        self.unreachable_pin = None  # (pinned version, fingerprint) not found on disk
+
+
+class ModelRegistry:
+    """Active/previous model versions per name, with background hot-reload"""
+
+    def __init__(self, poll_seconds=None, control_file=None):
+        if poll_seconds is None:
+            poll_seconds = float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", DEFAULT_POLL_SECONDS))
+        self.poll_seconds = poll_seconds
+        self.control_file = control_file or os.getenv("MODEL_REGISTRY_CONTROL_FILE", DEFAULT_CONTROL_FILE)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+
+    def register(self, name, loader, watch_paths, validate=None):
+        """
+        Register a model.
+
+        loader() -> (model, version, backend); validate(model) -> dict of smoke
+        results, raising if the model is unusable.
+        """
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(name, loader, watch_paths, validate)
+
+    def get(self, name):
+        """Active LoadedModel for name (the first call in a process loads it)"""
+        entry = self._entries[name]
+        self._ensure_watcher()
+        active = entry.active
+        if active is None:
+            state = self._read_control().get(name, {})
+            entry.generation, entry.pinned = state.get("generation", 0), state.get("pinned")
+            # Serve what is on disk even if the pinned version is not there
+            self.reload(name)
+            active = entry.active
+            if active is None:
+                raise RuntimeError(f"Model '{name}' could not be loaded: {entry.last_error}")
+            if entry.pinned and active.version != entry.pinned:
+                logger.warning(f"⚠️ Model '{name}' is pinned to {entry.pinned} but {active.version} is on disk")
+        return active
+
+    def _load(self, entry):
+        fingerprint = file_fingerprint(entry.watch_paths)
+        start = time.perf_counter()
+        model, version, backend = entry.loader()
+        load_seconds = time.perf_counter() - start
+        validation = entry.validate(model) if entry.validate else {}
+        return LoadedModel(entry.name, model, version, backend, fingerprint, load_seconds, validation)
+
+    def reload(self, name, force=False, expected_version=None):
+        """
+        Load the model from disk, validate it and swap it in (this worker only).
+        Without force, nothing happens when the version on disk is already active.
+
+        Args:
+            expected_version: Only swap in this version (a pin); anything else on disk is left unused
+
+        Returns:
+            Dict describing the outcome
+        """
+        entry = self._entries[name]
+        with entry.reload_lock:
+            try:
+                loaded = run_blocking(self._load, entry)
+            except Exception as e:
+                # Remember the files so a broken deploy is not retried every poll
+                entry.seen_fingerprint = file_fingerprint(entry.watch_paths)
+                entry.last_error = f"{type(e).__name__}: {e}"
+                logger.error(f"❌ Model '{name}' reload failed, keeping "
+                             f"{entry.active.version if entry.active else 'nothing'}: {entry.last_error}")
+                return {"success": False, "model": name, "error": entry.last_error}
+
+            entry.seen_fingerprint = loaded.fingerprint
+            if expected_version is not None and loaded.version != expected_version:
+                entry.unreachable_pin = (expected_version, loaded.fingerprint)
+                entry.last_error = f"Pinned version {expected_version} is not on disk (found {loaded.version})"
+                logger.warning(f"⚠️ Model '{name}': {entry.last_error}")
+                return {"success": False, "model": name, "error": entry.last_error}
+            entry.last_error = None
+            current = entry.active
+            if current is not None and current.version == loaded.version and not force:
+                return {"success": True, "model": name, "swapped": False, "version": current.version}
+
+            # Single reference assignment: readers see either the old or the new version
+            entry.previous, entry.active = current, loaded
+            entry.reloads += 1
+            logger.info(f"🔄 Model '{name}' now serving {loaded.version} ({loaded.backend}, "
+                        f"{loaded.load_seconds:.2f}s load)"
+                        + (f", previous {current.version}" if current else ""))
+            return {"success": True, "model": name, "swapped": True, "version": loaded.version,
+                    "previous_version": current.version if current else None}
+
+    def rollback(self, name):
+        """Swap the active and previous versions"""
+        entry = self._entries[name]
+        with entry.reload_lock:
+            if entry.previous is None:
+                return {"success": False, "model": name, "error": "No previous version to roll back to"}
+            entry.active, entry.previous = entry.previous, entry.active
+            entry.rollbacks += 1
+            logger.warning(f"⏪ Model '{name}' rolled back to {entry.active.version}")
+            return {"success": True, "model": name, "version": entry.active.version,
+                    "previous_version": entry.previous.version}
+
+    # ========== SHARED CONTROL FILE ==========
+    def _update_control(self, change=None):
+        """Read the control file, optionally write change(state) back (under flock)"""
+        directory = os.path.dirname(self.control_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.control_file, "a+", encoding="utf-8") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX if change else fcntl.LOCK_SH)
+            try:
+                handle.seek(0)
+                try:
+                    state = json.loads(handle.read() or "{}")
+                except ValueError:
+                    state = {}
+                if change is not None:
+                    state = change(state)
+                    handle.seek(0)
+                    handle.truncate()
+                    handle.write(json.dumps(state))
+                    handle.flush()
+                return state
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _read_control(self):
+        try:
+            return self._update_control()
+        except OSError as e:
+            logger.error(f"Cannot read model registry control file {self.control_file}: {e}")
+            return {}
+
+    def _publish(self, name, pinned):
+        """Bump the model's generation with a pin (None = follow the files on disk)"""
+        def change(state):
+            previous = state.get(name, {})
+            state[name] = {"generation": previous.get("generation", 0) + 1, "pinned": pinned,
+                           "updated_at": time.time(), "pid": os.getpid()}
+            return state
+        published = self._update_control(change)[name]
+        entry = self._entries[name]
+        entry.generation, entry.pinned, entry.unreachable_pin = published["generation"], pinned, None
+        return published["generation"]
+
+    def reload_everywhere(self, name, force=False):
+        """Reload here, then have every worker serve the files on disk (clears a pin)"""
+        result = self.reload(name, force=force)
+        if result["success"]:
+            result["generation"] = self._publish(name, None)
+        return result
+
+    def rollback_everywhere(self, name):
+        """Roll back here, then pin every worker to the version now served"""
+        result = self.rollback(name)
+        if result["success"]:
+            result["generation"] = self._publish(name, result["version"])
+        return result
+
+    def _follow(self, name, entry, pinned):
+        """Move this worker to the shared state: the pinned version, or the files on disk"""
+        if pinned is None:
+            return self.reload(name)
+        if entry.active.version == pinned:
+            return None
+        if entry.previous is not None and entry.previous.version == pinned:
+            return self.rollback(name)
+        if entry.unreachable_pin == (pinned, file_fingerprint(entry.watch_paths)):
+            return None  # already tried these files
+        return self.reload(name, expected_version=pinned)
+
+    def poll(self):
+        """
+        Apply the shared control state, then reload every model whose watched
+        files changed since they were last seen (unless a pin says otherwise)
+        """
+        control = self._read_control()
+        results = []
+        for name, entry in list(self._entries.items()):
+            if entry.active is None:
+                continue
+            state = control.get(name, {})
+            generation, pinned = state.get("generation", 0), state.get("pinned")
+            if generation != entry.generation:
+                entry.generation, entry.pinned = generation, pinned
+                results.append(self._follow(name, entry, pinned))
+            elif pinned is not None and entry.active.version != pinned:
+                results.append(self._follow(name, entry, pinned))
+            elif file_fingerprint(entry.watch_paths) != entry.seen_fingerprint:
+                results.append(self.reload(name, expected_version=pinned))
+        return [result for result in results if result is not None]
+
+    def _ensure_watcher(self):
+        """Start the polling thread in this process (threads do not survive fork)"""
+        if self.poll_seconds <= 0:
+            return
+        if self._watcher is not None and self._watcher_pid == os.getpid() and self._watcher.is_alive():
+            return
+        with self._lock:
+            if self._watcher is not None and self._watcher_pid == os.getpid() and self._watcher.is_alive():
+                return
+            self._watcher_pid = os.getpid()
+            self._watcher = threading.Thread(target=self._watch_loop, name="model-registry-watcher", daemon=True)
+            self._watcher.start()
+
+    def _watch_loop(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Model registry poll failed: {str(e)}")
+
+    def status(self):
+        """Active/previous versions and reload counters for every model"""
+        return {
+            "pid": os.getpid(),
+            "poll_seconds": self.poll_seconds,
+            "control_file": self.control_file,
+            "models": {
+                name: {
+                    "active": entry.active.to_dict() if entry.active else None,
+                    "previous": entry.previous.to_dict() if entry.previous else None,
+                    "reloads": entry.reloads,
+                    "rollbacks": entry.rollbacks,
+                    "last_error": entry.last_error,
+                    "generation": entry.generation,
+                    "pinned": entry.pinned,
+                    "watch_paths": [str(path) for path in entry.watch_paths]
+                }
+                for name, entry in self._entries.items()
+            }
+        }
+
+
+# Process-wide registry
+model_registry = ModelRegistry()
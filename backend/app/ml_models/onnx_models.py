@@ -0,0 +1,189 @@
+"""
+ONNX export of the tree models and an ONNX Runtime CPU evaluator.
+
+Graphs (one .onnx file per model, next to the joblib files):
+    threat_model.onnx        XGBoost softprob, float32 input (N x 16)
+    performance_model.onnx   MinMaxScaler + RandomForest pipeline, float64 input
+                             (raw weekly features; the scaler is part of the graph)
+
+Graph metadata (custom_metadata_map) records classes, features, whether
+the scaler is included and source_version, the content hash of the model
+files the graph was exported from (checked before serving, like the
+compiled artifacts).
+
+Exporting needs onnxmltools (XGBoost) / skl2onnx (sklearn); serving only
+needs onnxruntime. Selected with TREE_MODEL_BACKEND=onnx (see compiled_trees);
+ONNX_NUM_THREADS sets the intra-op threads per session (default 1: each
+worker/greenlet runs one small batch, scale out with workers instead).
+
+Regenerate from the shipped joblib models: python -m app.ml_models.onnx_models
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .compiled_trees import (
+    PERFORMANCE_MODELS_DIR, PERFORMANCE_SOURCE_FILES, THREAT_MODEL_FILE, THREAT_SOURCE_FILES, tree_backend
+)
+
+THREAT_ONNX_FILE = THREAT_MODEL_FILE.with_suffix(".onnx")
+PERFORMANCE_ONNX_FILE = PERFORMANCE_MODELS_DIR / "performance_model.onnx"
+
+# ai.onnx / ai.onnx.ml opsets supported by the converters and onnxruntime >= 1.14
+ONNX_OPSET = 15
+ONNX_ML_OPSET = 3
+
+
+def onnx_num_threads():
+    """Intra-op threads per InferenceSession (ONNX_NUM_THREADS, default 1)"""
+    try:
+        return max(int(os.getenv("ONNX_NUM_THREADS", "1")), 0)
+    except ValueError:
+        return 1
+
+
+def use_onnx(onnx_file):
+    """Whether the ONNX graph at onnx_file should be served (TREE_MODEL_BACKEND=onnx)"""
+    if tree_backend() != "onnx":
+        return False
+    if not Path(onnx_file).exists():
+        raise FileNotFoundError(f"ONNX model not found: {onnx_file}")
+    return True
+
+
+# ========== EVALUATOR ==========
+class OnnxTreeModel:
+    """onnxruntime session with the predict_proba / predict / transform surface of the other backends"""
+
+    def __init__(self, onnx_file, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = onnx_num_threads() if num_threads is None else num_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        self.onnx_file = str(onnx_file)
+        self.session = ort.InferenceSession(self.onnx_file, options, providers=["CPUExecutionProvider"])
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.meta = {key: json.loads(value) for key, value in metadata.items()}
+        self.classes_ = np.asarray(self.meta["classes"])
+        self.features = self.meta.get("features")
+
+        graph_input = self.session.get_inputs()[0]
+        self._input_name = graph_input.name
+        self._dtype = np.float64 if graph_input.type == "tensor(double)" else np.float32
+        self._proba_output = "probabilities"
+
+    def transform(self, X):
+        """Scaling happens inside the graph: only convert to the graph's input dtype"""
+        return np.ascontiguousarray(np.asarray(X, dtype=self._dtype))
+
+    def predict_proba(self, X):
+        X = np.ascontiguousarray(np.asarray(X, dtype=self._dtype))
+        return self.session.run([self._proba_output], {self._input_name: X})[0]
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def load_onnx(onnx_file, num_threads=None):
+    return OnnxTreeModel(onnx_file, num_threads=num_threads)
+
+
+def onnx_is_current(onnx_model, source_version):
+    """Whether the graph was exported from the model files with source_version"""
+    exported_from = onnx_model.meta.get("source_version")
+    return exported_from is None or exported_from == source_version
+
+
+# ========== EXPORTERS ==========
+def _save_onnx(onnx_model, onnx_file, meta):
+    """Attach meta as custom metadata and write atomically"""
+    for key, value in meta.items():
+        entry = onnx_model.metadata_props.add()
+        entry.key, entry.value = key, json.dumps(value)
+    onnx_file = Path(onnx_file)
+    onnx_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = onnx_file.with_suffix(".onnx.tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(onnx_model.SerializeToString())
+    os.replace(tmp_file, onnx_file)
+    return onnx_file
+
+
+def export_xgboost_onnx(model, onnx_file, classes, features, source_version=None):
+    """
+    Convert a multi:softprob XGBClassifier to ONNX (float32 input).
+    classes: class names in model output order (label_encoder.classes_)
+    """
+    import copy
+    from onnxmltools import convert_xgboost
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    # The converter only understands f0..fN feature names; inputs are positional anyway
+    model = copy.deepcopy(model)
+    model.get_booster().feature_names = None
+    onnx_model = convert_xgboost(model, initial_types=[("input", FloatTensorType([None, len(features)]))],
+                                 target_opset=ONNX_OPSET)
+    meta = {
+        "classes": [str(c) for c in classes],
+        "features": list(features),
+        "includes_scaler": False,
+        "source_version": source_version,
+    }
+    return _save_onnx(onnx_model, onnx_file, meta)
+
+
+def export_sklearn_onnx(model, onnx_file, features, scaler=None, source_version=None):
+    """
+    Convert a fitted sklearn classifier (optionally preceded by its fitted
+    scaler) to one ONNX graph with float64 input and probability tensors.
+    """
+    from skl2onnx import to_onnx
+    from skl2onnx.common.data_types import DoubleTensorType
+    from sklearn.pipeline import Pipeline
+
+    estimator = Pipeline([("scaler", scaler), ("model", model)]) if scaler is not None else model
+    onnx_model = to_onnx(
+        estimator,
+        initial_types=[("input", DoubleTensorType([None, len(features)]))],
+        options={id(model): {"zipmap": False}},
+        target_opset={"": ONNX_OPSET, "ai.onnx.ml": ONNX_ML_OPSET}
+    )
+    meta = {
+        "classes": np.asarray(model.classes_).tolist(),
+        "features": list(features),
+        "includes_scaler": scaler is not None,
+        "source_version": source_version,
+    }
+    return _save_onnx(onnx_model, onnx_file, meta)
+
+
+# ========== REPO MODELS ==========
+def export_repo_models():
+    """Export the threat and performance models shipped with the repo"""
+    import joblib
+    from .model_registry import content_version
+
+    bundle = joblib.load(THREAT_MODEL_FILE)
+    export_xgboost_onnx(bundle["model"], THREAT_ONNX_FILE, classes=bundle["label_encoder"].classes_,
+                        features=bundle["features"], source_version=content_version(THREAT_SOURCE_FILES))
+    print(f"✅ Exported threat model -> {THREAT_ONNX_FILE}")
+
+    with open(PERFORMANCE_MODELS_DIR / "performance_model_meta.json", "r", encoding="utf-8") as f:
+        performance_meta = json.load(f)
+    export_sklearn_onnx(
+        joblib.load(PERFORMANCE_MODELS_DIR / "performance_model.pkl"),
+        PERFORMANCE_ONNX_FILE,
+        features=performance_meta["feature_columns"],
+        scaler=joblib.load(PERFORMANCE_MODELS_DIR / "scaler.pkl"),
+        source_version=content_version(PERFORMANCE_SOURCE_FILES)
+    )
+    print(f"✅ Exported performance model -> {PERFORMANCE_ONNX_FILE}")
+
+
+if __name__ == "__main__":
+    export_repo_models()
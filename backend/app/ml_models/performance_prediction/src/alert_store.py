@@ -6,18 +6,149 @@
 
 import json
 import pandas as pd
+from collections import deque
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import os
+import sys
+
+from sqlalchemy import create_engine, Column, String, Text, DateTime, Index, func
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+# Shared segment log lives in the backend app package
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from app.utils.segment_log import SegmentLog
+
+# Performance alert types counted by the consecutive-poor check
+POOR_ALERT_TYPES = ('POOR_PERFORMANCE', 'CRITICAL_PERFORMANCE')
+
+# ===============================================================================
+# Optional database backend
+# ===============================================================================
+Base = declarative_base()
+
+class PerformanceAlertRow(Base):
+    """One performance alert; the full alert dict is kept in alert_json"""
+    __tablename__ = "performance_alerts"
+    __table_args__ = (
+        Index("ix_performance_alerts_status_hive", "status", "hive_id"),
+        Index("ix_performance_alerts_hive_timestamp", "hive_id", "timestamp"),
+    )
+    alert_id = Column(String(96), primary_key=True)
+    hive_id = Column(String(64), nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    alert_type = Column(String(64), nullable=False)
+    priority = Column(String(16), nullable=False)
+    status = Column(String(16), nullable=False)
+    alert_json = Column(Text, nullable=False)
+
+class PerformanceAlertDB:
+    """Alert history in SQL: primary-key lookups, status counts from the status index"""
+    
+    def __init__(self, database_url: str):
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+    
+    def get(self, alert_id: str) -> Optional[Dict]:
+        session = self.Session()
+        try:
+            row = session.get(PerformanceAlertRow, alert_id)
+            return json.loads(row.alert_json) if row else None
+        finally:
+            session.close()
+    
+    def active_alerts(self) -> List[Dict]:
+        session = self.Session()
+        try:
+            rows = (session.query(PerformanceAlertRow.alert_json)
+                    .filter(PerformanceAlertRow.status == 'ACTIVE')
+                    .order_by(PerformanceAlertRow.timestamp))
+            return [json.loads(alert_json) for (alert_json,) in rows]
+        finally:
+            session.close()
+    
+    def status_counts(self) -> Dict[str, int]:
+        session = self.Session()
+        try:
+            rows = session.query(PerformanceAlertRow.status, func.count()).group_by(PerformanceAlertRow.status)
+            return {status: count for status, count in rows}
+        finally:
+            session.close()
+    
+    def upsert(self, alerts: List[Dict]):
+        """Insert new alerts and rewrite changed ones in one transaction"""
+        session = self.Session()
+        try:
+            for alert in alerts:
+                session.merge(PerformanceAlertRow(
+                    alert_id=alert['alert_id'],
+                    hive_id=str(alert['hive_id']),
+                    timestamp=datetime.fromisoformat(alert['timestamp']),
+                    alert_type=alert['alert_type'],
+                    priority=alert['priority'],
+                    status=alert['status'],
+                    alert_json=json.dumps(alert, default=str),
+                ))
+            session.commit()
+        finally:
+            session.close()
+    
+    def alerts_between(self, since=None, until=None, hive_id: Optional[str] = None,
+                       limit: Optional[int] = None) -> List[Dict]:
+        """Alerts in [since, until), newest first (hive/timestamp index)"""
+        def as_datetime(value):
+            return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+        session = self.Session()
+        try:
+            query = session.query(PerformanceAlertRow.alert_json)
+            if hive_id is not None:
+                query = query.filter(PerformanceAlertRow.hive_id == str(hive_id))
+            if since is not None:
+                query = query.filter(PerformanceAlertRow.timestamp >= as_datetime(since))
+            if until is not None:
+                query = query.filter(PerformanceAlertRow.timestamp < as_datetime(until))
+            query = query.order_by(PerformanceAlertRow.timestamp.desc())
+            if limit is not None:
+                query = query.limit(limit)
+            return [json.loads(alert_json) for (alert_json,) in query]
+        finally:
+            session.close()
+    
+    def all_alerts(self) -> List[Dict]:
+        session = self.Session()
+        try:
+            rows = session.query(PerformanceAlertRow.alert_json).order_by(PerformanceAlertRow.timestamp)
+            return [json.loads(alert_json) for (alert_json,) in rows.yield_per(1000)]
+        finally:
+            session.close()
 
 class HivePerformanceAlertStore:
-    """Manage and store hive performance alerts"""
+    """
+    Manage and store hive performance alerts
+    
+    Alerts are indexed in memory by alert_id, hive and status, with summary
+    counts kept incrementally, so lookups, acknowledgements and summaries do
+    not scan the history. Alerts persist to an append-only JSONL log, or to
+    the performance_alerts table when database_url (or
+    PERFORMANCE_ALERTS_DATABASE_URL) is set; the database backend keeps only
+    ACTIVE alerts in memory and looks older ones up by primary key.
+    """
     
-    def __init__(self, alerts_file="outputs/alerts.json"):
+    def __init__(self, alerts_file="outputs/alerts.json", database_url: Optional[str] = None):
         """Initialize the alert store"""
-        self.alerts_file = alerts_file
-        self.alerts = []
-        self.load_alerts()
+        self.alerts_file = alerts_file  # legacy whole-file store, imported once
+        self.log_dir = os.path.splitext(alerts_file)[0] + "_log"
+        database_url = database_url or os.getenv("PERFORMANCE_ALERTS_DATABASE_URL")
+        self.db = PerformanceAlertDB(database_url) if database_url else None
+        # Append-only log keyed by alert_id: updates append a new version of the alert
+        self.log = None if self.db else SegmentLog(self.log_dir, key_field='alert_id')
+        self._unsaved = {}  # alert_id -> alert created/changed since the last save
         
         # Alert thresholds
         self.alert_thresholds = {
@@ -37,46 +168,150 @@ class HivePerformanceAlertStore:
             'LOW': 4,
             'INFO': 5
         }
+        
+        self.load_alerts()
+    
+    # ========== INDEXES ==========
+    def _reset_indexes(self):
+        self._by_id = {}        # alert_id -> alert (insertion ordered)
+        self._by_hive = {}      # hive_id -> {alert_id: None}
+        self._by_status = {}    # status -> {alert_id: None}
+        self._recent_poor = {}  # hive_id -> deque of (timestamp, alert_id) for poor/critical alerts
+        self._status_counts = {}          # all alerts, including DB history not held in memory
+        self._active_priority_counts = {}
+        self._active_hive_counts = {}
+    
+    @staticmethod
+    def _bump(counts: Dict, key, delta: int):
+        counts[key] = counts.get(key, 0) + delta
+        if counts[key] <= 0:
+            del counts[key]
     
+    def _index(self, alert: Dict, count: bool = True):
+        """Add an alert to the in-memory indexes (count=False: already in _status_counts)"""
+        alert_id = alert['alert_id']
+        self._by_id[alert_id] = alert
+        self._by_hive.setdefault(alert['hive_id'], {})[alert_id] = None
+        self._by_status.setdefault(alert['status'], {})[alert_id] = None
+        if count:
+            self._bump(self._status_counts, alert['status'], 1)
+        if alert['status'] == 'ACTIVE':
+            self._bump(self._active_priority_counts, alert['priority'], 1)
+            self._bump(self._active_hive_counts, alert['hive_id'], 1)
+            if alert['alert_type'] in POOR_ALERT_TYPES:
+                self._recent_poor.setdefault(alert['hive_id'], deque(maxlen=1000)).append(
+                    (alert['timestamp'], alert_id))
+    
+    def _set_status(self, alert: Dict, status: str):
+        """Move an alert between status indexes and counters"""
+        old_status = alert['status']
+        if old_status == status:
+            return
+        alert_id = alert['alert_id']
+        self._by_status.get(old_status, {}).pop(alert_id, None)
+        self._bump(self._status_counts, old_status, -1)
+        self._bump(self._status_counts, status, 1)
+        if old_status == 'ACTIVE':
+            self._bump(self._active_priority_counts, alert['priority'], -1)
+            self._bump(self._active_hive_counts, alert['hive_id'], -1)
+        alert['status'] = status
+        if self.db is not None and status != 'ACTIVE':
+            # Database backend keeps only active alerts in memory
+            self._by_id.pop(alert_id, None)
+            self._by_hive.get(alert['hive_id'], {}).pop(alert_id, None)
+        else:
+            self._by_status.setdefault(status, {})[alert_id] = None
+    
+    def _lookup(self, alert_id: str) -> Optional[Dict]:
+        """O(1) alert lookup: memory first, then the database primary key"""
+        alert = self._by_id.get(alert_id)
+        if alert is None and self.db is not None:
+            alert = self._unsaved.get(alert_id) or self.db.get(alert_id)
+        return alert
+    
+    @property
+    def alerts(self) -> List[Dict]:
+        """Alerts held in memory, oldest first (all alerts, or active ones with the DB backend)"""
+        return list(self._by_id.values())
+    
+    # ========== PERSISTENCE ==========
     def load_alerts(self):
-        """Load existing alerts from file"""
+        """Load existing alerts and build the indexes"""
+        self._reset_indexes()
         try:
-            if os.path.exists(self.alerts_file):
-                with open(self.alerts_file, 'r') as f:
-                    data = json.load(f)
-                    self.alerts = data.get('alerts', [])
-                print(f"✅ Loaded {len(self.alerts)} existing alerts")
+            self._import_legacy_alerts()
+            if self.db is not None:
+                self._status_counts = self.db.status_counts()
+                for alert in self.db.active_alerts():
+                    self._index(alert, count=False)
+                total = sum(self._status_counts.values())
+            else:
+                for alert in self.log.read_all():
+                    self._index(alert)
+                total = len(self._by_id)
+            if total:
+                print(f"✅ Loaded {total} existing alerts ({self._status_counts.get('ACTIVE', 0)} active)")
             else:
-                print("📝 No existing alerts file found - starting fresh")
-                # Create directory if it doesn't exist
-                os.makedirs(os.path.dirname(self.alerts_file), exist_ok=True)
+                print("📝 No existing alerts found - starting fresh")
         except Exception as e:
             print(f"⚠️ Error loading alerts: {str(e)}")
-            self.alerts = []
+            self._reset_indexes()
+    
+    def _import_legacy_alerts(self):
+        """Move alerts from the old whole-file JSON store into an empty log/table"""
+        if not os.path.exists(self.alerts_file):
+            return
+        if (self.db.status_counts() if self.db is not None else len(self.log)):
+            return
+        with open(self.alerts_file, 'r') as f:
+            legacy = json.load(f).get('alerts', [])
+        if self.db is not None:
+            self.db.upsert(legacy)
+        else:
+            for alert in legacy:
+                self.log.append(alert)
+            self.log.sync()
+        print(f"📦 Imported {len(legacy)} alerts from {self.alerts_file}")
     
     def save_alerts(self):
-        """Save alerts to file"""
+        """Persist alerts created or changed since the last save"""
         try:
-            alert_data = {
-                'last_updated': datetime.now().isoformat(),
-                'total_alerts': len(self.alerts),
-                'alerts': self.alerts
-            }
-            
-            with open(self.alerts_file, 'w') as f:
-                json.dump(alert_data, f, indent=2, default=str)
-            print(f"💾 Saved {len(self.alerts)} alerts to {self.alerts_file}")
+            if self.db is not None:
+                self.db.upsert(list(self._unsaved.values()))
+            else:
+                for alert in self._unsaved.values():
+                    self.log.append(alert)
+                self.log.sync()
+            if self._unsaved:
+                target = "performance_alerts" if self.db is not None else self.log_dir
+                print(f"💾 Saved {len(self._unsaved)} alert updates to {target}")
+            self._unsaved = {}
         except Exception as e:
             print(f"❌ Error saving alerts: {str(e)}")
     
+    def get_alerts_between(self, since=None, until=None, hive_id: Optional[str] = None,
+                           limit: Optional[int] = None):
+        """Alerts in [since, until), newest first, via the log's offset index or the hive/timestamp index"""
+        if self.db is not None:
+            return self.db.alerts_between(since, until, hive_id=hive_id, limit=limit)
+        return self.log.read_range(since, until, hive_id=hive_id, limit=limit)
+    
     def create_alert(self, hive_id: str, alert_type: str, message: str, 
                     priority: str = "MEDIUM", prediction_data: Dict = None,
                     metadata: Dict = None):
         """Create a new alert"""
+        now = datetime.now()
+        alert_id = f"ALERT_{now.strftime('%Y%m%d_%H%M%S_%f')}_{hive_id}"
+        suffix = 1
+        while alert_id in self._by_id or alert_id in self._unsaved:
+            # Same microsecond (or a clock step back): keep ids unique
+            alert_id = f"ALERT_{now.strftime('%Y%m%d_%H%M%S_%f')}_{hive_id}_{suffix}"
+            suffix += 1
+        
         alert = {
-            'alert_id': f"ALERT_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{hive_id}",
+            'alert_id': alert_id,
             'hive_id': hive_id,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now.isoformat(),
             'alert_type': alert_type,
             'priority': priority,
             'priority_score': self.alert_priorities.get(priority, 3),
@@ -89,7 +324,8 @@ class HivePerformanceAlertStore:
             'resolution_notes': None
         }
         
-        self.alerts.append(alert)
+        self._index(alert)
+        self._unsaved[alert_id] = alert
         print(f"🚨 Created {priority} alert for {hive_id}: {message}")
         return alert
     
@@ -223,40 +459,45 @@ class HivePerformanceAlertStore:
         """Check for consecutive poor performance readings"""
         alerts = []
         
-        # Get recent alerts for this hive
-        recent_alerts = [a for a in self.alerts if a['hive_id'] == hive_id 
-                        and a['alert_type'] in ['POOR_PERFORMANCE', 'CRITICAL_PERFORMANCE']
-                        and a['status'] == 'ACTIVE']
+        # Active poor/critical alerts for this hive in the last 24 hours (per-hive deque)
+        recent = self._recent_poor.get(hive_id)
+        if not recent:
+            return alerts
+        recent_time = (datetime.now() - timedelta(hours=24)).isoformat()
+        while recent and recent[0][0] <= recent_time:
+            recent.popleft()
+        recent_alerts_24h = [alert_id for _, alert_id in recent
+                             if alert_id in self._by_status.get('ACTIVE', {})]
         
-        # Check if we have reached the threshold
-        if len(recent_alerts) >= self.alert_thresholds['consecutive_poor']:
-            # Check if these are within a reasonable time frame (e.g., last 24 hours)
-            recent_time = datetime.now() - timedelta(hours=24)
-            recent_alerts_24h = [a for a in recent_alerts 
-                               if datetime.fromisoformat(a['timestamp'].replace('Z', '+00:00')) > recent_time]
-            
-            if len(recent_alerts_24h) >= self.alert_thresholds['consecutive_poor']:
-                alert = self.create_alert(
-                    hive_id=hive_id,
-                    alert_type="CONSECUTIVE_POOR_PERFORMANCE",
-                    message=f"Consecutive poor performance detected ({len(recent_alerts_24h)} readings in 24h) - urgent intervention needed",
-                    priority="CRITICAL",
-                    metadata={
-                        'consecutive_count': len(recent_alerts_24h),
-                        'trigger': 'consecutive_poor_threshold'
-                    }
-                )
-                alerts.append(alert)
+        if len(recent_alerts_24h) >= self.alert_thresholds['consecutive_poor']:
+            alert = self.create_alert(
+                hive_id=hive_id,
+                alert_type="CONSECUTIVE_POOR_PERFORMANCE",
+                message=f"Consecutive poor performance detected ({len(recent_alerts_24h)} readings in 24h) - urgent intervention needed",
+                priority="CRITICAL",
+                metadata={
+                    'consecutive_count': len(recent_alerts_24h),
+                    'trigger': 'consecutive_poor_threshold'
+                }
+            )
+            alerts.append(alert)
         
         return alerts
     
     def get_active_alerts(self, hive_id: Optional[str] = None, priority: Optional[str] = None):
         """Get active alerts, optionally filtered by hive_id and/or priority"""
-        filtered_alerts = [a for a in self.alerts if a['status'] == 'ACTIVE']
-        
+        active_ids = self._by_status.get('ACTIVE', {})
         if hive_id:
-            filtered_alerts = [a for a in filtered_alerts if a['hive_id'] == hive_id]
+            hive_ids = self._by_hive.get(hive_id, {})
+            # Walk the smaller index
+            if len(hive_ids) < len(active_ids):
+                candidate_ids = [alert_id for alert_id in hive_ids if alert_id in active_ids]
+            else:
+                candidate_ids = [alert_id for alert_id in active_ids if alert_id in hive_ids]
+        else:
+            candidate_ids = list(active_ids)
         
+        filtered_alerts = [self._by_id[alert_id] for alert_id in candidate_ids]
         if priority:
             filtered_alerts = [a for a in filtered_alerts if a['priority'] == priority]
         
@@ -267,60 +508,44 @@ class HivePerformanceAlertStore:
     
     def acknowledge_alert(self, alert_id: str, acknowledged_by: str = "System"):
         """Acknowledge an alert"""
-        for alert in self.alerts:
-            if alert['alert_id'] == alert_id:
-                alert['acknowledged'] = True
-                alert['acknowledged_by'] = acknowledged_by
-                alert['acknowledged_at'] = datetime.now().isoformat()
-                self.save_alerts()
-                print(f"✅ Alert {alert_id} acknowledged by {acknowledged_by}")
-                return True
+        alert = self._lookup(alert_id)
+        if alert is not None:
+            alert['acknowledged'] = True
+            alert['acknowledged_by'] = acknowledged_by
+            alert['acknowledged_at'] = datetime.now().isoformat()
+            self._unsaved[alert_id] = alert
+            self.save_alerts()
+            print(f"✅ Alert {alert_id} acknowledged by {acknowledged_by}")
+            return True
         
         print(f"⚠️ Alert {alert_id} not found")
         return False
     
     def resolve_alert(self, alert_id: str, resolution_notes: str, resolved_by: str = "System"):
         """Resolve an alert"""
-        for alert in self.alerts:
-            if alert['alert_id'] == alert_id:
-                alert['resolved'] = True
-                alert['status'] = 'RESOLVED'
-                alert['resolution_notes'] = resolution_notes
-                alert['resolved_by'] = resolved_by
-                alert['resolved_at'] = datetime.now().isoformat()
-                self.save_alerts()
-                print(f"✅ Alert {alert_id} resolved by {resolved_by}")
-                return True
+        alert = self._lookup(alert_id)
+        if alert is not None:
+            alert['resolved'] = True
+            self._set_status(alert, 'RESOLVED')
+            alert['resolution_notes'] = resolution_notes
+            alert['resolved_by'] = resolved_by
+            alert['resolved_at'] = datetime.now().isoformat()
+            self._unsaved[alert_id] = alert
+            self.save_alerts()
+            print(f"✅ Alert {alert_id} resolved by {resolved_by}")
+            return True
         
         print(f"⚠️ Alert {alert_id} not found")
         return False
     
     def get_alert_summary(self):
-        """Get summary statistics of alerts"""
-        total_alerts = len(self.alerts)
-        active_alerts = len([a for a in self.alerts if a['status'] == 'ACTIVE'])
-        resolved_alerts = len([a for a in self.alerts if a['status'] == 'RESOLVED'])
-        
-        # Priority breakdown
-        priority_counts = {}
-        for alert in self.alerts:
-            if alert['status'] == 'ACTIVE':
-                priority = alert['priority']
-                priority_counts[priority] = priority_counts.get(priority, 0) + 1
-        
-        # Hive breakdown
-        hive_counts = {}
-        for alert in self.alerts:
-            if alert['status'] == 'ACTIVE':
-                hive_id = alert['hive_id']
-                hive_counts[hive_id] = hive_counts.get(hive_id, 0) + 1
-        
+        """Get summary statistics of alerts (maintained incrementally)"""
         summary = {
-            'total_alerts': total_alerts,
-            'active_alerts': active_alerts,
-            'resolved_alerts': resolved_alerts,
-            'priority_breakdown': priority_counts,
-            'hive_breakdown': hive_counts,
+            'total_alerts': sum(self._status_counts.values()),
+            'active_alerts': self._status_counts.get('ACTIVE', 0),
+            'resolved_alerts': self._status_counts.get('RESOLVED', 0),
+            'priority_breakdown': dict(self._active_priority_counts),
+            'hive_breakdown': dict(self._active_hive_counts),
             'last_updated': datetime.now().isoformat()
         }
         
@@ -331,9 +556,10 @@ class HivePerformanceAlertStore:
         if not filename:
             filename = f"outputs/alerts_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
-        df = pd.DataFrame(self.alerts)
+        alerts = self.db.all_alerts() if self.db is not None else self.alerts
+        df = pd.DataFrame(alerts)
         df.to_csv(filename, index=False)
-        print(f"📊 Exported {len(self.alerts)} alerts to {filename}")
+        print(f"📊 Exported {len(alerts)} alerts to {filename}")
         return filename
 
 def demo_alert_system():
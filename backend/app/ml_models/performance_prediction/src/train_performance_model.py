@@ -5,6 +5,7 @@
 # ===============================================================================
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 import joblib
@@ -197,9 +198,33 @@ def save_model_artifacts(best_model, scaler, feature_cols, best_model_name, labe
     print(f"✅ Scaler saved: {scaler_filename}")
     print(f"✅ Metadata saved: models/performance_model_meta.json")
 
+    export_onnx_graph(best_model, scaler, feature_cols, model_filename, scaler_filename,
+                      "models/performance_model_meta.json")
+
     return model_filename, scaler_filename
 
 
+def export_onnx_graph(best_model, scaler, feature_cols, model_filename, scaler_filename, meta_filename):
+    """Save scaler + model as one ONNX graph for the onnxruntime serving backend (TREE_MODEL_BACKEND=onnx)"""
+    onnx_filename = "models/performance_model.onnx"
+
+    # The exporter lives in the backend package (this script runs from performance_prediction/)
+    backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    if backend_dir not in sys.path:
+        sys.path.append(backend_dir)
+    try:
+        from app.ml_models.model_registry import content_version
+        from app.ml_models.onnx_models import export_sklearn_onnx
+        export_sklearn_onnx(
+            best_model, onnx_filename, features=feature_cols, scaler=scaler,
+            source_version=content_version([model_filename, scaler_filename, meta_filename])
+        )
+        print(f"✅ ONNX graph saved: {onnx_filename}")
+    except Exception as e:
+        # Optional artifact: missing converter or unsupported model type
+        print(f"⚠️ Skipped ONNX export ({e}) - needs skl2onnx")
+
+
 def train_pipeline(data, feature_cols):
     """Complete training pipeline"""
     print("🚀 STARTING HIVE PERFORMANCE MODEL TRAINING")
@@ -1,20 +1,41 @@
 from pathlib import Path
 import json
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
 import os
+import threading
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, DateTime
+from sqlalchemy import create_engine, Column, Integer, String, Float, Text, DateTime, Index, UniqueConstraint, func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker, defer
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from .alert_writer import AlertWriter, register_exit_flush
+from ....utils.segment_log import SegmentLog
 
 # ========== JSON FALLBACK ==========
 PACKAGE_ROOT = Path(__file__).resolve().parent.parent
 OUTPUTS_DIR = PACKAGE_ROOT / "outputs"
 OUTPUTS_DIR.mkdir(exist_ok=True, parents=True)
-ALERTS_FILE = OUTPUTS_DIR / "alerts.json"
+ALERTS_FILE = OUTPUTS_DIR / "alerts.json"  # legacy whole-file store, imported into the log once
+ALERTS_LOG_DIR = OUTPUTS_DIR / "alerts_log"
+
+_alerts = []  # in-memory alerts (newest 500)
+
+# Append-only fallback log: O(1) appends, time/hive range reads via its offset index
+_alert_log = SegmentLog(
+    ALERTS_LOG_DIR,
+    retention_records=int(os.getenv("ALERT_LOG_RETENTION", 50000)),
+    fsync_every=int(os.getenv("ALERT_LOG_FSYNC_EVERY", 32)),
+)
+
+# Upper bound on rows returned by a single alert query
+MAX_QUERY_LIMIT = 1000
 
-_alerts = []  # in-memory alerts
+# hive_id stored for alerts that do not belong to a hive (unique keys cannot hold NULL)
+NO_HIVE = 0
+# severity stored in rollups for alerts without one
+NO_SEVERITY = ""
 
 # ========== MYSQL SETUP ==========
 DATABASE_URL = os.getenv(
@@ -32,12 +53,47 @@ try:
 
     class ThreatAlert(Base):
         __tablename__ = "threat_alerts"
+        __table_args__ = (
+            # Per-hive timelines and statistics: covers hive + time window GROUP BY type/severity
+            Index("ix_threat_alerts_hive_timestamp_type_severity", "hive_id", "timestamp", "threat_type", "severity"),
+            # Per-hive threat type filters and suppression aggregation
+            Index("ix_threat_alerts_hive_type_timestamp", "hive_id", "threat_type", "timestamp"),
+            # Global threat type / severity filters, newest first
+            Index("ix_threat_alerts_type_timestamp", "threat_type", "timestamp"),
+            Index("ix_threat_alerts_severity_timestamp", "severity", "timestamp"),
+        )
         id = Column(Integer, primary_key=True, autoincrement=True)
-        timestamp = Column(DateTime, default=datetime.utcnow)
+        timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+        hive_id = Column(Integer, nullable=True)
         threat_type = Column(String(64), nullable=False)
+        severity = Column(String(16), nullable=True)
         probability = Column(Float, nullable=False)
         recommendations = Column(Text, nullable=True)
         used_features_json = Column(Text, nullable=True)
+        # synchronized_data row the alert was raised for: at most one alert per reading
+        synchronized_data_id = Column(Integer, nullable=True, unique=True, index=True)
+        # Detections aggregated into this alert by alert_suppression (1 = just this one)
+        occurrences = Column(Integer, nullable=False, default=1, server_default="1")
+        last_seen_at = Column(DateTime, nullable=True)
+
+    class ThreatAlertRollup(Base):
+        """
+        Alert count for one (hour, hive, threat type, severity).
+        Incremented in the transaction that inserts the alerts, so statistics
+        over whole hours sum these rows instead of counting threat_alerts.
+        """
+        __tablename__ = "threat_alert_rollups"
+        __table_args__ = (
+            UniqueConstraint("hive_id", "hour", "threat_type", "severity",
+                             name="uq_threat_alert_rollups_hive_hour_type_severity"),
+            Index("ix_threat_alert_rollups_hour", "hour"),
+        )
+        id = Column(Integer, primary_key=True, autoincrement=True)
+        hour = Column(DateTime, nullable=False)            # start of the UTC hour
+        hive_id = Column(Integer, nullable=False)          # NO_HIVE for alerts without a hive
+        threat_type = Column(String(64), nullable=False)
+        severity = Column(String(16), nullable=False)      # NO_SEVERITY when unknown
+        count = Column(Integer, nullable=False, default=0)
 
     # create table if not exists
     Base.metadata.create_all(bind=engine)
@@ -48,100 +104,618 @@ except Exception as e:
 
 
 # ========== JSON FUNCTIONS ==========
+def _severity_of(recommendations):
+    """Severity label stored alongside an alert (from its recommendations)."""
+    if isinstance(recommendations, dict):
+        return recommendations.get("severity")
+    return None
+
+
+def _row_to_dict(row, include_details=True):
+    """Convert a ThreatAlert row; JSON columns are only decoded when requested."""
+    alert = {
+        "id": row.id,
+        "timestamp": row.timestamp.isoformat(),
+        "hive_id": row.hive_id,
+        "threat_type": row.threat_type,
+        "probability": row.probability,
+        "severity": row.severity,
+        "synchronized_data_id": row.synchronized_data_id,
+        "occurrences": row.occurrences or 1,
+        "last_seen_at": row.last_seen_at.isoformat() if row.last_seen_at else None,
+    }
+    if include_details:
+        alert["recommendations"] = json.loads(row.recommendations) if row.recommendations else None
+        alert["used_features"] = json.loads(row.used_features_json) if row.used_features_json else None
+    return alert
+
+
 def load_alerts():
-    """Load alerts from DB if available, else JSON file."""
+    """Load alerts from DB if available, else the JSONL alert log."""
     global _alerts
     if db_available:
         try:
-            session = SessionLocal()
-            rows = session.query(ThreatAlert).order_by(ThreatAlert.timestamp.desc()).limit(500).all()
-            _alerts = [
-                {
-                    "timestamp": row.timestamp.isoformat(),
-                    "threat_type": row.threat_type,
-                    "probability": row.probability,
-                    "recommendations": json.loads(row.recommendations) if row.recommendations else None,
-                    "used_features": json.loads(row.used_features_json) if row.used_features_json else None,
-                }
-                for row in rows
-            ]
-            session.close()
+            _alerts = _query_alerts_db(limit=500)
             return _alerts
         except SQLAlchemyError as e:
             print(f"[alert_store] DB load failed, fallback to JSON: {e}")
 
-    # Fallback to JSON
-    if ALERTS_FILE.exists():
-        try:
-            with open(ALERTS_FILE, "r", encoding="utf-8") as f:
-                _alerts = json.load(f)
-        except Exception:
-            _alerts = []
-    else:
+    # Fallback to the alert log
+    try:
+        _import_legacy_alerts()
+        _alerts = _alert_log.read_range(limit=500)
+    except Exception as e:
+        print(f"[alert_store] Failed to read alert log: {e}")
         _alerts = []
     return _alerts
 
 
-def save_alerts():
-    """Persist in-memory alerts to JSON (only fallback)."""
+def _import_legacy_alerts():
+    """Move alerts from the old alerts.json into an empty log (oldest first)"""
+    if len(_alert_log) or not ALERTS_FILE.exists():
+        return
     try:
-        with open(ALERTS_FILE, "w", encoding="utf-8") as f:
-            json.dump(_alerts, f, indent=2, ensure_ascii=False)
+        with open(ALERTS_FILE, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+    except Exception:
+        return
+    for alert in sorted(legacy, key=lambda alert: alert.get("timestamp", "")):
+        _alert_log.append(alert)
+    _alert_log.sync()
+    print(f"[alert_store] Imported {len(legacy)} alerts from {ALERTS_FILE.name} into the alert log")
+
+
+def save_alert(alert):
+    """Append one alert to the JSONL log (only fallback)."""
+    try:
+        _alert_log.append(alert)
     except Exception as e:
-        print(f"[alert_store] Failed to save alerts to JSON: {e}")
+        print(f"[alert_store] Failed to append alert to log: {e}")
+
+
+def _existing_alert_db(session, reading_id):
+    """Alert already stored for a synchronized_data row (or None)"""
+    row = session.query(ThreatAlert).filter(ThreatAlert.synchronized_data_id == reading_id).first()
+    return dict(_row_to_dict(row), deduplicated=True) if row is not None else None
+
+
+def _alert_row(record):
+    """ThreatAlert for a record built by add_alert (also read back from the writer spool)"""
+    return ThreatAlert(
+        timestamp=datetime.fromisoformat(record["timestamp"]),
+        hive_id=record["hive_id"],
+        threat_type=record["threat_type"],
+        probability=record["probability"],
+        severity=record["severity"],
+        recommendations=record["recommendations"],
+        used_features_json=record["used_features_json"],
+        synchronized_data_id=record["synchronized_data_id"],
+    )
+
+
+def _remember_alert(alert):
+    _alerts.insert(0, alert)
+    if len(_alerts) > 500:
+        del _alerts[500:]
+
+
+# ========== HOURLY ROLLUPS ==========
+def _hour_of(timestamp):
+    """Start of the hour containing timestamp"""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _next_hour_from(timestamp):
+    """timestamp if it starts an hour, else the start of the next hour"""
+    hour = _hour_of(timestamp)
+    return hour if hour == timestamp else hour + timedelta(hours=1)
+
+
+def _increment_rollups(session, records):
+    """
+    Add inserted alert records to their hourly rollups.
+    Runs inside the caller's transaction after the alerts are flushed; the
+    caller commits, so rollups and alerts become visible together.
+    """
+    increments = Counter(
+        (_hour_of(datetime.fromisoformat(record["timestamp"])),
+         NO_HIVE if record["hive_id"] is None else record["hive_id"],
+         record["threat_type"],
+         record["severity"] or NO_SEVERITY)
+        for record in records
+    )
+    # Fixed key order so concurrent batches lock rollup rows in the same order
+    for (hour, hive_key, threat_type, severity), amount in sorted(increments.items()):
+        for _ in range(3):
+            updated = session.query(ThreatAlertRollup).filter(
+                ThreatAlertRollup.hive_id == hive_key,
+                ThreatAlertRollup.hour == hour,
+                ThreatAlertRollup.threat_type == threat_type,
+                ThreatAlertRollup.severity == severity,
+            ).update({ThreatAlertRollup.count: ThreatAlertRollup.count + amount}, synchronize_session=False)
+            if updated:
+                break
+            try:
+                with session.begin_nested():
+                    session.add(ThreatAlertRollup(hour=hour, hive_id=hive_key, threat_type=threat_type,
+                                                  severity=severity, count=amount))
+                break
+            except IntegrityError:
+                continue  # another worker created the row first: increment theirs
+        else:
+            raise SQLAlchemyError(f"Could not update alert rollup for hive {hive_key} at {hour}")
 
 
-def add_alert(threat_type, probability, used_features, recommendations=None):
+def _window_counts_db(session, since=None, until=None, hive_id=None):
+    """
+    Alert counts for since <= timestamp < until: {(hive_id, threat_type, severity): count}
+
+    Whole hours are summed from threat_alert_rollups (one row per hour, hive,
+    threat type and severity that had alerts); only the partial hours at the
+    ends of the window are counted from threat_alerts, so the cost does not
+    grow with the length of the window.
+    """
+    counts = Counter()
+    first_hour = _next_hour_from(since) if since is not None else None
+    end_hour = _hour_of(until) if until is not None else None
+
+    if first_hour is not None and end_hour is not None and first_hour >= end_hour:
+        raw_ranges = [(since, until)]  # no whole hour inside the window
+    else:
+        raw_ranges = []
+        if since is not None and since < first_hour:
+            raw_ranges.append((since, first_hour))
+        if until is not None and end_hour < until:
+            raw_ranges.append((end_hour, until))
+
+        query = session.query(ThreatAlertRollup.hive_id, ThreatAlertRollup.threat_type,
+                              ThreatAlertRollup.severity, func.sum(ThreatAlertRollup.count))
+        if first_hour is not None:
+            query = query.filter(ThreatAlertRollup.hour >= first_hour)
+        if end_hour is not None:
+            query = query.filter(ThreatAlertRollup.hour < end_hour)
+        if hive_id is not None:
+            query = query.filter(ThreatAlertRollup.hive_id == hive_id)
+        rows = query.group_by(ThreatAlertRollup.hive_id, ThreatAlertRollup.threat_type, ThreatAlertRollup.severity)
+        for hive_key, threat_type, severity, count in rows:
+            key = (None if hive_key == NO_HIVE else hive_key, threat_type, severity or None)
+            counts[key] += int(count or 0)
+
+    for start, end in raw_ranges:
+        query = session.query(ThreatAlert.hive_id, ThreatAlert.threat_type, ThreatAlert.severity,
+                              func.count(ThreatAlert.id)).filter(ThreatAlert.timestamp >= start)
+        if end is not None:
+            query = query.filter(ThreatAlert.timestamp < end)
+        if hive_id is not None:
+            query = query.filter(ThreatAlert.hive_id == hive_id)
+        for row_hive, threat_type, severity, count in query.group_by(
+                ThreatAlert.hive_id, ThreatAlert.threat_type, ThreatAlert.severity):
+            counts[(row_hive, threat_type, severity or None)] += count
+    return counts
+
+
+def rebuild_alert_rollups(hive_id=None, since=None):
+    """
+    Recompute hourly rollups from threat_alerts (backfill/maintenance).
+    hive_id: only this hive (default: every hive)
+    since: only hours from the one containing this (UTC) datetime onwards
+    Returns: number of rollup rows written
+    """
+    if not db_available:
+        raise RuntimeError("Alert rollups need the alert database")
+
+    session = SessionLocal()
+    try:
+        rollups = session.query(ThreatAlertRollup)
+        alerts = session.query(ThreatAlert.timestamp, ThreatAlert.hive_id,
+                               ThreatAlert.threat_type, ThreatAlert.severity)
+        if hive_id is not None:
+            rollups = rollups.filter(ThreatAlertRollup.hive_id == hive_id)
+            alerts = alerts.filter(ThreatAlert.hive_id == hive_id)
+        if since is not None:
+            rollups = rollups.filter(ThreatAlertRollup.hour >= _hour_of(since))
+            alerts = alerts.filter(ThreatAlert.timestamp >= _hour_of(since))
+        rollups.delete(synchronize_session=False)
+
+        counts = Counter()
+        for timestamp, alert_hive, threat_type, severity in alerts.yield_per(5000):
+            counts[(_hour_of(timestamp), NO_HIVE if alert_hive is None else alert_hive,
+                    threat_type, severity or NO_SEVERITY)] += 1
+        session.add_all([
+            ThreatAlertRollup(hour=hour, hive_id=hive_key, threat_type=threat_type, severity=severity, count=count)
+            for (hour, hive_key, threat_type, severity), count in counts.items()
+        ])
+        session.commit()
+        return len(counts)
+    finally:
+        session.close()
+
+
+# ========== BACKGROUND WRITER ==========
+ALERT_WRITER_ENABLED = os.getenv("ALERT_WRITER_ENABLED", "true").lower() in ("1", "true", "yes")
+ALERT_SPOOL_DIR = Path(os.getenv("ALERT_SPOOL_DIR", OUTPUTS_DIR / "alert_spool"))
+
+_queued_readings = {}  # reading_id -> alert queued but not yet committed
+_queued_lock = threading.Lock()
+
+
+def _write_alerts_db(records):
+    """
+    Insert a batch of alert records in one transaction (writer thread).
+
+    If the batch hits the one-alert-per-reading index (another worker, or a
+    spool replayed after a crash) the rows are retried one at a time and the
+    duplicates skipped. Hourly rollups are incremented in the same
+    transaction for the rows actually inserted. Connection errors propagate
+    so the writer retries.
+    """
+    session = SessionLocal()
+    try:
+        session.add_all([_alert_row(record) for record in records])
+        try:
+            session.flush()
+        except IntegrityError:
+            session.rollback()
+        else:
+            _increment_rollups(session, records)
+            session.commit()
+            return
+
+        for record in records:
+            session.add(_alert_row(record))
+            try:
+                session.flush()
+            except IntegrityError:
+                session.rollback()
+                continue
+            _increment_rollups(session, [record])
+            session.commit()
+    finally:
+        session.close()
+
+
+def _alerts_written(records):
+    """Committed readings are deduplicated by the database from now on"""
+    with _queued_lock:
+        for record in records:
+            _queued_readings.pop(record.get("synchronized_data_id"), None)
+
+
+# Called with each alert record that was decided on but never stored
+_failure_listeners = []
+
+
+def add_failure_listener(callback):
+    """Register callback(record) for alerts lost by the store (dead-lettered or failed insert)"""
+    _failure_listeners.append(callback)
+
+
+def _alerts_lost(records):
+    """Rejected records are not in the database: forget them as queued and tell the listeners"""
+    _alerts_written(records)
+    for record in records:
+        for callback in _failure_listeners:
+            try:
+                callback(record)
+            except Exception as e:
+                print(f"[alert_store] Failure listener failed: {e}")
+
+
+alert_writer = AlertWriter(
+    _write_alerts_db,
+    spool_dir=ALERT_SPOOL_DIR,
+    batch_size=int(os.getenv("ALERT_WRITER_BATCH_SIZE", 100)),
+    flush_seconds=float(os.getenv("ALERT_WRITER_FLUSH_MS", 500)) / 1000,
+    max_queue=int(os.getenv("ALERT_WRITER_QUEUE_SIZE", 10000)),
+    put_timeout=float(os.getenv("ALERT_WRITER_PUT_TIMEOUT", 2.0)),
+    fsync=os.getenv("ALERT_WRITER_FSYNC", "false").lower() in ("1", "true", "yes"),
+    enabled=ALERT_WRITER_ENABLED and db_available,
+    on_written=_alerts_written,
+    on_rejected=_alerts_lost,
+)
+register_exit_flush(alert_writer)
+
+
+def _insert_alert_db(record):
+    """Synchronous insert; returns (alert_id, existing alert or None)"""
+    session = SessionLocal()
+    try:
+        new_alert = _alert_row(record)
+        session.add(new_alert)
+        try:
+            session.flush()
+        except IntegrityError:
+            # Another worker stored the alert for this reading first
+            session.rollback()
+            reading_id = record["synchronized_data_id"]
+            existing = _existing_alert_db(session, reading_id) if reading_id is not None else None
+            if existing is None:
+                raise
+            return None, existing
+        _increment_rollups(session, [record])
+        session.commit()
+        session.refresh(new_alert)
+        return new_alert.id, None
+    finally:
+        session.close()
+
+
+def add_alert(threat_type, probability, used_features, recommendations=None, hive_id=None, reading_id=None,
+              timestamp=None):
     """
     Add an alert to DB if available, else JSON.
     recommendations: dict from recommendation_service.get_recommendations()
+    hive_id: hive the alert belongs to (None for ad-hoc predictions)
+    reading_id: synchronized_data id the alert is for; a reading gets at most one
+                alert, repeated calls return the stored one with "deduplicated": True
+    timestamp: alert time (UTC, defaults to now); alert_suppression passes the
+               time it aggregates later repeats under
+
+    With the background writer enabled the alert is queued and returned at
+    once with "id": None and "queued": True; it is committed within
+    ALERT_WRITER_FLUSH_MS. A full queue falls back to a synchronous insert.
     """
-    timestamp = datetime.utcnow()
+    timestamp = timestamp or datetime.utcnow()
+    alert_dict = {
+        "id": None,
+        "timestamp": timestamp.isoformat(),
+        "hive_id": hive_id,
+        "threat_type": threat_type,
+        "probability": probability,
+        "severity": _severity_of(recommendations),
+        "synchronized_data_id": reading_id,
+        "occurrences": 1,
+        "recommendations": recommendations,
+        "used_features": used_features,
+    }
 
     # Try saving to DB
     if db_available:
         try:
-            session = SessionLocal()
-            new_alert = ThreatAlert(
-                timestamp=timestamp,
-                threat_type=threat_type,
-                probability=probability,
-                recommendations=json.dumps(recommendations) if recommendations else None,
-                used_features_json=json.dumps(used_features) if used_features else None,
-            )
-            session.add(new_alert)
-            session.commit()
-            session.refresh(new_alert)
-            session.close()
-
-            alert_dict = {
-                "timestamp": timestamp.isoformat(),
+            record = {
+                "timestamp": alert_dict["timestamp"],
+                "hive_id": hive_id,
                 "threat_type": threat_type,
                 "probability": probability,
-                "recommendations": recommendations,
-                "used_features": used_features,
+                "severity": alert_dict["severity"],
+                "recommendations": json.dumps(recommendations) if recommendations else None,
+                "used_features_json": json.dumps(used_features) if used_features else None,
+                "synchronized_data_id": reading_id,
             }
-            _alerts.insert(0, alert_dict)
-            if len(_alerts) > 500:
-                del _alerts[500:]
+
+            if reading_id is not None:
+                with _queued_lock:
+                    queued = _queued_readings.get(reading_id)
+                if queued is not None:
+                    return dict(queued, deduplicated=True)
+                session = SessionLocal()
+                try:
+                    existing = _existing_alert_db(session, reading_id)
+                finally:
+                    session.close()
+                if existing is not None:
+                    return existing
+
+            if alert_writer.enabled:
+                if reading_id is not None:
+                    with _queued_lock:
+                        queued = _queued_readings.setdefault(reading_id, alert_dict)
+                    if queued is not alert_dict:
+                        return dict(queued, deduplicated=True)
+                if alert_writer.submit(record):
+                    _remember_alert(alert_dict)
+                    return dict(alert_dict, queued=True)
+                # Queue full for ALERT_WRITER_PUT_TIMEOUT: write on this thread instead
+                with _queued_lock:
+                    _queued_readings.pop(reading_id, None)
+
+            alert_id, existing = _insert_alert_db(record)
+            if existing is not None:
+                return existing
+            alert_dict["id"] = alert_id
+            _remember_alert(alert_dict)
             return alert_dict
         except SQLAlchemyError as e:
             print(f"[alert_store] DB insert failed, fallback to JSON: {e}")
+            _alerts_lost([record])
 
     # JSON fallback
-    alert = {
-        "timestamp": timestamp.isoformat(),
-        "threat_type": threat_type,
-        "probability": probability,
-        "used_features": used_features,
-        "recommendations": recommendations,
-    }
-    _alerts.insert(0, alert)
-    if len(_alerts) > 500:
-        del _alerts[500:]
-    save_alerts()
+    if reading_id is not None:
+        for alert in _alerts:
+            if alert.get("synchronized_data_id") == reading_id:
+                return dict(alert, deduplicated=True)
+
+    alert = {key: value for key, value in alert_dict.items() if key != "id"}
+    _remember_alert(alert)
+    save_alert(alert)
     return alert
 
 
+def get_alert_for_reading(reading_id):
+    """Alert raised for a synchronized_data row (queued, stored or cached), or None"""
+    with _queued_lock:
+        queued = _queued_readings.get(reading_id)
+    if queued is not None:
+        return queued
+    if db_available:
+        try:
+            session = SessionLocal()
+            try:
+                existing = _existing_alert_db(session, reading_id)
+            finally:
+                session.close()
+            if existing is not None:
+                existing.pop("deduplicated", None)
+            return existing
+        except SQLAlchemyError as e:
+            print(f"[alert_store] DB lookup failed, fallback to JSON: {e}")
+    for alert in _alerts:
+        if alert.get("synchronized_data_id") == reading_id:
+            return alert
+    return None
+
+
+def flush_alerts(timeout=10.0):
+    """Block until queued alerts are committed (returns False on timeout)"""
+    return alert_writer.flush(timeout)
+
+
+def alert_writer_stats():
+    """Background writer queue depth and counters for this worker"""
+    return alert_writer.get_stats()
+
+
+def count_alerts_by_hive(since=None):
+    """
+    Count alerts per hive from the hourly rollups (plus the partial first hour).
+    since: only count alerts at or after this (UTC) datetime
+    Returns: {hive_id: count}
+    """
+    if db_available:
+        try:
+            session = SessionLocal()
+            try:
+                counts = Counter()
+                for (hive_id, _, _), count in _window_counts_db(session, since).items():
+                    counts[hive_id] += count
+                return dict(counts)
+            finally:
+                session.close()
+        except SQLAlchemyError as e:
+            print(f"[alert_store] DB count failed, fallback to JSON: {e}")
+
+    # Fallback to the alert log
+    counts = {}
+    for alert in _filter_logged_alerts(since):
+        hive_id = alert.get("hive_id")
+        counts[hive_id] = counts.get(hive_id, 0) + 1
+    return counts
+
+
+# ========== QUERY API ==========
+def _query_alerts_db(since=None, until=None, threat_type=None, hive_id=None,
+                     severity=None, limit=500, include_details=True):
+    """Filtered, newest-first alert query executed in the database."""
+    session = SessionLocal()
+    try:
+        query = session.query(ThreatAlert)
+        if not include_details:
+            query = query.options(defer(ThreatAlert.recommendations), defer(ThreatAlert.used_features_json))
+        if since is not None:
+            query = query.filter(ThreatAlert.timestamp >= since)
+        if until is not None:
+            query = query.filter(ThreatAlert.timestamp < until)
+        if threat_type is not None:
+            query = query.filter(ThreatAlert.threat_type == threat_type)
+        if hive_id is not None:
+            query = query.filter(ThreatAlert.hive_id == hive_id)
+        if severity is not None:
+            query = query.filter(ThreatAlert.severity == severity)
+        rows = query.order_by(ThreatAlert.timestamp.desc(), ThreatAlert.id.desc()).limit(limit).all()
+        return [_row_to_dict(row, include_details) for row in rows]
+    finally:
+        session.close()
+
+
+def _filter_logged_alerts(since=None, until=None, threat_type=None, hive_id=None, severity=None, limit=None):
+    """Apply the query filters to the JSONL alert log (fallback only), newest first."""
+    # Time and hive bounds come from the log index; only matching records are read
+    has_filters = threat_type is not None or severity is not None
+    try:
+        candidates = _alert_log.read_range(since, until, hive_id, limit=None if has_filters else limit)
+    except Exception as e:
+        print(f"[alert_store] Alert log read failed, using in-memory alerts: {e}")
+        candidates = []
+        for alert in _alerts:
+            try:
+                alert_time = datetime.fromisoformat(alert["timestamp"])
+            except Exception:
+                continue
+            if (since is not None and alert_time < since) or (until is not None and alert_time >= until):
+                continue
+            if hive_id is None or alert.get("hive_id") == hive_id:
+                candidates.append(alert)
+
+    matched = []
+    for alert in candidates:
+        if threat_type is not None and alert.get("threat_type") != threat_type:
+            continue
+        alert_severity = alert.get("severity") or _severity_of(alert.get("recommendations"))
+        if severity is not None and alert_severity != severity:
+            continue
+        matched.append(alert)
+        if limit is not None and len(matched) >= limit:
+            break
+    return matched
+
+
+def query_alerts(since=None, until=None, threat_type=None, hive_id=None,
+                 severity=None, limit=100, include_details=True):
+    """
+    Query alerts newest first with filters pushed into SQL.
+    since/until: UTC datetime bounds (since inclusive, until exclusive)
+    limit: capped at MAX_QUERY_LIMIT
+    include_details: decode recommendations/used_features (deferred otherwise)
+    """
+    limit = max(0, min(int(limit), MAX_QUERY_LIMIT))
+
+    if db_available:
+        try:
+            return _query_alerts_db(since, until, threat_type, hive_id, severity, limit, include_details)
+        except SQLAlchemyError as e:
+            print(f"[alert_store] DB query failed, fallback to JSON: {e}")
+
+    matched = _filter_logged_alerts(since, until, threat_type, hive_id, severity, limit)
+    if include_details:
+        return matched
+    return [
+        {key: value for key, value in alert.items() if key not in ("recommendations", "used_features")}
+        for alert in matched
+    ]
+
+
+def alert_statistics(since=None, until=None, hive_id=None):
+    """
+    Aggregate alert counts by threat type and severity.
+    Whole hours come from the hourly rollups and only the partial hours at
+    the window edges from threat_alerts, so a 90-day window costs about the
+    same as a 24-hour one.
+    Returns: {"total_alerts", "threat_counts", "severity_counts"}
+    """
+    counts = {}
+    if db_available:
+        try:
+            session = SessionLocal()
+            try:
+                for (_, threat_type, severity), count in _window_counts_db(session, since, until, hive_id).items():
+                    counts[(threat_type, severity)] = counts.get((threat_type, severity), 0) + count
+            finally:
+                session.close()
+        except SQLAlchemyError as e:
+            print(f"[alert_store] DB statistics failed, fallback to JSON: {e}")
+            counts = None
+    else:
+        counts = None
+
+    if counts is None:
+        counts = {}
+        for alert in _filter_logged_alerts(since, until, hive_id=hive_id):
+            key = (alert.get("threat_type", "Unknown"),
+                   alert.get("severity") or _severity_of(alert.get("recommendations")))
+            counts[key] = counts.get(key, 0) + 1
+
+    threat_counts = {}
+    severity_counts = {}
+    for (threat_type, severity), count in counts.items():
+        threat_counts[threat_type] = threat_counts.get(threat_type, 0) + count
+        severity_counts[severity or "Unknown"] = severity_counts.get(severity or "Unknown", 0) + count
+
+    return {
+        "total_alerts": sum(counts.values()),
+        "threat_counts": threat_counts,
+        "severity_counts": severity_counts,
+    }
+
+
 # Load alerts on import
 load_alerts()
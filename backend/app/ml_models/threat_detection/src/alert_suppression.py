@@ -0,0 +1,445 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, UniqueConstraint, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from . import alert_store
+from .alert_store import Base, NO_HIVE
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between alerts for one hive and threat type
+DEFAULT_COOLDOWNS = {
+    'Environmental': 300,  # 5 minutes
+    'Predator': 180,       # 3 minutes
+    'Wax_Moth': 240,       # 4 minutes
+    'No_Threat': 600       # 10 minutes
+}
+
+
+class AlertSuppressionState(Base):
+    """Suppression state for one (hive, threat type): one small row, updated in place"""
+    __tablename__ = "alert_suppression_state"
+    __table_args__ = (
+        UniqueConstraint('hive_id', 'threat_type', name='uq_alert_suppression_hive_threat'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    hive_id = Column(Integer, nullable=False)
+    threat_type = Column(String(64), nullable=False)
+    episode_started_at = Column(DateTime, nullable=True)
+    last_seen_at = Column(DateTime, nullable=True)
+    last_alert_at = Column(DateTime, nullable=True)      # timestamp of the alert repeats aggregate into
+    recent_alerts = Column(Text, nullable=True)          # JSON list of alert times inside the rate window
+    occurrences = Column(Integer, nullable=False, default=0)
+    suppressed_total = Column(Integer, nullable=False, default=0)
+    max_probability = Column(Float, nullable=True)
+    last_reading_id = Column(Integer, nullable=True)
+
+
+if alert_store.db_available:
+    try:
+        Base.metadata.create_all(bind=alert_store.engine, tables=[AlertSuppressionState.__table__])
+    except Exception as e:
+        print(f"[alert_suppression] ⚠ Could not create suppression table, state kept in memory: {e}")
+
+
+class AlertSuppressionEngine:
+    """
+    Decides whether a detection becomes a new alert, keyed by hive and threat type.
+
+    A detection raises an alert only if the threat's cooldown has passed since
+    the previous alert and fewer than rate_limit alerts were raised in the
+    last rate_window_seconds (sliding window). Otherwise it is aggregated into
+    the previous alert: its occurrences/last_seen_at are updated in place, so
+    a long episode costs one small UPDATE per reading instead of one alert row.
+    Detections more than episode_gap_seconds apart start a new episode.
+
+    State lives in the alert_suppression_state table (row-locked per
+    decision) so it survives restarts and is shared by every worker; without
+    the database it is kept per process. Re-evaluating a reading that was
+    already evaluated returns action "duplicate" and changes nothing.
+
+    Every alert producer goes through raise_alert(), which stores the alert
+    the engine decided on. An alert the store then loses (dead-lettered or
+    failed insert) is forgotten again, so the next repeat raises a new one.
+    """
+
+    def __init__(self, cooldowns: Optional[Dict[str, int]] = None, default_cooldown: int = 300,
+                 rate_limit: int = 6, rate_window_seconds: int = 3600, episode_gap_seconds: int = 1800):
+        self.cooldowns = dict(DEFAULT_COOLDOWNS if cooldowns is None else cooldowns)
+        self.default_cooldown = default_cooldown
+        self.rate_limit = rate_limit
+        self.rate_window = timedelta(seconds=rate_window_seconds)
+        self.episode_gap = timedelta(seconds=episode_gap_seconds)
+
+        self._states: Dict[tuple, Dict[str, Any]] = {}  # in-memory fallback
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.alerts = 0
+        self.suppressed = 0
+        self.duplicates = 0
+
+    # ========== DECISION ==========
+    def _decide(self, state: Dict[str, Any], threat_type: str, probability: float,
+                reading_id: Optional[int], now: datetime) -> Dict[str, Any]:
+        """Apply cooldown, rate window and episode rules to a state dict (mutated in place)"""
+        last_reading_id = state.get("last_reading_id")
+        if reading_id is not None and last_reading_id is not None and reading_id <= last_reading_id:
+            return {"action": "duplicate", "reason": "reading_already_evaluated"}
+
+        last_seen = state.get("last_seen_at")
+        if last_seen is None or now - last_seen > self.episode_gap:
+            state["episode_started_at"] = now
+            state["max_probability"] = probability
+        else:
+            state["max_probability"] = max(state.get("max_probability") or 0.0, probability)
+        # Readings evaluated out of order never move the episode back in time
+        state["last_seen_at"] = now if last_seen is None else max(now, last_seen)
+        if reading_id is not None:
+            state["last_reading_id"] = reading_id
+
+        window_start = now - self.rate_window
+        recent = [alert_time for alert_time in state.get("recent_alerts", []) if alert_time > window_start]
+        last_alert = state.get("last_alert_at")
+        cooldown = self.cooldowns.get(threat_type, self.default_cooldown)
+
+        if last_alert is not None and (now - last_alert).total_seconds() < cooldown:
+            reason = "cooldown"
+        elif len(recent) >= self.rate_limit:
+            reason = "rate_limit"
+        else:
+            reason = None
+
+        if reason is None:
+            recent.append(now)
+            state["last_alert_at"] = now
+            state["occurrences"] = 1
+            action = "alert"
+        else:
+            state["occurrences"] = (state.get("occurrences") or 0) + 1
+            state["suppressed_total"] = (state.get("suppressed_total") or 0) + 1
+            action = "suppress"
+        state["recent_alerts"] = recent
+        return {"action": action, "reason": reason}
+
+    def raise_alert(self, threat_type: str, probability: float, used_features: Dict[str, Any],
+                    recommendations: Optional[Dict[str, Any]] = None, hive_id: Optional[int] = None,
+                    reading_id: Optional[int] = None, detected_at: Any = None) -> tuple:
+        """
+        Evaluate one detection and store the alert if the engine decides so.
+
+        Args:
+            threat_type, probability, used_features, recommendations: as for add_alert()
+            hive_id: Hive of the detection (None for ad-hoc predictions)
+            reading_id: synchronized_data id of the detection, if stored
+            detected_at: Reading time (datetime or ISO string); defaults to now
+
+        Returns:
+            (decision, alert): alert is the new alert, the stored alert of an
+            already evaluated reading (or None), or None when suppressed
+        """
+        decision = self.evaluate(hive_id, threat_type, probability, reading_id=reading_id,
+                                 now=_as_datetime(detected_at))
+        alert = None
+        if decision["action"] == "alert":
+            alert = alert_store.add_alert(
+                threat_type=threat_type,
+                probability=probability,
+                used_features=used_features,
+                recommendations=recommendations,
+                hive_id=hive_id,
+                reading_id=reading_id,
+                timestamp=datetime.fromisoformat(decision["alert_timestamp"])
+            )
+        elif decision["action"] == "duplicate" and reading_id is not None:
+            alert = alert_store.get_alert_for_reading(reading_id)
+        return decision, alert
+
+    def evaluate(self, hive_id: Optional[int], threat_type: str, probability: float,
+                 reading_id: Optional[int] = None, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Decide what to do with one detection.
+
+        Args:
+            hive_id: Hive of the detection (None for ad-hoc predictions)
+            threat_type: Predicted threat type
+            probability: Predicted probability
+            reading_id: synchronized_data id (re-evaluating it is a no-op)
+            now: Detection time (the reading's timestamp); defaults to now
+
+        Returns:
+            Dict with "action" ("alert", "suppress" or "duplicate"), "reason",
+            "alert_timestamp" (use it as the new alert's timestamp, or the alert
+            repeats were aggregated into), "occurrences" and episode fields
+        """
+        # Whole seconds: DATETIME columns drop fractions, and alerts are matched by timestamp
+        now = (now or datetime.utcnow()).replace(microsecond=0)
+        hive_key = NO_HIVE if hive_id is None else hive_id
+
+        if alert_store.db_available:
+            try:
+                decision = self._evaluate_db(hive_key, hive_id, threat_type, probability, reading_id, now)
+                return self._count(decision)
+            except SQLAlchemyError as e:
+                logger.error(f"❌ Suppression state unavailable, deciding in memory: {e}")
+
+        with self._lock:
+            state = self._states.setdefault((hive_key, threat_type), {})
+            decision = self._decide(state, threat_type, probability, reading_id, now)
+            if decision["action"] == "suppress":
+                self._aggregate_memory(hive_id, threat_type, state, now)
+            return self._count(self._summary(decision, hive_id, threat_type, state))
+
+    def already_evaluated(self, hive_id: Optional[int], threat_type: str,
+                          reading_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        "duplicate" decision if the reading was evaluated before, else None.
+        A plain read of the state row (no lock, no write), for pollers that
+        re-analyze the latest reading; evaluate() stays the only writer.
+        """
+        if reading_id is None:
+            return None
+        hive_key = NO_HIVE if hive_id is None else hive_id
+        state = None
+        if alert_store.db_available:
+            try:
+                session = alert_store.SessionLocal()
+                try:
+                    row = (session.query(AlertSuppressionState)
+                           .filter(AlertSuppressionState.hive_id == hive_key,
+                                   AlertSuppressionState.threat_type == threat_type)
+                           .first())
+                    state = self._row_state(row) if row is not None else None
+                finally:
+                    session.close()
+            except SQLAlchemyError as e:
+                logger.error(f"❌ Suppression state query failed: {e}")
+                return None
+        else:
+            with self._lock:
+                state = dict(self._states.get((hive_key, threat_type), {})) or None
+        if state is None or state.get("last_reading_id") is None or reading_id > state["last_reading_id"]:
+            return None
+        decision = {"action": "duplicate", "reason": "reading_already_evaluated"}
+        return self._count(self._summary(decision, hive_id, threat_type, state))
+
+    def _count(self, decision: Dict[str, Any]) -> Dict[str, Any]:
+        if decision["action"] == "alert":
+            self.alerts += 1
+        elif decision["action"] == "suppress":
+            self.suppressed += 1
+        else:
+            self.duplicates += 1
+        return decision
+
+    def _summary(self, decision: Dict[str, Any], hive_id: Optional[int], threat_type: str,
+                 state: Dict[str, Any]) -> Dict[str, Any]:
+        def iso(value):
+            return value.isoformat() if value else None
+
+        return dict(
+            decision,
+            hive_id=hive_id,
+            threat_type=threat_type,
+            alert_timestamp=iso(state.get("last_alert_at")),
+            occurrences=state.get("occurrences", 0),
+            episode_started_at=iso(state.get("episode_started_at")),
+            max_probability=state.get("max_probability"),
+            suppressed_total=state.get("suppressed_total", 0),
+        )
+
+    def forget_alert(self, record: Dict[str, Any]):
+        """
+        The store lost an alert this engine decided on (alert_store failure
+        listener): if repeats still aggregate into it, clear last_alert_at so
+        the next detection raises a new alert instead of counting into nothing.
+        """
+        alert_at = _as_datetime(record.get("timestamp"))
+        if alert_at is None:
+            return
+        hive_id, threat_type = record.get("hive_id"), record.get("threat_type")
+        hive_key = NO_HIVE if hive_id is None else hive_id
+
+        def forget(state):
+            if state.get("last_alert_at") != alert_at:
+                return False
+            state["last_alert_at"] = None
+            state["recent_alerts"] = [value for value in state.get("recent_alerts", []) if value != alert_at]
+            state["occurrences"] = 0
+            return True
+
+        if alert_store.db_available:
+            try:
+                session = alert_store.SessionLocal()
+                try:
+                    row = (session.query(AlertSuppressionState)
+                           .filter(AlertSuppressionState.hive_id == hive_key,
+                                   AlertSuppressionState.threat_type == threat_type)
+                           .with_for_update()
+                           .first())
+                    state = self._row_state(row) if row is not None else {}
+                    if forget(state):
+                        row.last_alert_at = None
+                        row.recent_alerts = json.dumps([value.isoformat() for value in state["recent_alerts"]])
+                        row.occurrences = 0
+                        session.commit()
+                        logger.warning(f"⚠️ {threat_type} alert for hive {hive_id} was not stored, "
+                                       f"the next detection raises a new one")
+                    else:
+                        session.rollback()
+                finally:
+                    session.close()
+            except SQLAlchemyError as e:
+                logger.error(f"❌ Could not reset suppression state after a lost alert: {e}")
+        with self._lock:
+            state = self._states.get((hive_key, threat_type))
+            if state is not None:
+                forget(state)
+
+    # ========== STATE STORAGE ==========
+    @staticmethod
+    def _row_state(row: AlertSuppressionState) -> Dict[str, Any]:
+        return {
+            "episode_started_at": row.episode_started_at,
+            "last_seen_at": row.last_seen_at,
+            "last_alert_at": row.last_alert_at,
+            "recent_alerts": [datetime.fromisoformat(value) for value in json.loads(row.recent_alerts or "[]")],
+            "occurrences": row.occurrences,
+            "suppressed_total": row.suppressed_total,
+            "max_probability": row.max_probability,
+            "last_reading_id": row.last_reading_id,
+        }
+
+    def _evaluate_db(self, hive_key: int, hive_id: Optional[int], threat_type: str, probability: float,
+                     reading_id: Optional[int], now: datetime) -> Dict[str, Any]:
+        """One transaction: lock the state row, decide, write the row (and the aggregated alert)"""
+        session = alert_store.SessionLocal()
+        try:
+            row = None
+            for _ in range(2):
+                row = (session.query(AlertSuppressionState)
+                       .filter(AlertSuppressionState.hive_id == hive_key,
+                               AlertSuppressionState.threat_type == threat_type)
+                       .with_for_update()
+                       .first())
+                if row is not None:
+                    break
+                row = AlertSuppressionState(hive_id=hive_key, threat_type=threat_type,
+                                            occurrences=0, suppressed_total=0, recent_alerts="[]")
+                session.add(row)
+                try:
+                    session.flush()
+                    break
+                except IntegrityError:
+                    # Another worker created the row first: lock theirs
+                    session.rollback()
+                    row = None
+
+            state = self._row_state(row)
+            decision = self._decide(state, threat_type, probability, reading_id, now)
+            if decision["action"] == "duplicate":
+                session.rollback()
+                return self._summary(decision, hive_id, threat_type, state)
+
+            row.episode_started_at = state["episode_started_at"]
+            row.last_seen_at = state["last_seen_at"]
+            row.last_alert_at = state["last_alert_at"]
+            row.recent_alerts = json.dumps([value.isoformat() for value in state["recent_alerts"]])
+            row.occurrences = state["occurrences"]
+            row.suppressed_total = state["suppressed_total"]
+            row.max_probability = state["max_probability"]
+            row.last_reading_id = state.get("last_reading_id")
+
+            if decision["action"] == "suppress" and state["last_alert_at"] is not None:
+                # Absolute values: an alert still in the writer queue catches up on the next repeat
+                ThreatAlert = alert_store.ThreatAlert
+                hive_filter = ThreatAlert.hive_id.is_(None) if hive_id is None else ThreatAlert.hive_id == hive_id
+                session.execute(
+                    update(ThreatAlert)
+                    .where(hive_filter,
+                           ThreatAlert.threat_type == threat_type,
+                           ThreatAlert.timestamp == state["last_alert_at"])
+                    .values(occurrences=state["occurrences"], last_seen_at=now)
+                )
+            session.commit()
+            return self._summary(decision, hive_id, threat_type, state)
+        finally:
+            session.close()
+
+    def _aggregate_memory(self, hive_id: Optional[int], threat_type: str, state: Dict[str, Any], now: datetime):
+        """In-memory fallback: count the repeat on the cached alert"""
+        alert_timestamp = state["last_alert_at"].isoformat() if state.get("last_alert_at") else None
+        for alert in alert_store._alerts:
+            if (alert.get("timestamp") == alert_timestamp and alert.get("hive_id") == hive_id
+                    and alert.get("threat_type") == threat_type):
+                alert["occurrences"] = state["occurrences"]
+                alert["last_seen_at"] = now.isoformat()
+                break
+
+    # ========== QUERIES ==========
+    def get_states(self, hive_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Current suppression state per (hive, threat type)"""
+        if alert_store.db_available:
+            try:
+                session = alert_store.SessionLocal()
+                try:
+                    query = session.query(AlertSuppressionState)
+                    if hive_id is not None:
+                        query = query.filter(AlertSuppressionState.hive_id == hive_id)
+                    rows = query.order_by(AlertSuppressionState.hive_id, AlertSuppressionState.threat_type).all()
+                    return [self._summary({"action": None, "reason": None}, row.hive_id, row.threat_type,
+                                          self._row_state(row)) for row in rows]
+                finally:
+                    session.close()
+            except SQLAlchemyError as e:
+                logger.error(f"❌ Suppression state query failed: {e}")
+
+        with self._lock:
+            return [self._summary({"action": None, "reason": None}, hive, threat_type, state)
+                    for (hive, threat_type), state in sorted(self._states.items())
+                    if hive_id is None or hive == hive_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Decision counters for this worker"""
+        decisions = self.alerts + self.suppressed
+        return {
+            "alerts": self.alerts,
+            "suppressed": self.suppressed,
+            "duplicates": self.duplicates,
+            "suppression_rate": round(self.suppressed / decisions, 4) if decisions else 0.0,
+            "rate_limit": self.rate_limit,
+            "rate_window_seconds": int(self.rate_window.total_seconds()),
+            "episode_gap_seconds": int(self.episode_gap.total_seconds()),
+            "cooldowns": self.cooldowns,
+        }
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    """Naive datetime (whole seconds) from a datetime or ISO string; None if missing or invalid"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=0)
+
+
+# Create singleton instance
+alert_suppression = AlertSuppressionEngine(
+    default_cooldown=int(os.getenv("ALERT_DEFAULT_COOLDOWN_SECONDS", 300)),
+    rate_limit=int(os.getenv("ALERT_RATE_LIMIT", 6)),
+    rate_window_seconds=int(os.getenv("ALERT_RATE_WINDOW_SECONDS", 3600)),
+    episode_gap_seconds=int(os.getenv("ALERT_EPISODE_GAP_SECONDS", 1800)),
+)
+alert_store.add_failure_listener(alert_suppression.forget_alert)
@@ -0,0 +1,458 @@
+import atexit
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+try:
+    import fcntl  # POSIX only: marks a spool file as owned by a live process
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Retry delays (seconds) while the database is unreachable
+MAX_RETRY_DELAY = 30
+
+# Records the database keeps rejecting, one JSON line each (not matched by the spool globs)
+DEAD_LETTER_FILE = "dead-letter.jsonl"
+
+# Committed bytes at the head of a spool before it is rewritten with only its pending tail
+SPOOL_COMPACT_BYTES = 1 << 20
+
+
+def is_transient(error: Exception) -> bool:
+    """Connection-level failures worth retrying; anything else is a bad record"""
+    if isinstance(error, OperationalError):
+        return True
+    return isinstance(error, DBAPIError) and bool(error.connection_invalidated)
+
+
+class AlertWriter:
+    """
+    Background batched writer for alert records.
+
+    submit() appends the record to this process's spool file, queues it and
+    returns immediately. A writer thread flushes the queue through
+    write_batch() once batch_size records are waiting or flush_seconds after
+    the oldest one arrived, one transaction per batch. A batch that fails on
+    a connection error is retried with backoff, so records are written at
+    least once; any other failure splits the batch in halves down to single
+    records, and a record that still fails goes to the dead-letter file.
+
+    After every batch the spool's committed byte offset is recorded next to
+    it (alerts.<pid>.offset), so a replay starts after the last committed
+    record instead of re-inserting it. The spool is truncated once everything
+    in it is committed, and rewritten with only its pending tail once
+    SPOOL_COMPACT_BYTES of it are committed, so it stays bounded under
+    sustained load. Spool files left by a crashed process are replayed from
+    their offset when the next writer starts.
+
+    The queue is bounded: when it is full submit() blocks for up to
+    put_timeout seconds and then returns False so the caller can write
+    synchronously instead.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Dict[str, Any]]], None], spool_dir: Path,
+                 batch_size: int = 100, flush_seconds: float = 0.5, max_queue: int = 10000,
+                 put_timeout: float = 2.0, fsync: bool = False, enabled: bool = True,
+                 on_written: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 on_rejected: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        self.write_batch = write_batch
+        self.on_written = on_written
+        self.on_rejected = on_rejected
+        self.spool_dir = Path(spool_dir)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+        self.put_timeout = put_timeout
+        self.fsync = fsync
+        self.enabled = enabled
+
+        self._pending = deque()  # (enqueued_at, record, spool offset after the record)
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)   # records waiting for the writer
+        self._space = threading.Condition(self._lock)   # queue drained / batch committed
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._spool_file = None
+        self._spool_path: Optional[Path] = None
+        self._spool_size = 0
+        self._spool_offset: Optional[int] = None  # committed offset last recorded for the spool
+        self._batch_end = 0
+        self._in_flight = 0
+        self._flush_requested = False
+
+        # Metrics
+        self.submitted = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.rejected = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+        self.last_error: Optional[str] = None
+
+    # ========== PRODUCER SIDE ==========
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """
+        Queue a JSON-serializable record for writing.
+
+        Returns:
+            True once the record is spooled and queued, False if the writer is
+            disabled or the queue stayed full for put_timeout seconds
+        """
+        if not self.enabled:
+            return False
+
+        line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+        deadline = time.monotonic() + self.put_timeout
+        with self._lock:
+            self._ensure_started()
+            while len(self._pending) >= self.max_queue:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += 1
+                    return False
+                self._space.wait(remaining)
+
+            self._spool_file.write(line)
+            self._spool_file.flush()
+            if self.fsync:
+                os.fsync(self._spool_file.fileno())
+            self._spool_size += len(line)
+
+            self._pending.append((time.monotonic(), record, self._spool_size))
+            self.submitted += 1
+            self._ready.notify()
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued record is committed; returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            if self._pid != os.getpid():
+                return not self._pending
+            while self._pending or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                # Skip the batching window: write what is queued now
+                self._flush_requested = True
+                self._ready.notify()
+                self._space.wait(min(remaining, 0.05))
+        return True
+
+    def start(self):
+        """Start the writer in this process (replays spools left by dead processes)"""
+        if self.enabled:
+            with self._lock:
+                self._ensure_started()
+
+    # ========== SPOOL ==========
+    def _ensure_started(self):
+        """Start the writer thread in this process (caller holds the lock)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        # Threads do not survive fork: records queued in the parent are the parent's to write
+        if self._pid != os.getpid():
+            self._pending = deque()
+            self._in_flight = 0
+            self._spool_file = None
+        self._pid = os.getpid()
+
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        orphans = self._claim_orphan_spools()
+        if self._spool_file is None:
+            self._spool_path = self.spool_dir / f"alerts.{self._pid}.jsonl"
+            self._spool_file = open(self._spool_path, "ab")
+            if fcntl is not None:
+                fcntl.flock(self._spool_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # Anything already in the file was claimed elsewhere or is not ours to write
+            self._spool_size = os.fstat(self._spool_file.fileno()).st_size
+            self._spool_offset = None
+            self._record_offset(self._spool_path, self._spool_size)
+
+        self._thread = threading.Thread(target=self._write_loop, args=(orphans,),
+                                        name="alert-writer", daemon=True)
+        self._thread.start()
+
+    def _claim_orphan_spools(self) -> List[Path]:
+        """
+        Take over spool files whose writer is gone. A live writer holds a lock
+        on its spool (POSIX) or keeps it open, which blocks the rename (Windows).
+        """
+        claimed = []
+        for path in sorted(self.spool_dir.glob("alerts.*.jsonl")):
+            if ".replay-" in path.name or (path == self._spool_path and self._spool_file is not None):
+                continue
+            if fcntl is not None:
+                try:
+                    with open(path, "a") as handle:
+                        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                except OSError:
+                    continue  # owner still running
+            target = path.with_name(f"{path.stem}.replay-{self._pid}-{time.time_ns()}.jsonl")
+            try:
+                # Offset first: a crash in between replays the whole spool (duplicates, never losses)
+                if _offset_path(path).exists():
+                    os.replace(_offset_path(path), _offset_path(target))
+                os.replace(path, target)
+            except OSError:
+                continue
+            claimed.append(target)
+        # Replays abandoned by a writer that died mid-replay
+        for path in sorted(self.spool_dir.glob("*.replay-*.jsonl")):
+            if path not in claimed and not self._replay_owner_alive(path):
+                claimed.append(path)
+        return claimed
+
+    def _replay_owner_alive(self, path: Path) -> bool:
+        try:
+            owner = int(path.stem.split(".replay-")[1].split("-")[0])
+        except (IndexError, ValueError):
+            return False
+        if owner == self._pid:
+            return False  # pid reused after a restart: our writer is only starting now
+        if os.name == "nt":
+            return True  # no safe liveness probe; left for that writer or an operator
+        try:
+            os.kill(owner, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
+    def _replay(self, paths: List[Path]):
+        """Write records after the committed offset of claimed spool files, then delete them"""
+        for path in paths:
+            offset = _read_offset(path)
+            records = []  # (record, spool offset after it)
+            with open(path, "rb") as handle:
+                handle.seek(offset)
+                position = offset
+                for raw in handle:
+                    position += len(raw)
+                    line = raw.decode("utf-8", errors="replace").strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append((json.loads(line), position))
+                    except ValueError:
+                        # A crash mid-append leaves at most one torn line
+                        logger.warning(f"⚠️ Skipping unreadable line in {path.name}")
+            for start in range(0, len(records), self.batch_size):
+                chunk = records[start:start + self.batch_size]
+                self._write_with_retry([record for record, _ in chunk])
+                # A writer dying mid-replay leaves the rest for the next one
+                self._record_offset(path, chunk[-1][1])
+            self.replayed += len(records)
+            path.unlink()
+            _offset_path(path).unlink(missing_ok=True)
+            if records:
+                logger.info(f"♻️ Replayed {len(records)} spooled alerts from {path.name}")
+
+    def _record_offset(self, path: Path, offset: int):
+        """Persist the committed byte offset of a spool (0 removes the offset file)"""
+        if path == self._spool_path:
+            if offset == self._spool_offset:
+                return
+            self._spool_offset = offset
+        target = _offset_path(path)
+        if offset == 0:
+            target.unlink(missing_ok=True)
+            return
+        temporary = target.with_name(target.name + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(str(offset))
+            if self.fsync:
+                handle.flush()
+                os.fsync(handle.fileno())
+        os.replace(temporary, target)
+
+    def _spool_committed(self, offset: int):
+        """Records up to offset are committed (caller holds the lock)"""
+        if not self._pending:
+            # Everything spooled is committed: start the spool afresh
+            self._record_offset(self._spool_path, 0)
+            self._spool_file.seek(0)
+            self._spool_file.truncate()
+            self._spool_size = 0
+        elif offset >= SPOOL_COMPACT_BYTES:
+            self._compact_spool(offset)
+        else:
+            self._record_offset(self._spool_path, offset)
+
+    def _compact_spool(self, offset: int):
+        """Replace the spool with its pending tail (records after offset)"""
+        compacted = self._spool_path.with_name(self._spool_path.name + ".compact")
+        spool_file = None
+        try:
+            with open(self._spool_path, "rb") as source, open(compacted, "wb") as target:
+                source.seek(offset)
+                shutil.copyfileobj(source, target)
+                if self.fsync:
+                    target.flush()
+                    os.fsync(target.fileno())
+            spool_file = open(compacted, "ab")
+            if fcntl is not None:
+                fcntl.flock(spool_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # Offset 0 before the swap: a crash in between replays committed records, never skips any
+            self._record_offset(self._spool_path, 0)
+            os.replace(compacted, self._spool_path)
+        except OSError as e:
+            logger.error(f"❌ Could not compact alert spool, keeping it whole: {e}")
+            if spool_file is not None:
+                spool_file.close()
+            self._record_offset(self._spool_path, offset)
+            return
+        self._spool_file.close()
+        self._spool_file = spool_file
+        self._spool_size -= offset
+        self._pending = deque((enqueued_at, record, end - offset) for enqueued_at, record, end in self._pending)
+
+    # ========== WRITER THREAD ==========
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """Block until a batch is ready: flush_seconds since the oldest record, or batch full"""
+        with self._lock:
+            while not self._pending:
+                self._ready.wait()
+            deadline = self._pending[0][0] + self.flush_seconds
+            while len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if self._flush_requested:
+                    break
+                self._ready.wait(remaining)
+            self._flush_requested = False
+            count = min(len(self._pending), self.batch_size)
+            entries = [self._pending.popleft() for _ in range(count)]
+            self._batch_end = entries[-1][2]
+            self._in_flight = count
+            self._space.notify_all()
+            return [record for _, record, _ in entries]
+
+    def _write_with_retry(self, batch: List[Dict[str, Any]]):
+        """Write a batch, retrying connection errors and isolating records the database rejects"""
+        delay = 0.5
+        while True:
+            try:
+                self.write_batch(batch)
+                break
+            except Exception as e:
+                self.last_error = str(e)
+                if not is_transient(e):
+                    self._isolate_rejected(batch, e)
+                    return
+                self.retries += 1
+                logger.error(f"❌ Alert batch of {len(batch)} failed, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+        self._written(batch)
+
+    def _isolate_rejected(self, batch: List[Dict[str, Any]], error: Exception):
+        """Split a rejected batch until the bad records are alone, then dead-letter them"""
+        if len(batch) == 1:
+            self._dead_letter(batch[0], error)
+            return
+        logger.warning(f"⚠️ Alert batch of {len(batch)} rejected, splitting it: {error}")
+        middle = len(batch) // 2
+        self._write_with_retry(batch[:middle])
+        self._write_with_retry(batch[middle:])
+
+    def _dead_letter(self, record: Dict[str, Any], error: Exception):
+        self.dead_lettered += 1
+        logger.error(f"❌ Alert record rejected, moved to {DEAD_LETTER_FILE}: {type(error).__name__}: {error}")
+        line = json.dumps({"record": record, "error": f"{type(error).__name__}: {error}",
+                           "failed_at": time.time()}, default=str)
+        try:
+            with open(self.spool_dir / DEAD_LETTER_FILE, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+        except OSError as e:
+            logger.error(f"❌ Could not write dead-letter record: {e}")
+        if self.on_rejected is not None:
+            try:
+                self.on_rejected([record])
+            except Exception as e:
+                logger.error(f"❌ Alert writer callback failed: {e}")
+
+    def _written(self, batch: List[Dict[str, Any]]):
+        self.batches += 1
+        self.written += len(batch)
+        if self.on_written is not None:
+            try:
+                self.on_written(batch)
+            except Exception as e:
+                logger.error(f"❌ Alert writer callback failed: {e}")
+
+    def _write_loop(self, orphans: List[Path]):
+        if orphans:
+            try:
+                self._replay(orphans)
+            except Exception as e:
+                logger.error(f"❌ Spool replay failed: {e}")
+
+        while True:
+            batch = self._next_batch()
+            self._write_with_retry(batch)
+            with self._lock:
+                self._in_flight = 0
+                try:
+                    self._spool_committed(self._batch_end)
+                except OSError as e:
+                    logger.error(f"❌ Could not record committed alert spool offset: {e}")
+                self._space.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and write counters for this worker"""
+        return {
+            "enabled": self.enabled,
+            "queued": len(self._pending),
+            "in_flight": self._in_flight,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "flush_ms": round(self.flush_seconds * 1000, 1),
+            "submitted": self.submitted,
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0.0,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "replayed": self.replayed,
+            "dead_lettered": self.dead_lettered,
+            "last_error": self.last_error,
+            "spool_file": str(self._spool_path) if self._spool_path else None,
+        }
+
+    def close(self, timeout: float = 5.0):
+        """Flush on interpreter exit; unwritten records stay in the spool for replay"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            if not self.flush(timeout):
+                logger.warning(f"⚠️ Alert writer exiting with {len(self._pending)} records left in the spool")
+
+
+def _offset_path(spool_path: Path) -> Path:
+    """alerts.<pid>.jsonl -> alerts.<pid>.offset (not matched by the spool globs)"""
+    return spool_path.with_suffix(".offset")
+
+
+def _read_offset(spool_path: Path) -> int:
+    """Committed byte offset recorded for a spool (0 if none or unreadable)"""
+    try:
+        return int(_offset_path(spool_path).read_text(encoding="utf-8").strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def register_exit_flush(writer: AlertWriter):
+    atexit.register(writer.close)
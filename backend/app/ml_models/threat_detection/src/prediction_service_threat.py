@@ -1,36 +1,186 @@
-from pathlib import Path
-import joblib
+import logging
+import warnings
 import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from .data_preprocessing_threat import PACKAGE_ROOT, FEATURES_BASE
+from ...compiled_trees import compiled_is_current, load_compiled, read_compiled_meta, tree_backend, use_compiled
+from ...model_registry import content_version, model_registry
+from ...onnx_models import THREAT_ONNX_FILE, load_onnx, onnx_is_current, use_onnx
+
+logger = logging.getLogger(__name__)
 
 MODEL_FILE = PACKAGE_ROOT / "models" / "threat_model.pkl"
+COMPILED_MODEL_DIR = PACKAGE_ROOT / "models" / "threat_model_compiled"
+REGISTRY_NAME = "threat"
+# Raw joblib bundle for the DataFrame path / tools: (version, bundle)
 _bundle_cache = None
 
+# Raw payload fields and their defaults (same as _build_feature_row)
+_NUMERIC_DEFAULTS = {
+    "weather_temp_c": 30.0,
+    "weather_humidity_pct": 60.0,
+    "hive_sound_db": 70.0,
+    "hive_sound_peak_freq": 200.0,
+    "vibration_hz": 200.0,
+    "vibration_var": 10.0,
+}
+_INT_FEATURES = {"hour", "dayofweek", "is_evening"}
+_FEATURE_INDEX = {name: i for i, name in enumerate(FEATURES_BASE)}
+
+# ========== MODEL REGISTRY ==========
+class ThreatPredictor:
+    """One loaded threat model version: predict_proba on float32 FEATURES_BASE rows"""
+
+    def __init__(self, predict_proba, class_names, model, bundle=None):
+        self.predict_proba = predict_proba
+        self.class_names = class_names
+        self.model = model
+        self.bundle = bundle
+
+def _version_on_disk():
+    """
+    Short content hash of the trained model file. Stored with persisted
+    predictions so rows scored by an older model can be re-scored; the
+    compiled export of the same model shares its version.
+    """
+    if MODEL_FILE.exists():
+        return content_version([MODEL_FILE])
+    return read_compiled_meta(COMPILED_MODEL_DIR).get("source_version") or content_version(
+        [COMPILED_MODEL_DIR / "meta.json"])
+
+def _load_threat_model():
+    """
+    Registry loader -> (ThreatPredictor, version, backend).
+    TREE_MODEL_BACKEND=onnx serves the ONNX graph (see onnx_models). Compiled
+    NumPy trees are used when exported from this model file (see
+    compiled_trees); XGBoost models otherwise predict straight from the
+    booster (no DataFrame/DMatrix).
+    """
+    version = _version_on_disk()
+    if use_onnx(THREAT_ONNX_FILE):
+        onnx_model = load_onnx(THREAT_ONNX_FILE)
+        if MODEL_FILE.exists() and not onnx_is_current(onnx_model, version):
+            raise ValueError(f"ONNX threat model is stale for {version}; re-run onnx_models")
+        return ThreatPredictor(onnx_model.predict_proba, [str(c) for c in onnx_model.classes_], onnx_model), \
+            version, "onnx"
+    if use_compiled(COMPILED_MODEL_DIR):
+        if not MODEL_FILE.exists() or compiled_is_current(COMPILED_MODEL_DIR, version):
+            compiled = load_compiled(COMPILED_MODEL_DIR)
+            return ThreatPredictor(compiled.predict_proba, [str(c) for c in compiled.classes_], compiled), \
+                version, "compiled"
+        if tree_backend() == "compiled":
+            raise ValueError(f"Compiled threat model is stale for {version}; re-run compiled_trees")
+        logger.warning(f"⚠️ Compiled threat model is stale for {version}; serving the joblib model")
+
+    # joblib/xgboost are only imported when the native model is used
+    import joblib
+    bundle = joblib.load(MODEL_FILE)
+    model = bundle["model"]
+    class_names = [str(c) for c in bundle["label_encoder"].classes_]
+    booster = model.get_booster() if hasattr(model, "get_booster") else None
+    if booster is not None:
+        def predict_proba(X):
+            return booster.inplace_predict(X, validate_features=False)
+    else:
+        def predict_proba(X):
+            return model.predict_proba(pd.DataFrame(X, columns=FEATURES_BASE))
+    return ThreatPredictor(predict_proba, class_names, model, bundle), version, "native"
+
+def _smoke_payloads(n=32):
+    """Deterministic synthetic readings spanning the sensor ranges"""
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 1, 1)
+    return [{
+        "weather_temp_c": float(rng.uniform(10, 45)),
+        "weather_humidity_pct": float(rng.uniform(20, 95)),
+        "hive_sound_db": float(rng.uniform(40, 110)),
+        "hive_sound_peak_freq": float(rng.uniform(50, 600)),
+        "vibration_hz": float(rng.uniform(50, 600)),
+        "vibration_var": float(rng.uniform(0, 50)),
+        "timestamp": (start + timedelta(hours=5 * i)).isoformat()
+    } for i in range(n)]
+
+def _validate_threat_model(predictor: ThreatPredictor):
+    """Smoke batch: probabilities must be finite, one column per class, rows summing to 1"""
+    X = build_feature_matrix(_smoke_payloads()).astype(np.float32)
+    proba = np.asarray(predictor.predict_proba(X))
+    if proba.shape != (len(X), len(predictor.class_names)):
+        raise ValueError(f"Smoke batch returned shape {proba.shape}, expected {(len(X), len(predictor.class_names))}")
+    if not np.isfinite(proba).all():
+        raise ValueError("Smoke batch returned non-finite probabilities")
+    if not np.allclose(proba.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("Smoke batch probabilities do not sum to 1")
+    predicted = np.asarray(predictor.class_names)[proba.argmax(axis=1)]
+    classes, counts = np.unique(predicted, return_counts=True)
+    return {"rows": len(X), "predicted": dict(zip(classes.tolist(), counts.tolist()))}
+
+model_registry.register(
+    REGISTRY_NAME,
+    loader=_load_threat_model,
+    watch_paths=[MODEL_FILE, COMPILED_MODEL_DIR / "meta.json", THREAT_ONNX_FILE],
+    validate=_validate_threat_model
+)
+
+def get_served_model():
+    """Active registry entry (LoadedModel) for the threat model"""
+    return model_registry.get(REGISTRY_NAME)
+
 def _load_bundle():
+    """Raw joblib bundle of the model on disk (DataFrame prediction path, tools)"""
     global _bundle_cache
-    if _bundle_cache is None:
-        _bundle_cache = joblib.load(MODEL_FILE)
-    return _bundle_cache
+    served = get_served_model()
+    if served.model.bundle is not None:
+        return served.model.bundle
+    if _bundle_cache is None or _bundle_cache[0] != served.version:
+        import joblib
+        _bundle_cache = (served.version, joblib.load(MODEL_FILE))
+    return _bundle_cache[1]
+
+def _get_predictor():
+    """(predict_proba callable, class names) of the active model version"""
+    predictor = get_served_model().model
+    return predictor.predict_proba, predictor.class_names
+
+def preload():
+    """Load the serving model now; returns (backend name, model)"""
+    served = get_served_model()
+    return served.backend, served.model.model
+
+def get_model_version():
+    """Version of the model currently serving predictions"""
+    return get_served_model().version
 
 def get_model_meta():
-    b = _load_bundle()
+    served = get_served_model()
+    if served.model.bundle is None:
+        # Compiled and ONNX models carry their classes/features
+        meta = served.model.model.meta
+        classes, features = list(meta["classes"]), list(meta["features"])
+    else:
+        classes, features = list(served.model.bundle["label_encoder"].classes_), served.model.bundle["features"]
     return {
-        "classes": list(b["label_encoder"].classes_),
-        "features": b["features"]
+        "classes": classes,
+        "features": features,
+        "version": served.version,
+        "backend": served.backend
     }
 
+def _number(payload: dict, key: str, default):
+    """float(payload[key]); missing or None -> default (same rule as the batch path's _column)."""
+    value = payload.get(key)
+    return default if value is None else float(value)
+
 def _build_feature_row(payload: dict):
     row = {}
     # Core numeric features with safe defaults
-    row["weather_temp_c"] = float(payload.get("weather_temp_c", 30.0))
-    row["weather_humidity_pct"] = float(payload.get("weather_humidity_pct", 60.0))
-    row["hive_sound_db"] = float(payload.get("hive_sound_db", 70.0))
-    row["hive_sound_peak_freq"] = float(payload.get("hive_sound_peak_freq", 200.0))
-    row["vibration_hz"] = float(payload.get("vibration_hz", 200.0))
-    row["vibration_var"] = float(payload.get("vibration_var", 10.0))
+    row["weather_temp_c"] = _number(payload, "weather_temp_c", 30.0)
+    row["weather_humidity_pct"] = _number(payload, "weather_humidity_pct", 60.0)
+    row["hive_sound_db"] = _number(payload, "hive_sound_db", 70.0)
+    row["hive_sound_peak_freq"] = _number(payload, "hive_sound_peak_freq", 200.0)
+    row["vibration_hz"] = _number(payload, "vibration_hz", 200.0)
+    row["vibration_var"] = _number(payload, "vibration_var", 10.0)
 
     # Time-based features
     ts = payload.get("timestamp")
@@ -49,10 +199,10 @@ def _build_feature_row(payload: dict):
     row["temp_humidity"] = row["weather_temp_c"] * row["weather_humidity_pct"]
 
     # If you stream history you can pass these; otherwise fallback to current values
-    row["sound_roll3"] = float(payload.get("sound_roll3", row["hive_sound_db"]))
-    row["vib_roll3"] = float(payload.get("vib_roll3", row["vibration_hz"]))
-    row["sound_var3"] = float(payload.get("sound_var3", 0.0))
-    row["vib_var3"] = float(payload.get("vib_var3", 0.0))
+    row["sound_roll3"] = _number(payload, "sound_roll3", row["hive_sound_db"])
+    row["vib_roll3"] = _number(payload, "vib_roll3", row["vibration_hz"])
+    row["sound_var3"] = _number(payload, "sound_var3", 0.0)
+    row["vib_var3"] = _number(payload, "vib_var3", 0.0)
 
     row["db_to_vib_ratio"] = row["hive_sound_db"] / max(row["vibration_hz"], 1e-3)
     row["peak_to_vib_ratio"] = row["hive_sound_peak_freq"] / max(row["vibration_hz"], 1e-3)
@@ -60,18 +210,172 @@ def _build_feature_row(payload: dict):
     df = pd.DataFrame([row])
     return df[FEATURES_BASE]
 
+def _parse_payload_timestamp(ts):
+    """Timestamp -> datetime without pandas for ISO strings (same fallbacks as _build_feature_row)."""
+    if not ts:
+        return datetime.utcnow()
+    if isinstance(ts, datetime):
+        return ts
+    try:
+        return datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        try:
+            return pd.to_datetime(ts)
+        except Exception:
+            return datetime.utcnow()
+
+def _build_feature_values(payload: dict):
+    """FEATURES_BASE values (Python floats/ints) in model order; no pandas."""
+    weather_temp_c = _number(payload, "weather_temp_c", 30.0)
+    weather_humidity_pct = _number(payload, "weather_humidity_pct", 60.0)
+    hive_sound_db = _number(payload, "hive_sound_db", 70.0)
+    hive_sound_peak_freq = _number(payload, "hive_sound_peak_freq", 200.0)
+    vibration_hz = _number(payload, "vibration_hz", 200.0)
+    vibration_var = _number(payload, "vibration_var", 10.0)
+
+    ts = _parse_payload_timestamp(payload.get("timestamp"))
+    hour = int(ts.hour)
+    vib = max(vibration_hz, 1e-3)
+
+    return [
+        weather_temp_c,
+        weather_humidity_pct,
+        hive_sound_db,
+        hive_sound_peak_freq,
+        vibration_hz,
+        vibration_var,
+        hour,
+        int(ts.weekday()),
+        1 if 19 <= hour <= 22 else 0,
+        weather_temp_c * weather_humidity_pct,
+        _number(payload, "sound_roll3", hive_sound_db),
+        _number(payload, "vib_roll3", vibration_hz),
+        _number(payload, "sound_var3", 0.0),
+        _number(payload, "vib_var3", 0.0),
+        hive_sound_db / vib,
+        hive_sound_peak_freq / vib,
+    ]
+
+def build_used_features(payload: dict):
+    """The used_features dict predict_threat() reports for a payload, without running the model"""
+    return dict(zip(FEATURES_BASE, _build_feature_values(payload)))
+
 def predict_threat(payload: dict):
-    b = _load_bundle()
-    model = b["model"]
-    le = b["label_encoder"]
-    X = _build_feature_row(payload)
-    pred_idx = model.predict(X)[0]
-    proba = None
-    if hasattr(model, "predict_proba"):
-        proba = float(np.max(model.predict_proba(X)))
-    label = le.inverse_transform([pred_idx])[0]
+    """
+    Single-row prediction: one float32 feature vector and one probability
+    call, from which both the class and its confidence are taken.
+    """
+    served = get_served_model()
+    predictor = served.model
+    values = _build_feature_values(payload)
+
+    X = np.empty((1, len(FEATURES_BASE)), dtype=np.float32)
+    X[0] = values
+    proba = predictor.predict_proba(X)[0]
+    pred_idx = int(proba.argmax())
+
     return {
-        "threat_type": label,
-        "probability": proba,
-        "used_features": X.to_dict(orient="records")[0]
+        "threat_type": predictor.class_names[pred_idx],
+        "probability": float(proba[pred_idx]),
+        "used_features": dict(zip(FEATURES_BASE, values)),
+        "model_version": served.version
     }
+
+# ========== BATCH INFERENCE ==========
+def _column(payloads, key, default):
+    """One float64 column from a list of payloads (None -> default)."""
+    return np.fromiter(
+        (default if p.get(key) is None else p.get(key) for p in payloads),
+        dtype=np.float64, count=len(payloads)
+    )
+
+def _parse_timestamp(value):
+    """Parse a single timestamp with pandas (wall-clock time, tz dropped)."""
+    ts = pd.to_datetime(value, errors="coerce") if value else pd.NaT
+    if ts is pd.NaT:
+        return np.datetime64("NaT")
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.to_datetime64()
+
+def _timestamps_to_datetime64(payloads):
+    """Parse payload timestamps into datetime64[s]; missing/invalid -> utcnow."""
+    raw = [p.get("timestamp") or "NaT" for p in payloads]
+    try:
+        # numpy would shift offset timestamps to UTC; treat that as unparseable here
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            ts = np.array(raw, dtype="datetime64[s]")
+    except (ValueError, TypeError, Warning):
+        # Timezone offsets / non-ISO formats: parse one by one
+        ts = np.array([_parse_timestamp(r) for r in raw], dtype="datetime64[s]")
+    ts[np.isnat(ts)] = np.datetime64(datetime.utcnow(), "s")
+    return ts
+
+def build_feature_matrix(payloads):
+    """
+    Build the FEATURES_BASE matrix (N x 16, float64) for a list of payloads
+    in one vectorized pass. Same features and defaults as _build_feature_row.
+    """
+    n = len(payloads)
+    X = np.empty((n, len(FEATURES_BASE)), dtype=np.float64)
+    if n == 0:
+        return X
+
+    cols = {key: _column(payloads, key, default) for key, default in _NUMERIC_DEFAULTS.items()}
+
+    # Time-based features (1970-01-01 was a Thursday -> weekday 3)
+    ts = _timestamps_to_datetime64(payloads)
+    days = ts.astype("datetime64[D]")
+    hour = (ts - days).astype("timedelta64[h]").astype(np.int64)
+    cols["hour"] = hour.astype(np.float64)
+    cols["dayofweek"] = ((days.astype(np.int64) + 3) % 7).astype(np.float64)
+    cols["is_evening"] = ((hour >= 19) & (hour <= 22)).astype(np.float64)
+
+    # Interactions / rolling proxies
+    cols["temp_humidity"] = cols["weather_temp_c"] * cols["weather_humidity_pct"]
+    cols["sound_roll3"] = _column(payloads, "sound_roll3", np.nan)
+    cols["sound_roll3"] = np.where(np.isnan(cols["sound_roll3"]), cols["hive_sound_db"], cols["sound_roll3"])
+    cols["vib_roll3"] = _column(payloads, "vib_roll3", np.nan)
+    cols["vib_roll3"] = np.where(np.isnan(cols["vib_roll3"]), cols["vibration_hz"], cols["vib_roll3"])
+    cols["sound_var3"] = _column(payloads, "sound_var3", 0.0)
+    cols["vib_var3"] = _column(payloads, "vib_var3", 0.0)
+
+    vib = np.maximum(cols["vibration_hz"], 1e-3)
+    cols["db_to_vib_ratio"] = cols["hive_sound_db"] / vib
+    cols["peak_to_vib_ratio"] = cols["hive_sound_peak_freq"] / vib
+
+    for name, index in _FEATURE_INDEX.items():
+        X[:, index] = cols[name]
+    return X
+
+def predict_threat_batch(payloads):
+    """
+    Predict threats for many payloads with a single predict_proba call.
+    Returns a list of dicts in the same format as predict_threat().
+    """
+    if not payloads:
+        return []
+
+    # One version for the whole batch, even if a reload swaps mid-call
+    served = get_served_model()
+    classes = served.model.class_names
+
+    X = build_feature_matrix(payloads)
+    proba = served.model.predict_proba(X.astype(np.float32))
+    pred_idx = proba.argmax(axis=1)
+    max_proba = proba[np.arange(len(pred_idx)), pred_idx]
+
+    results = []
+    for row, idx, p in zip(X.tolist(), pred_idx.tolist(), max_proba.tolist()):
+        used_features = {
+            name: int(value) if name in _INT_FEATURES else value
+            for name, value in zip(FEATURES_BASE, row)
+        }
+        results.append({
+            "threat_type": classes[idx],
+            "probability": float(p),
+            "used_features": used_features,
+            "model_version": served.version
+        })
+    return results
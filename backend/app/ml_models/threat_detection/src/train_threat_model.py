@@ -20,6 +20,7 @@ OUTPUTS_DIR.mkdir(exist_ok=True, parents=True)
 
 MODEL_FILE = MODELS_DIR / "threat_model.pkl"
 META_FILE  = MODELS_DIR / "threat_model_meta.json"
+ONNX_FILE  = MODELS_DIR / "threat_model.onnx"
 
 def main():
     # 1. Load features/labels
@@ -80,6 +81,17 @@ def main():
         json.dump(meta, f, indent=2)
     print(f"✅ Saved meta to {META_FILE}")
 
+    # ONNX graph for the onnxruntime serving backend (TREE_MODEL_BACKEND=onnx)
+    try:
+        from ...model_registry import content_version
+        from ...onnx_models import export_xgboost_onnx
+        export_xgboost_onnx(clf, ONNX_FILE, classes=classes, features=features,
+                            source_version=content_version([MODEL_FILE]))
+        print(f"✅ Saved ONNX graph to {ONNX_FILE}")
+    except Exception as e:
+        # Optional artifact: missing converter or unsupported model type
+        print(f"⚠️ Skipped ONNX export ({e}) - needs onnxmltools")
+
     # 8. Correlation Heatmap
     corr = df[features].corr(numeric_only=True)
     plt.figure(figsize=(12, 8))
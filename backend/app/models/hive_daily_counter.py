@@ -0,0 +1,199 @@
+# app/models/hive_daily_counter.py
+
+from app import db
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+
+# Counter columns incremented for every synchronized_data row
+COUNTER_FIELDS = [
+    'total_records', 'successful_collections', 'perfect_alignment',
+    'weather_only', 'sensor_only', 'sensor_readings',
+    'weather_api_calls', 'adafruit_api_calls'
+]
+
+class HiveDailyCounter(db.Model):
+    """
+    Running per-hive, per-day counters for synchronized_data.
+    Updated in the same transaction as each collection so status and
+    alignment endpoints can read O(days) rows instead of counting the table.
+    """
+    __tablename__ = 'hive_daily_counters'
+    __table_args__ = (
+        db.UniqueConstraint('hive_id', 'day', name='uq_hive_daily_counters_hive_day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    hive_id = db.Column(db.Integer, db.ForeignKey('hives.id'), nullable=False, index=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+
+    total_records = db.Column(db.Integer, nullable=False, default=0)
+    successful_collections = db.Column(db.Integer, nullable=False, default=0)
+    perfect_alignment = db.Column(db.Integer, nullable=False, default=0)  # weather + sensor temperature
+    weather_only = db.Column(db.Integer, nullable=False, default=0)
+    sensor_only = db.Column(db.Integer, nullable=False, default=0)
+    sensor_readings = db.Column(db.Integer, nullable=False, default=0)   # sum of sensor_data_count
+    weather_api_calls = db.Column(db.Integer, nullable=False, default=0)
+    adafruit_api_calls = db.Column(db.Integer, nullable=False, default=0)
+
+    first_collection_at = db.Column(db.DateTime, nullable=True)
+    last_collection_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f'<HiveDailyCounter hive={self.hive_id} day={self.day}: {self.total_records}>'
+
+    def to_dict(self):
+        """Convert counter row to dictionary for JSON serialization"""
+        data = {field: getattr(self, field) for field in COUNTER_FIELDS}
+        data.update({
+            'hive_id': self.hive_id,
+            'day': self.day.isoformat() if self.day else None,
+            'first_collection_at': self.first_collection_at.isoformat() if self.first_collection_at else None,
+            'last_collection_at': self.last_collection_at.isoformat() if self.last_collection_at else None
+        })
+        return data
+
+    @staticmethod
+    def increments_for(record):
+        """Counter increments contributed by a single SynchronizedData record"""
+        has_weather = record.weather_temperature is not None
+        has_sensor = record.sensor_temperature is not None
+        return {
+            'total_records': 1,
+            'successful_collections': 1 if record.collection_success else 0,
+            'perfect_alignment': 1 if has_weather and has_sensor else 0,
+            'weather_only': 1 if has_weather and not has_sensor else 0,
+            'sensor_only': 1 if has_sensor and not has_weather else 0,
+            'sensor_readings': record.sensor_data_count or 0,
+            'weather_api_calls': record.api_usage_weather_calls or 0,
+            'adafruit_api_calls': record.api_usage_adafruit_calls or 0
+        }
+
+    @classmethod
+    def record(cls, synchronized_record):
+        """
+        Add a SynchronizedData record to its hive/day counters.
+        Runs inside the caller's transaction; the caller commits.
+        """
+        timestamp = synchronized_record.collection_timestamp or datetime.now()
+        increments = cls.increments_for(synchronized_record)
+
+        # Increment in SQL so concurrent writers never lose updates
+        values = {getattr(cls, field): getattr(cls, field) + amount for field, amount in increments.items()}
+        values[cls.first_collection_at] = case(
+            (cls.first_collection_at.is_(None) | (cls.first_collection_at > timestamp), timestamp),
+            else_=cls.first_collection_at
+        )
+        values[cls.last_collection_at] = case(
+            (cls.last_collection_at.is_(None) | (cls.last_collection_at < timestamp), timestamp),
+            else_=cls.last_collection_at
+        )
+        values[cls.updated_at] = datetime.now()
+
+        updated = cls.query.filter_by(
+            hive_id=synchronized_record.hive_id, day=timestamp.date()
+        ).update(values, synchronize_session=False)
+
+        if not updated:
+            db.session.add(cls(
+                hive_id=synchronized_record.hive_id,
+                day=timestamp.date(),
+                first_collection_at=timestamp,
+                last_collection_at=timestamp,
+                **increments
+            ))
+
+    @classmethod
+    def get_window_totals(cls, hive_id: int = 1, hours: int = 24):
+        """
+        Counter totals for the last N hours.
+        Whole days come from the counters table; the partial first day is
+        aggregated from synchronized_data over at most one day of rows.
+        """
+        from app.models.synchronized_data import SynchronizedData
+
+        since_time = datetime.now() - timedelta(hours=hours)
+        first_full_day = since_time.date() + timedelta(days=1)
+
+        sums = [func.coalesce(func.sum(getattr(cls, field)), 0) for field in COUNTER_FIELDS]
+        day_row = db.session.query(
+            *sums, func.min(cls.first_collection_at), func.max(cls.last_collection_at)
+        ).filter(
+            cls.hive_id == hive_id,
+            cls.day >= first_full_day
+        ).one()
+
+        has_weather = SynchronizedData.weather_temperature.isnot(None)
+        has_sensor = SynchronizedData.sensor_temperature.isnot(None)
+        edge_row = db.session.query(
+            func.count(SynchronizedData.id),
+            func.coalesce(func.sum(case((SynchronizedData.collection_success.is_(True), 1), else_=0)), 0),
+            func.coalesce(func.sum(case((has_weather & has_sensor, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((has_weather & ~has_sensor, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((~has_weather & has_sensor, 1), else_=0)), 0),
+            func.coalesce(func.sum(SynchronizedData.sensor_data_count), 0),
+            func.coalesce(func.sum(SynchronizedData.api_usage_weather_calls), 0),
+            func.coalesce(func.sum(SynchronizedData.api_usage_adafruit_calls), 0),
+            func.min(SynchronizedData.collection_timestamp),
+            func.max(SynchronizedData.collection_timestamp)
+        ).filter(
+            SynchronizedData.hive_id == hive_id,
+            SynchronizedData.collection_timestamp >= since_time,
+            SynchronizedData.collection_timestamp < datetime.combine(first_full_day, datetime.min.time())
+        ).one()
+
+        totals = {
+            field: int(day_row[index] or 0) + int(edge_row[index] or 0)
+            for index, field in enumerate(COUNTER_FIELDS)
+        }
+        starts = [value for value in (edge_row[-2], day_row[-2]) if value is not None]
+        ends = [value for value in (edge_row[-1], day_row[-1]) if value is not None]
+        totals['first_collection_at'] = min(starts) if starts else None
+        totals['last_collection_at'] = max(ends) if ends else None
+        return totals
+
+    @classmethod
+    def get_hive_totals(cls):
+        """All-time totals per hive: {hive_id: {field: total}}"""
+        sums = [func.coalesce(func.sum(getattr(cls, field)), 0) for field in COUNTER_FIELDS]
+        rows = db.session.query(cls.hive_id, *sums, func.max(cls.last_collection_at)).group_by(cls.hive_id).all()
+        return {
+            row[0]: {
+                **{field: int(row[index + 1]) for index, field in enumerate(COUNTER_FIELDS)},
+                'last_collection_at': row[-1].isoformat() if row[-1] else None
+            }
+            for row in rows
+        }
+
+    @classmethod
+    def rebuild(cls, hive_id: int = None):
+        """Recompute counters from synchronized_data (maintenance/backfill)"""
+        from app.models.synchronized_data import SynchronizedData
+
+        query = cls.query
+        if hive_id is not None:
+            query = query.filter_by(hive_id=hive_id)
+        query.delete(synchronize_session=False)
+
+        records = SynchronizedData.query
+        if hive_id is not None:
+            records = records.filter_by(hive_id=hive_id)
+
+        counters = {}
+        for record in records.yield_per(1000):
+            timestamp = record.collection_timestamp
+            key = (record.hive_id, timestamp.date())
+            counter = counters.get(key)
+            if counter is None:
+                counter = cls(hive_id=record.hive_id, day=timestamp.date(),
+                              first_collection_at=timestamp, last_collection_at=timestamp,
+                              **{field: 0 for field in COUNTER_FIELDS})
+                counters[key] = counter
+            for field, amount in cls.increments_for(record).items():
+                setattr(counter, field, getattr(counter, field) + amount)
+            counter.first_collection_at = min(counter.first_collection_at, timestamp)
+            counter.last_collection_at = max(counter.last_collection_at, timestamp)
+
+        db.session.add_all(counters.values())
+        db.session.commit()
+        return len(counters)
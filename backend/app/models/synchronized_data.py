@@ -1,5 +1,13 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import case, func
+
+# Fields that count towards the data quality score (weather + sensor, equal weight)
+QUALITY_SCORE_FIELDS = [
+    'weather_temperature', 'weather_humidity', 'weather_wind_speed',
+    'weather_light_intensity', 'weather_rainfall',
+    'sensor_temperature', 'sensor_humidity', 'sensor_sound', 'sensor_weight'
+]
 
 class SynchronizedData(db.Model):
     """
@@ -37,6 +45,9 @@ class SynchronizedData(db.Model):
     api_usage_weather_calls = db.Column(db.Integer, default=0)
     api_usage_adafruit_calls = db.Column(db.Integer, default=0)
     
+    # Data quality score (0-100), computed once at insert time
+    data_quality_score = db.Column(db.Float, nullable=True, index=True)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
@@ -80,6 +91,7 @@ class SynchronizedData(db.Model):
                 'weather_data_id': self.weather_data_id,
                 'sensor_data_count': self.sensor_data_count,
                 'collection_success': self.collection_success,
+                'data_quality_score': self.get_data_quality_score(),
                 'api_usage': {
                     'weather_calls': self.api_usage_weather_calls,
                     'adafruit_calls': self.api_usage_adafruit_calls
@@ -94,6 +106,28 @@ class SynchronizedData(db.Model):
         """Get the most recent synchronized data entry for a hive"""
         return cls.query.filter_by(hive_id=hive_id).order_by(cls.collection_timestamp.desc()).first()
     
+    @classmethod
+    def get_latest_for_all_hives(cls):
+        """
+        Get the most recent synchronized data entry for every hive in one query,
+        using ROW_NUMBER() over (hive_id, collection_timestamp DESC)
+        """
+        from sqlalchemy.orm import aliased
+        
+        ranked = db.session.query(
+            cls,
+            func.row_number().over(
+                partition_by=cls.hive_id,
+                order_by=(cls.collection_timestamp.desc(), cls.id.desc())
+            ).label('row_number')
+        ).subquery()
+        
+        latest = aliased(cls, ranked)
+        return {
+            record.hive_id: record
+            for record in db.session.query(latest).filter(ranked.c.row_number == 1).all()
+        }
+    
     @classmethod
     def get_historical_data(cls, hive_id: int = 1, hours: int = 24):
         """Get historical synchronized data for the specified number of hours"""
@@ -119,40 +153,18 @@ class SynchronizedData(db.Model):
     @classmethod
     def get_alignment_statistics(cls, hive_id: int = 1, hours: int = 24):
         """Get statistics about data alignment quality"""
-        from datetime import datetime, timedelta
-        since_time = datetime.now() - timedelta(hours=hours)
+        from app.models.hive_daily_counter import HiveDailyCounter
         
-        total_records = cls.query.filter(
-            cls.hive_id == hive_id,
-            cls.collection_timestamp >= since_time
-        ).count()
-        
-        perfect_alignment = cls.query.filter(
-            cls.hive_id == hive_id,
-            cls.collection_timestamp >= since_time,
-            cls.weather_temperature.isnot(None),
-            cls.sensor_temperature.isnot(None)
-        ).count()
-        
-        weather_only = cls.query.filter(
-            cls.hive_id == hive_id,
-            cls.collection_timestamp >= since_time,
-            cls.weather_temperature.isnot(None),
-            cls.sensor_temperature.is_(None)
-        ).count()
-        
-        sensor_only = cls.query.filter(
-            cls.hive_id == hive_id,
-            cls.collection_timestamp >= since_time,
-            cls.weather_temperature.is_(None),
-            cls.sensor_temperature.isnot(None)
-        ).count()
+        # Daily counters for whole days plus one partial day of raw rows
+        totals = HiveDailyCounter.get_window_totals(hive_id, hours)
+        total_records = totals['total_records']
+        perfect_alignment = totals['perfect_alignment']
         
         return {
             'total_records': total_records,
             'perfect_alignment': perfect_alignment,
-            'weather_only': weather_only,
-            'sensor_only': sensor_only,
+            'weather_only': totals['weather_only'],
+            'sensor_only': totals['sensor_only'],
             'alignment_percentage': (perfect_alignment / total_records * 100) if total_records > 0 else 0,
             'hours_analyzed': hours
         }
@@ -175,31 +187,135 @@ class SynchronizedData(db.Model):
                 self.sensor_temperature is not None)
     
     def get_data_quality_score(self):
-        """Calculate data quality score based on available data"""
-        score = 0
-        max_score = 0
+        """Get data quality score, using the stored value when available"""
+        if self.data_quality_score is not None:
+            return self.data_quality_score
+        return self.compute_data_quality_score()
+    
+    def compute_data_quality_score(self):
+        """Calculate data quality score based on available weather and sensor data"""
+        present = sum(getattr(self, field) is not None for field in QUALITY_SCORE_FIELDS)
+        return present / len(QUALITY_SCORE_FIELDS) * 100
+    
+    def refresh_data_quality_score(self):
+        """Compute and store the data quality score (call before insert)"""
+        self.data_quality_score = self.compute_data_quality_score()
+        return self.data_quality_score
+    
+    @classmethod
+    def quality_score_expression(cls):
+        """SQL expression equivalent of compute_data_quality_score()"""
+        present = sum(
+            case((getattr(cls, field).isnot(None), 1), else_=0) for field in QUALITY_SCORE_FIELDS
+        )
+        return present * 100.0 / len(QUALITY_SCORE_FIELDS)
+    
+    @classmethod
+    def get_data_quality_statistics(cls, hive_id: int = 1, hours: int = 24):
+        """
+        Get data quality statistics for a time window using a single SQL aggregate.
+        Rows that have not been backfilled yet are scored on the fly in SQL.
+        """
+        from datetime import datetime, timedelta
+        since_time = datetime.now() - timedelta(hours=hours)
+        
+        score = func.coalesce(cls.data_quality_score, cls.quality_score_expression())
+        aligned = cls.weather_temperature.isnot(None) & cls.sensor_temperature.isnot(None)
+        has_threat_fields = (
+            cls.sensor_sound_peak_freq.isnot(None) &
+            cls.sensor_vibration_hz.isnot(None) &
+            cls.sensor_vibration_var.isnot(None)
+        )
+        temp_diff = cls.sensor_temperature - cls.weather_temperature
+        humidity_diff = cls.sensor_humidity - cls.weather_humidity
+        
+        row = db.session.query(
+            func.count(cls.id),
+            func.avg(score),
+            func.min(score),
+            func.max(score),
+            func.sum(case((score >= 90, 1), else_=0)),
+            func.sum(case(((score >= 70) & (score < 90), 1), else_=0)),
+            func.sum(case(((score >= 50) & (score < 70), 1), else_=0)),
+            func.sum(case((score < 50, 1), else_=0)),
+            func.sum(case((aligned, 1), else_=0)),
+            func.sum(case((has_threat_fields, 1), else_=0)),
+            func.count(case((aligned, temp_diff))),
+            func.avg(case((aligned, temp_diff))),
+            func.min(case((aligned, temp_diff))),
+            func.max(case((aligned, temp_diff))),
+            func.count(case((aligned, humidity_diff))),
+            func.avg(case((aligned, humidity_diff))),
+            func.min(case((aligned, humidity_diff))),
+            func.max(case((aligned, humidity_diff)))
+        ).filter(
+            cls.hive_id == hive_id,
+            cls.collection_timestamp >= since_time
+        ).one()
+        
+        total_records = row[0] or 0
+        
+        def _round(value):
+            return round(float(value), 2) if value is not None else None
         
-        # Weather data quality (50% of score)
-        weather_fields = [
-            self.weather_temperature, self.weather_humidity, 
-            self.weather_wind_speed, self.weather_light_intensity, self.weather_rainfall
-        ]
-        for field in weather_fields:
-            max_score += 1
-            if field is not None:
-                score += 1
+        return {
+            'total_records': total_records,
+            'average_quality_score': _round(row[1]) or 0,
+            'min_quality_score': _round(row[2]) or 0,
+            'max_quality_score': _round(row[3]) or 0,
+            'quality_distribution': {
+                'excellent': int(row[4] or 0),  # >= 90
+                'good': int(row[5] or 0),       # 70-90
+                'fair': int(row[6] or 0),       # 50-70
+                'poor': int(row[7] or 0)        # < 50
+            },
+            'perfect_alignment_count': int(row[8] or 0),
+            'records_with_threat_fields': int(row[9] or 0),
+            'temperature_analysis': {
+                'correlation_count': int(row[10] or 0),
+                'average_difference': _round(row[11]),
+                'min_difference': _round(row[12]),
+                'max_difference': _round(row[13])
+            },
+            'humidity_analysis': {
+                'correlation_count': int(row[14] or 0),
+                'average_difference': _round(row[15]),
+                'min_difference': _round(row[16]),
+                'max_difference': _round(row[17])
+            },
+            'hours_analyzed': hours
+        }
+    
+    @classmethod
+    def backfill_data_quality_scores(cls, chunk_size: int = 1000):
+        """
+        Populate data_quality_score for existing rows in id-ordered chunks,
+        committing after each chunk to keep transactions short.
         
-        # Sensor data quality (50% of score)
-        sensor_fields = [
-            self.sensor_temperature, self.sensor_humidity,
-            self.sensor_sound, self.sensor_weight
-        ]
-        for field in sensor_fields:
-            max_score += 1
-            if field is not None:
-                score += 1
+        Returns:
+            Number of rows updated
+        """
+        updated = 0
+        last_id = 0
+        while True:
+            ids = [row[0] for row in db.session.query(cls.id).filter(
+                cls.id > last_id,
+                cls.data_quality_score.is_(None)
+            ).order_by(cls.id.asc()).limit(chunk_size).all()]
+            
+            if not ids:
+                break
+            
+            cls.query.filter(cls.id.in_(ids)).update(
+                {cls.data_quality_score: cls.quality_score_expression()},
+                synchronize_session=False
+            )
+            db.session.commit()
+            
+            updated += len(ids)
+            last_id = ids[-1]
         
-        return (score / max_score * 100) if max_score > 0 else 0
+        return updated
     
     def calculate_threat_detection_fields(self):
         """
@@ -0,0 +1,212 @@
+# app/models/threat_prediction.py
+
+from app import db
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+
+# IN-list size for bulk lookups
+_LOOKUP_CHUNK = 500
+
+class ThreatPrediction(db.Model):
+    """
+    Threat model output for one synchronized_data row.
+    Written once per row and model version; rows scored by an older model
+    are re-scored in place. Statistics are SQL aggregates over this table.
+    """
+    __tablename__ = 'threat_predictions'
+    __table_args__ = (
+        db.Index('ix_threat_predictions_hive_timestamp', 'hive_id', 'collection_timestamp'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    synchronized_data_id = db.Column(db.Integer, db.ForeignKey('synchronized_data.id'), nullable=False, unique=True)
+    hive_id = db.Column(db.Integer, db.ForeignKey('hives.id'), nullable=False)
+    collection_timestamp = db.Column(db.DateTime, nullable=False)  # copied from synchronized_data for window queries
+
+    threat_type = db.Column(db.String(64), nullable=False, index=True)
+    probability = db.Column(db.Float, nullable=False)
+    model_version = db.Column(db.String(32), nullable=False, index=True)
+    predicted_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f'<ThreatPrediction row={self.synchronized_data_id} {self.threat_type} {self.probability:.3f}>'
+
+    def to_dict(self):
+        """Convert prediction to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'synchronized_data_id': self.synchronized_data_id,
+            'hive_id': self.hive_id,
+            'collection_timestamp': self.collection_timestamp.isoformat() if self.collection_timestamp else None,
+            'threat_type': self.threat_type,
+            'probability': self.probability,
+            'model_version': self.model_version,
+            'predicted_at': self.predicted_at.isoformat() if self.predicted_at else None
+        }
+
+    # ========== WRITES ==========
+    @classmethod
+    def store(cls, records, predictions, model_version: str) -> int:
+        """
+        Insert or re-score predictions for SynchronizedData records.
+        Runs inside the caller's transaction; the caller commits.
+
+        Args:
+            records: SynchronizedData instances (must have ids)
+            predictions: predict_threat()-style dicts, same order as records
+            model_version: Model version for predictions that do not carry their own
+
+        Returns:
+            Number of rows inserted or updated
+        """
+        pairs = [(record, prediction) for record, prediction in zip(records, predictions) if record.id is not None]
+        if not pairs:
+            return 0
+
+        ids = [record.id for record, _ in pairs]
+        existing = {}
+        for start in range(0, len(ids), _LOOKUP_CHUNK):
+            chunk = ids[start:start + _LOOKUP_CHUNK]
+            for row in cls.query.filter(cls.synchronized_data_id.in_(chunk)):
+                existing[row.synchronized_data_id] = row
+
+        written = 0
+        for record, prediction in pairs:
+            row = existing.get(record.id)
+            threat_type = prediction['threat_type']
+            probability = float(prediction['probability'])
+            version = prediction.get('model_version') or model_version
+            if row is None:
+                db.session.add(cls(
+                    synchronized_data_id=record.id,
+                    hive_id=record.hive_id,
+                    collection_timestamp=record.collection_timestamp,
+                    threat_type=threat_type,
+                    probability=probability,
+                    model_version=version
+                ))
+            elif row.model_version != version or row.threat_type != threat_type or row.probability != probability:
+                row.threat_type = threat_type
+                row.probability = probability
+                row.model_version = version
+            else:
+                continue
+            written += 1
+        return written
+
+    # ========== STALENESS ==========
+    @classmethod
+    def first_unscored_timestamp(cls, hive_id: int, since_time: datetime, model_version: str):
+        """Earliest synchronized_data timestamp in the window without a current-version prediction"""
+        from app.models.synchronized_data import SynchronizedData
+
+        return db.session.query(func.min(SynchronizedData.collection_timestamp)).outerjoin(
+            cls, cls.synchronized_data_id == SynchronizedData.id
+        ).filter(
+            SynchronizedData.hive_id == hive_id,
+            SynchronizedData.collection_timestamp >= since_time,
+            (cls.id.is_(None)) | (cls.model_version != model_version)
+        ).scalar()
+
+    # ========== AGGREGATES ==========
+    @classmethod
+    def _window_filter(cls, query, hive_id: int, since_time: datetime, model_version: str = None):
+        query = query.filter(cls.hive_id == hive_id, cls.collection_timestamp >= since_time)
+        if model_version is not None:
+            query = query.filter(cls.model_version == model_version)
+        return query
+
+    @classmethod
+    def get_window_statistics(cls, hive_id: int = 1, hours: int = 24, model_version: str = None):
+        """
+        Per-class counts and probability statistics for the last N hours
+        (one GROUP BY over the hive/timestamp index).
+        """
+        since_time = datetime.now() - timedelta(hours=hours)
+        rows = cls._window_filter(db.session.query(
+            cls.threat_type,
+            func.count(cls.id),
+            func.sum(cls.probability),
+            func.min(cls.probability),
+            func.max(cls.probability)
+        ), hive_id, since_time, model_version).group_by(cls.threat_type).all()
+
+        total = sum(row[1] for row in rows)
+        probability_sum = sum(row[2] or 0.0 for row in rows)
+        return {
+            'total_predictions': total,
+            'threat_type_counts': {row[0]: row[1] for row in rows},
+            'average_probability': probability_sum / total if total else 0.0,
+            'min_probability': min((row[3] for row in rows), default=0.0),
+            'max_probability': max((row[4] for row in rows), default=0.0)
+        }
+
+    @classmethod
+    def get_time_windows(cls, hive_id: int = 1, hours: int = 24, windows: int = 5, model_version: str = None):
+        """
+        Split the last N hours into equal time windows and aggregate each one
+        per threat type in a single query.
+        """
+        now = datetime.now()
+        since_time = now - timedelta(hours=hours)
+        step = timedelta(hours=hours) / windows
+        bucket = case(
+            *[(cls.collection_timestamp < since_time + step * (index + 1), index + 1) for index in range(windows - 1)],
+            else_=windows
+        ).label('bucket')
+
+        rows = cls._window_filter(db.session.query(
+            bucket,
+            cls.threat_type,
+            func.count(cls.id),
+            func.sum(cls.probability),
+            func.max(cls.probability)
+        ), hive_id, since_time, model_version).group_by(bucket, cls.threat_type).all()
+
+        result = []
+        for index in range(windows):
+            window_rows = [row for row in rows if row[0] == index + 1]
+            count = sum(row[2] for row in window_rows)
+            if not count:
+                continue
+            result.append({
+                'window': index + 1,
+                'start': (since_time + step * index).isoformat(),
+                'end': (since_time + step * (index + 1)).isoformat(),
+                'threat_counts': {row[1]: row[2] for row in window_rows},
+                'avg_probability': sum(row[3] or 0.0 for row in window_rows) / count,
+                'max_probability': max(row[4] for row in window_rows)
+            })
+        return result
+
+    @classmethod
+    def get_high_probability(cls, hive_id: int = 1, hours: int = 24, min_probability: float = 0.8,
+                             model_version: str = None):
+        """
+        Threat (not No_Threat) predictions above a probability, oldest first,
+        each with its synchronized_data row (one joined query).
+
+        Returns:
+            List of (ThreatPrediction, SynchronizedData or None) tuples
+        """
+        from app.models.synchronized_data import SynchronizedData
+
+        since_time = datetime.now() - timedelta(hours=hours)
+        query = db.session.query(cls, SynchronizedData).outerjoin(
+            SynchronizedData, SynchronizedData.id == cls.synchronized_data_id
+        )
+        return [tuple(row) for row in cls._window_filter(query, hive_id, since_time, model_version).filter(
+            cls.threat_type != 'No_Threat',
+            cls.probability > min_probability
+        ).order_by(cls.collection_timestamp.asc()).all()]
+
+    @classmethod
+    def get_latest_for_all_hives(cls):
+        """Most recent prediction per hive: {hive_id: ThreatPrediction}"""
+        latest = db.session.query(
+            cls.hive_id, func.max(cls.collection_timestamp).label('latest')
+        ).group_by(cls.hive_id).subquery()
+        rows = cls.query.join(
+            latest, (cls.hive_id == latest.c.hive_id) & (cls.collection_timestamp == latest.c.latest)
+        ).all()
+        return {row.hive_id: row for row in rows}
@@ -6,9 +6,12 @@ from app.controllers.sensor_controller import sensor_blueprint
 from app.controllers.iot_controller import iot_blueprint
 
 # threat detection imports
-from app.ml_models.threat_detection.src.prediction_service_threat import predict_threat, get_model_meta
-from app.ml_models.threat_detection.src.alert_store import add_alert, load_alerts
+from app.ml_models.threat_detection.src.prediction_service_threat import get_model_meta
+from app.ml_models.threat_detection.src.alert_store import query_alerts
+from app.ml_models.threat_detection.src.alert_suppression import alert_suppression
 from app.ml_models.threat_detection.src.recommendation_service import get_recommendations
+from app.services.threat_feature_state import threat_feature_state
+from app.services.threat_inference_batcher import threat_inference_batcher
 
 # In app/api.py, add:
 from app.controllers.potential_location_controller import potential_loc_blueprint
@@ -25,6 +28,7 @@ from app.controllers.hive_management_controller import hive_management_blueprint
 from app.controllers.performance_controller import performance_blueprint
 from app.controllers.historical_performance_controller import historical_performance_blueprint
 from app.controllers.threat_detection_controller import threat_detection_bp
+from app.utils.response_cache import response_cache
 
 api_bp = Blueprint('api_bp', __name__)
 
@@ -65,17 +69,24 @@ def threat_predict():
     except Exception:
         payload = {}
 
-    result = predict_threat(payload)  # {'threat_type', 'probability', 'used_features'}
+    # Readings tagged with a hive get that hive's streaming rolling features; client
+    # readings are scored against the window but never pushed into it
+    payload = threat_feature_state.enrich_payload(payload.get("hive_id"), payload, record=False)
+
+    # Concurrent requests share one batched model call
+    result = threat_inference_batcher.predict(payload)  # {'threat_type', 'probability', 'used_features'}
 
     # attach recommendations (always attach, even for No_Threat)
     threat = result.get("threat_type")
     recs = get_recommendations(threat) if threat else get_recommendations("No_Threat")
     result["recommendations"] = recs
 
-    # store alert if not No_Threat (optional: store all; here we store only threats)
+    # store alert if not No_Threat (optional: store all; here we store only threats),
+    # subject to the same cooldown / rate limit as scheduled detections
     if threat and threat != "No_Threat":
         try:
-            add_alert(threat, result.get("probability"), result.get("used_features", {}), recommendations=recs)
+            alert_suppression.raise_alert(threat, result.get("probability"), result.get("used_features", {}),
+                                          recommendations=recs, hive_id=payload.get("hive_id"))
         except Exception:
             # don't break response if saving fails
             pass
@@ -86,5 +97,64 @@ def threat_predict():
 @api_bp.route("/threat/alerts", methods=["GET"])
 def threat_alerts():
     limit = int(request.args.get("limit", 20))
-    alerts = load_alerts()
-    return jsonify(alerts[:limit]), 200
+    alerts = query_alerts(hive_id=request.args.get("hive_id", type=int), limit=limit)
+    return jsonify(alerts), 200
+
+# Analytics response cache metrics
+@api_bp.route("/cache/stats", methods=["GET"])
+def response_cache_stats():
+    return jsonify(response_cache.get_stats()), 200
+
+# Socket.IO hive/apiary subscriptions and publish counters for this worker
+@api_bp.route("/realtime/stats", methods=["GET"])
+def realtime_stats():
+    from app.services.realtime_hub import realtime_hub
+    return jsonify(realtime_hub.get_stats()), 200
+
+# Whether this worker runs the scheduler, and who holds the leader lease
+@api_bp.route("/scheduler/leader", methods=["GET"])
+def scheduler_leader():
+    from app.services.leader_election import leader_election
+    return jsonify(leader_election.get_status()), 200
+
+# Micro-batching throughput and latency histograms for /threat/predict
+@api_bp.route("/threat/predict/stats", methods=["GET"])
+def threat_predict_stats():
+    return jsonify(threat_inference_batcher.get_stats()), 200
+
+# Per-model load time / memory report for this worker
+@api_bp.route("/models/status", methods=["GET"])
+def model_load_status():
+    from app.services.model_preloader import model_preloader
+    return jsonify(model_preloader.get_report()), 200
+
+# ========== MODEL REGISTRY ==========
+def _model_registry():
+    # Importing the services registers their models
+    import app.ml_models.threat_detection.src.prediction_service_threat  # noqa: F401
+    import app.services.performance_prediction_service  # noqa: F401
+    from app.ml_models.model_registry import model_registry
+    return model_registry
+
+# Active / previous version of every model in this worker
+@api_bp.route("/models/registry", methods=["GET"])
+def model_registry_status():
+    return jsonify(_model_registry().status()), 200
+
+# Load, validate and swap in the model files on disk now; other workers follow on their next poll
+@api_bp.route("/models/<name>/reload", methods=["POST"])
+def reload_model(name):
+    registry = _model_registry()
+    if name not in registry.status()["models"]:
+        return jsonify({"error": f"Unknown model '{name}'"}), 404
+    result = registry.reload_everywhere(name, force=bool(request.args.get("force")))
+    return jsonify(result), 200 if result["success"] else 422
+
+# Swap back to the previously served version and pin every worker to it
+@api_bp.route("/models/<name>/rollback", methods=["POST"])
+def rollback_model(name):
+    registry = _model_registry()
+    if name not in registry.status()["models"]:
+        return jsonify({"error": f"Unknown model '{name}'"}), 404
+    result = registry.rollback_everywhere(name)
+    return jsonify(result), 200 if result["success"] else 409
@@ -2,9 +2,11 @@ from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
 import logging
 
+from app.models.synchronized_data import SynchronizedData
 from app.services.real_time_threat_service import real_time_threat_service
-from app.services.synchronized_monitoring_service import synchronized_monitoring_service
-from app.ml_models.threat_detection.src.alert_store import load_alerts
+from app.ml_models.threat_detection.src.alert_store import query_alerts, alert_statistics, alert_writer_stats
+from app.ml_models.threat_detection.src.alert_suppression import alert_suppression
+from app.utils.response_cache import cached_response
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +28,7 @@ def get_current_threat_status(hive_id):
             from app.services.dummy_data_service import dummy_data_service
             latest_data = dummy_data_service.get_latest_synchronized_data(hive_id)
         else:
-            from app.services.synchronized_monitoring_service import synchronized_monitoring_service
-            latest_data = synchronized_monitoring_service.get_latest_synchronized_data(hive_id)
+            latest_data = SynchronizedData.get_latest(hive_id)
         
         if not latest_data:
             return jsonify({
@@ -36,15 +37,20 @@ def get_current_threat_status(hive_id):
                 "data_mode": "dummy" if USE_DUMMY_DATA else "real"
             }), 404
         
-        # Analyze threats
-        threat_result = real_time_threat_service.analyze_synchronized_data(latest_data)
+        # Analyze threats (stored readings reuse their cached prediction and alert)
+        if USE_DUMMY_DATA:
+            threat_result = real_time_threat_service.analyze_synchronized_data(latest_data)
+            data_timestamp = latest_data.get("collection_timestamp")
+        else:
+            threat_result = real_time_threat_service.analyze_reading(latest_data)
+            data_timestamp = latest_data.collection_timestamp.isoformat()
         
         if threat_result:
             return jsonify({
                 "status": "success",
                 "hive_id": hive_id,
                 "current_threat": threat_result,
-                "data_timestamp": latest_data.get("collection_timestamp"),
+                "data_timestamp": data_timestamp,
                 "data_mode": "dummy" if USE_DUMMY_DATA else "real"
             }), 200
         else:
@@ -71,7 +77,7 @@ def analyze_latest_data(hive_id):
     """
     try:
         # Get latest synchronized data
-        latest_data = synchronized_monitoring_service.get_latest_synchronized_data(hive_id)
+        latest_data = SynchronizedData.get_latest(hive_id)
         
         if not latest_data:
             return jsonify({
@@ -79,8 +85,8 @@ def analyze_latest_data(hive_id):
                 "message": "No recent data available for analysis"
             }), 404
         
-        # Analyze for threats
-        result = real_time_threat_service.analyze_synchronized_data(latest_data)
+        # Analyze for threats (a reading is scored and alerted once per model version)
+        result = real_time_threat_service.analyze_reading(latest_data)
         
         if result:
             return jsonify({
@@ -104,18 +110,21 @@ def analyze_latest_data(hive_id):
 @threat_bp.route('/alerts', methods=['GET'])
 def get_threat_alerts():
     """
-    Get all stored threat alerts
+    Get stored threat alerts, newest first
     
-    GET /api/threat-detection/alerts?limit=50
+    GET /api/threat-detection/alerts?limit=50&hive_id=1&threat_type=Predator&severity=High&details=true
     """
     try:
         limit = request.args.get('limit', 50, type=int)
         
-        # Load alerts from storage
-        alerts = load_alerts()
-        
-        # Limit results
-        alerts = alerts[:limit] if alerts else []
+        # Filters are applied in the alert query
+        alerts = query_alerts(
+            hive_id=request.args.get('hive_id', type=int),
+            threat_type=request.args.get('threat_type'),
+            severity=request.args.get('severity'),
+            limit=limit,
+            include_details=request.args.get('details', 'true').lower() != 'false'
+        )
         
         return jsonify({
             "success": True,
@@ -137,23 +146,20 @@ def get_recent_alerts(hours):
     """
     Get threat alerts from the last N hours
     
-    GET /api/threat-detection/alerts/recent/24
+    GET /api/threat-detection/alerts/recent/24?limit=100&hive_id=1&threat_type=Predator&severity=High
     """
     try:
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        # Alert timestamps are stored in UTC
+        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
         
-        # Load all alerts
-        all_alerts = load_alerts()
-        
-        # Filter by time
-        recent_alerts = []
-        for alert in all_alerts:
-            try:
-                alert_time = datetime.fromisoformat(alert["timestamp"])
-                if alert_time > cutoff_time:
-                    recent_alerts.append(alert)
-            except Exception:
-                continue
+        recent_alerts = query_alerts(
+            since=cutoff_time,
+            hive_id=request.args.get('hive_id', type=int),
+            threat_type=request.args.get('threat_type'),
+            severity=request.args.get('severity'),
+            limit=request.args.get('limit', 100, type=int),
+            include_details=request.args.get('details', 'true').lower() != 'false'
+        )
         
         return jsonify({
             "success": True,
@@ -194,6 +200,7 @@ def get_threat_trends(hive_id):
 
 
 @threat_bp.route('/statistics/<int:hive_id>', methods=['GET'])
+@cached_response('threat_detection_statistics')
 def get_threat_statistics(hive_id):
     """
     Get comprehensive threat statistics for a hive
@@ -202,39 +209,19 @@ def get_threat_statistics(hive_id):
     """
     try:
         hours = request.args.get('hours', 24, type=int)
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        
-        # Load alerts
-        all_alerts = load_alerts()
+        # Alert timestamps are stored in UTC
+        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
         
-        # Filter recent alerts
-        recent_alerts = []
-        for alert in all_alerts:
-            try:
-                alert_time = datetime.fromisoformat(alert["timestamp"])
-                if alert_time > cutoff_time:
-                    recent_alerts.append(alert)
-            except Exception:
-                continue
-        
-        # Count by threat type
-        threat_counts = {}
+        # Count by threat type and severity in the database
+        stats = alert_statistics(since=cutoff_time, hive_id=hive_id)
+        threat_counts = stats["threat_counts"]
         severity_counts = {"Critical": 0, "High": 0, "Medium": 0, "Low": 0}
-        
-        for alert in recent_alerts:
-            # Count threat types
-            threat_type = alert.get("threat_type", "Unknown")
-            threat_counts[threat_type] = threat_counts.get(threat_type, 0) + 1
-            
-            # Count severity levels
-            recommendations = alert.get("recommendations", {})
-            if isinstance(recommendations, dict):
-                severity = recommendations.get("severity", "Unknown")
-                if severity in severity_counts:
-                    severity_counts[severity] += 1
+        for severity, count in stats["severity_counts"].items():
+            if severity in severity_counts:
+                severity_counts[severity] += count
         
         # Calculate percentages
-        total_alerts = len(recent_alerts)
+        total_alerts = stats["total_alerts"]
         threat_percentages = {}
         if total_alerts > 0:
             for threat_type, count in threat_counts.items():
@@ -313,6 +300,47 @@ def health_check():
         }), 500
 
 
+@threat_bp.route('/alerts/writer', methods=['GET'])
+def get_alert_writer_stats():
+    """
+    Background alert writer queue depth and batch counters (this worker)
+
+    GET /api/threat-detection/alerts/writer
+    """
+    try:
+        return jsonify({
+            "success": True,
+            "writer": alert_writer_stats()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting alert writer stats: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 500
+
+
+@threat_bp.route('/alerts/suppression', methods=['GET'])
+def get_alert_suppression():
+    """
+    Alert suppression state per hive and threat type, plus this worker's decision counts
+
+    GET /api/threat-detection/alerts/suppression?hive_id=1
+    """
+    try:
+        return jsonify({
+            "success": True,
+            "states": alert_suppression.get_states(hive_id=request.args.get('hive_id', type=int)),
+            "stats": alert_suppression.get_stats()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting alert suppression state: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 500
+
+
 # Export blueprint
 def register_threat_routes(app):
     """Register threat detection routes with Flask app"""
@@ -20,19 +20,113 @@
 
 # IT21807862 - Malinda
 
+import os
 import logging
+import threading
 from apscheduler.schedulers.background import BackgroundScheduler
 from app.services.iot_integration_service import fetch_and_save_iot_data
 from app.services.weather_service import weather_service
 from app.services.synchronized_monitoring_service import synchronized_monitoring_service
 from app.services.real_time_threat_detection_service import real_time_threat_detection_service
+from app.services.realtime_hub import realtime_hub
+from app.services.leader_election import leader_election
 from app.utils.adafruit_client import get_feed_data
-from datetime import datetime
+from app.config import Config
+from datetime import datetime, timezone
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def start_scheduler(app, socketio):
+# Threat status endpoints analyze generated readings instead of stored ones
+USE_DUMMY_DATA = Config.USE_DUMMY_DATA
+
+# App whose background services run once per process (set by start_background_services)
+_background_app = None
+_background_socketio = None
+_background_pid = None
+_background_lock = threading.Lock()
+
+
+def start_background_services(app, socketio, defer=False):
+    """
+    Start this process's background services and campaign for scheduler
+    leadership: every worker runs them, only the elected one runs the jobs.
+
+    Args:
+        app: Flask app
+        socketio: SocketIO instance
+        defer: Only remember the app (gunicorn --preload master): each forked
+               worker starts its own services through ensure_background_services(),
+               from the post_worker_init hook in gunicorn.conf.py or, failing
+               that, its first request
+    """
+    global _background_app, _background_socketio
+    _background_app, _background_socketio = app, socketio
+    if defer:
+        app.before_request(ensure_background_services)
+        logger.info("Background services deferred until after the worker fork")
+        return
+    ensure_background_services()
+
+
+def ensure_background_services():
+    """Start the background services in this process unless they already run here"""
+    global _background_pid
+    if _background_app is None or _background_pid == os.getpid():
+        return
+    with _background_lock:
+        if _background_pid == os.getpid():
+            return
+        _background_pid = os.getpid()
+        _start_background_services(_background_app, _background_socketio)
+
+
+def _start_background_services(app, socketio):
+    """Per-worker background setup, then campaign for scheduler leadership"""
+    # Seed per-hive rolling threat features from the latest stored readings
+    _rebuild_threat_features(app)
+
+    # Start the alert writer now so spools left by a crashed worker are replayed
+    try:
+        from app.ml_models.threat_detection.src.alert_store import alert_writer
+        alert_writer.start()
+    except Exception as e:
+        logger.error(f"Error starting alert writer: {str(e)}")
+
+    leader_election.init_app(
+        app,
+        on_elected=lambda takeover: start_scheduler(app, socketio, run_now=takeover),
+        on_demoted=lambda: stop_scheduler(app),
+    )
+
+
+def _rebuild_threat_features(app):
+    with app.app_context():
+        try:
+            from app.services.threat_feature_state import threat_feature_state
+            threat_feature_state.rebuild()
+        except Exception as e:
+            logger.error(f"Error rebuilding rolling threat features: {str(e)}")
+
+
+def stop_scheduler(app):
+    """Stop scheduling jobs in this worker (leadership lost or shutting down)"""
+    scheduler = app.config.pop('SCHEDULER', None)
+    if scheduler is not None and scheduler.running:
+        scheduler.shutdown(wait=False)
+        logger.info("Scheduler stopped in this worker")
+
+
+def start_scheduler(app, socketio, run_now=False):
+    """
+    Schedule the periodic jobs in this worker.
+
+    Args:
+        app: Flask app
+        socketio: SocketIO instance (updates go out through realtime_hub)
+        run_now: Run the first collection immediately instead of after one
+                 interval (taking over from a failed leader mid-tick)
+    """
     scheduler = BackgroundScheduler(timezone="UTC")
     
     def monitor_hive():
@@ -52,7 +146,7 @@ def start_scheduler(app, socketio):
             
             if any(hive_data.values()):  # Only emit if we got some data
                 logger.info(f"Emitting hive data update: {hive_data}")
-                socketio.emit("hive_update", hive_data)
+                realtime_hub.publish("hive_update", hive_data)
             else:
                 logger.warning("No hive data received from Adafruit IO")
                 
@@ -61,6 +155,10 @@ def start_scheduler(app, socketio):
     
     def synchronized_collection_job():
         """Function to collect synchronized weather and sensor data"""
+        # Fence: a worker whose lease ran out must not collect alongside the new leader
+        if not leader_election.is_leader:
+            logger.warning("Skipping synchronized collection: not the scheduler leader")
+            return
         with app.app_context():
             try:
                 logger.info("Starting synchronized data collection...")
@@ -70,7 +168,7 @@ def start_scheduler(app, socketio):
                     logger.info(f"Synchronized data collection completed successfully")
                     logger.info(f"Collected {len(result['sensor_data'])} sensor readings")
                     
-                    # Emit real-time update with synchronized data
+                    # Emit real-time update with synchronized data (to the hive's subscribers)
                     synchronized_update = {
                         "hive_id": result['hive_id'],
                         "timestamp": result['collection_timestamp'],
@@ -78,7 +176,7 @@ def start_scheduler(app, socketio):
                         "sensors": result['sensor_data'],
                         "api_usage": result['api_usage']
                     }
-                    socketio.emit("synchronized_update", synchronized_update)
+                    realtime_hub.publish("synchronized_update", synchronized_update)
                     
                     # Process real-time threat detection
                     threat_result = real_time_threat_detection_service.process_latest_data(1)
@@ -86,16 +184,20 @@ def start_scheduler(app, socketio):
                     if threat_result.get('success'):
                         logger.info(f"Threat detection completed: {threat_result['prediction']['threat_type']}")
                         
-                        # Emit threat detection update
+                        # Emit threat detection update (recommendation text only travels with threat_alert)
+                        alert_data = threat_result['alert_data']
                         threat_update = {
                             "hive_id": threat_result['hive_id'],
                             "timestamp": threat_result['timestamp'],
                             "prediction": threat_result['prediction'],
                             "threat_trend": threat_result['threat_trend'],
                             "alert_generated": threat_result['alert_generated'],
-                            "alert_data": threat_result['alert_data']
+                            "alert_data": {
+                                key: value for key, value in alert_data.items()
+                                if key not in ("recommendations", "used_features")
+                            } if alert_data else alert_data
                         }
-                        socketio.emit("threat_detection_update", threat_update)
+                        realtime_hub.publish("threat_detection_update", threat_update)
                         
                         # If alert was generated, emit alert notification
                         if threat_result['alert_generated'] and threat_result['alert_data']:
@@ -107,7 +209,7 @@ def start_scheduler(app, socketio):
                                 "timestamp": threat_result['timestamp'],
                                 "alert_data": threat_result['alert_data']
                             }
-                            socketio.emit("threat_alert", alert_notification)
+                            realtime_hub.publish("threat_alert", alert_notification)
                             logger.warning(f"🚨 THREAT ALERT EMITTED: {threat_result['prediction']['threat_type']}")
                     
                 else:
@@ -142,7 +244,8 @@ def start_scheduler(app, socketio):
                 logger.error(f"Error in legacy scheduled job: {str(e)}")
 
     # NEW: Schedule synchronized collection every 1 minute
-    scheduler.add_job(synchronized_collection_job, 'interval', minutes=1)
+    first_run = {"next_run_time": datetime.now(timezone.utc)} if run_now else {}
+    scheduler.add_job(synchronized_collection_job, 'interval', minutes=1, **first_run)
     
     # LEGACY: Keep old schedulers for backward compatibility (can be removed later)
     # scheduler.add_job(scheduled_job, 'interval', seconds=30)
@@ -150,7 +253,10 @@ def start_scheduler(app, socketio):
     
     logger.info("Starting scheduler with 1-minute synchronized collection intervals")
 
-    
+    # A new leader continues from the stored readings the previous one collected
+    if run_now:
+        _rebuild_threat_features(app)
+
     scheduler.start()
     
     # Store the scheduler in app config for reference
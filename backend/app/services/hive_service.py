@@ -1,7 +1,9 @@
 # app/services/hive_service.py
 
+from datetime import datetime, timedelta
 from app import db
 from app.models.hive import Hive
+from app.models.synchronized_data import SynchronizedData
 
 def get_all_hives():
     """Fetch all hives from the database."""
@@ -43,3 +45,67 @@ def delete_hive(hive_id):
     db.session.delete(hive)
     db.session.commit()
     return hive
+
+def _reading_time(prediction):
+    """Timestamp of the reading a snapshot prediction was made for (oldest if unknown)"""
+    try:
+        return datetime.fromisoformat(prediction.get('data_timestamp'))
+    except (TypeError, ValueError):
+        return datetime.min
+
+def get_hives_snapshot(alert_hours=24):
+    """
+    Build a dashboard snapshot for every hive with a fixed number of queries:
+    one for the hives, one window-function query for the latest readings,
+    one for the latest stored threat predictions and one GROUP BY aggregate
+    for recent alerts.
+    """
+    from app.ml_models.threat_detection.src.alert_store import count_alerts_by_hive
+    from app.models.threat_prediction import ThreatPrediction
+    from app.services.real_time_threat_detection_service import real_time_threat_detection_service
+
+    hives = get_all_hives()
+    latest_by_hive = SynchronizedData.get_latest_for_all_hives()
+    # Alert timestamps are stored in UTC
+    alert_counts = count_alerts_by_hive(since=datetime.utcnow() - timedelta(hours=alert_hours))
+    # Stored predictions survive restarts and are shared by every worker; this process's
+    # live result only wins when its reading is newer (other workers may have moved on)
+    latest_predictions = {
+        hive_id: {
+            'threat_type': prediction.threat_type,
+            'probability': prediction.probability,
+            'data_timestamp': prediction.collection_timestamp.isoformat(),
+            'predicted_at': prediction.predicted_at.isoformat() if prediction.predicted_at else None
+        }
+        for hive_id, prediction in ThreatPrediction.get_latest_for_all_hives().items()
+    }
+    for hive_id, live in real_time_threat_detection_service.latest_predictions.items():
+        stored = latest_predictions.get(hive_id)
+        if stored is None or _reading_time(live) > _reading_time(stored):
+            latest_predictions[hive_id] = live
+
+    snapshot = []
+    for hive in hives:
+        latest = latest_by_hive.get(hive.id)
+        reading = latest.to_dict() if latest else None
+        snapshot.append({
+            'hive': {
+                'id': hive.id,
+                'name': hive.name,
+                'location_lat': hive.location_lat,
+                'location_lng': hive.location_lng,
+                'created_at': hive.created_at.isoformat() if hive.created_at else None
+            },
+            'latest_reading': {
+                'collection_timestamp': reading['collection_timestamp'],
+                'sensors': reading['sensors'],
+                'threat_detection': reading['threat_detection'],
+                'data_quality_score': reading['metadata']['data_quality_score']
+            } if reading else None,
+            'weather': reading['weather'] if reading else None,
+            'latest_threat_prediction': latest_predictions.get(hive.id),
+            # All alerts raised in the last alert_hours, whatever their status
+            'recent_alert_count': alert_counts.get(hive.id, 0)
+        })
+
+    return snapshot
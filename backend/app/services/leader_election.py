@@ -0,0 +1,327 @@
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl  # POSIX only: serializes lease file updates between processes
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# ========== LEASE BACKENDS ==========
+class FileLeaseBackend:
+    """
+    Lease stored in a local JSON file: {"owner", "pid", "host", "acquired_at",
+    "heartbeat_at", "expires_at"}. Reads and writes happen under an flock, so
+    the processes of one machine agree on a single owner; the owner renews
+    the lease on every heartbeat and anyone may take it once it has expired.
+    """
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _update(self, change: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Read the lease record and write change(record) back (None = leave it), atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a+", encoding="utf-8") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                try:
+                    record = json.loads(handle.read() or "{}")
+                except ValueError:
+                    record = {}
+                updated = change(record)
+                if updated is not None:
+                    handle.seek(0)
+                    handle.truncate()
+                    handle.write(json.dumps(updated))
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                    record = updated
+                return record
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def try_acquire(self, owner: str, lease_seconds: float) -> bool:
+        """Take or renew the lease; False while another owner's lease is valid"""
+        def change(record):
+            now = time.time()
+            if record.get("owner") not in (None, owner) and record.get("expires_at", 0) > now:
+                return None
+            return {
+                "owner": owner,
+                "pid": os.getpid(),
+                "host": socket.gethostname(),
+                "acquired_at": record.get("acquired_at") if record.get("owner") == owner else now,
+                "heartbeat_at": now,
+                "expires_at": now + lease_seconds,
+            }
+        return self._update(change).get("owner") == owner
+
+    def release(self, owner: str):
+        """Expire our lease at once so a follower takes over on its next heartbeat"""
+        def change(record):
+            if record.get("owner") != owner:
+                return None
+            return dict(record, expires_at=0)
+        self._update(change)
+
+    def holder(self) -> Dict[str, Any]:
+        return self._update(lambda record: None)
+
+
+class MySQLLockBackend:
+    """
+    MySQL named lock (GET_LOCK) held on a dedicated connection. The server
+    releases it as soon as that connection closes, so a crashed leader is
+    replaced on the next follower heartbeat; the leader re-checks ownership
+    (IS_USED_LOCK = CONNECTION_ID()) on every heartbeat.
+    """
+    name = "mysql"
+
+    def __init__(self, database_url: str, lock_name: str):
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import NullPool
+
+        self.engine = create_engine(database_url, poolclass=NullPool)
+        self.lock_name = lock_name
+        self._conn = None
+        self._held = False
+
+    def _scalar(self, sql: str):
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(sql, (self.lock_name,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            cursor.close()
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+        self._held = False
+
+    def try_acquire(self, owner: str, lease_seconds: float) -> bool:
+        try:
+            if self._conn is None:
+                self._conn = self.engine.raw_connection()
+            if self._held:
+                self._held = bool(self._scalar("SELECT IS_USED_LOCK(%s) = CONNECTION_ID()"))
+            else:
+                self._held = self._scalar("SELECT GET_LOCK(%s, 0)") == 1
+            return self._held
+        except Exception as e:
+            logger.error(f"❌ Leader lock check failed: {e}")
+            self._close()
+            return False
+
+    def release(self, owner: str):
+        try:
+            if self._conn is not None and self._held:
+                self._scalar("SELECT RELEASE_LOCK(%s)")
+        except Exception:
+            pass
+        self._close()
+
+    def holder(self) -> Dict[str, Any]:
+        try:
+            with self.engine.connect() as conn:
+                from sqlalchemy import text
+                connection_id = conn.execute(text("SELECT IS_USED_LOCK(:name)"), {"name": self.lock_name}).scalar()
+            return {"lock_name": self.lock_name, "connection_id": connection_id}
+        except Exception as e:
+            return {"lock_name": self.lock_name, "error": str(e)}
+
+
+# ========== ELECTION ==========
+class LeaderElection:
+    """
+    Elects one process (across web workers) to run the scheduler.
+
+    Every process runs a heartbeat thread that tries to take or renew the
+    lease every heartbeat_seconds. The holder calls on_elected and keeps
+    renewing; a process that fails to renew calls on_demoted. A leader that
+    crashes or hangs is replaced once its lease expires (file) or its
+    connection drops (MySQL): at most lease_seconds + heartbeat_seconds,
+    well within one scheduler tick. is_leader also checks that the lease
+    has not run out locally, so jobs can use it as a fence.
+    """
+
+    def __init__(self, lease_seconds: float = 20, heartbeat_seconds: float = 5):
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.backend = None
+
+        self._pid: Optional[int] = None  # process that campaigns; a forked child starts over
+        self._leader = False
+        self._lease_expires_at = 0.0
+        self._on_elected: Optional[Callable[[bool], None]] = None
+        self._on_demoted: Optional[Callable[[], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.elections = 0
+        self.demotions = 0
+        self.heartbeats = 0
+        self.elected_at: Optional[float] = None
+
+    @property
+    def is_leader(self) -> bool:
+        """Leader with a lease that is still valid by this process's clock"""
+        # State inherited through fork belongs to the parent's campaign
+        return self._pid == os.getpid() and self._leader and time.time() < self._lease_expires_at
+
+    def init_app(self, app, on_elected: Callable[[bool], None], on_demoted: Callable[[], None]):
+        """
+        Start campaigning with the backend chosen by LEADER_ELECTION_BACKEND.
+
+        Args:
+            app: Flask app (configuration)
+            on_elected: Called with takeover=True when this process replaces
+                        a previous leader, False when it wins at startup
+            on_demoted: Called when this process loses the lease
+        """
+        self.lease_seconds = app.config.get("LEADER_LEASE_SECONDS", self.lease_seconds)
+        self.heartbeat_seconds = app.config.get("LEADER_HEARTBEAT_SECONDS", self.heartbeat_seconds)
+        backend = app.config.get("LEADER_ELECTION_BACKEND", "auto")
+        database_url = app.config.get("SQLALCHEMY_DATABASE_URI", "")
+        if backend == "auto":
+            backend = "mysql" if database_url.startswith("mysql") else "file"
+
+        self._reset_after_fork()
+        if backend == "none":
+            # Single-process deployments: always lead
+            self._pid, self._leader, self._lease_expires_at = os.getpid(), True, float("inf")
+            on_elected(False)
+            return
+        if backend == "mysql":
+            self.backend = MySQLLockBackend(database_url, app.config.get("LEADER_LOCK_NAME", "beehive_scheduler"))
+        else:
+            self.backend = FileLeaseBackend(app.config["LEADER_LOCK_FILE"])
+        self.start(on_elected, on_demoted)
+
+    def _reset_after_fork(self):
+        """Drop leadership state inherited from a parent process (threads do not survive fork)"""
+        if self._pid is None or self._pid == os.getpid():
+            return
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._leader = False
+        self._lease_expires_at = 0.0
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.elections = self.demotions = self.heartbeats = 0
+        self.elected_at = None
+        self._pid = None
+
+    def start(self, on_elected: Callable[[bool], None], on_demoted: Callable[[], None]):
+        self._reset_after_fork()
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._campaign, name="leader-election", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"🗳️ Campaigning for scheduler leadership as {self.owner} ({self.backend.name} lease)")
+
+    def _campaign(self):
+        attempts = 0
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                held = self.backend.try_acquire(self.owner, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"❌ Leader lease heartbeat failed: {e}")
+                held = False
+            self.heartbeats += 1
+
+            if held:
+                # The lease is only trusted from when we asked for it
+                self._lease_expires_at = started + self.lease_seconds
+                if not self._leader:
+                    self._become_leader(takeover=attempts > 0)
+            elif self._leader:
+                self._step_down("lease lost")
+            attempts += 1
+            self._stop.wait(self.heartbeat_seconds)
+
+    def _become_leader(self, takeover: bool):
+        with self._lock:
+            self._leader = True
+            self.elections += 1
+            self.elected_at = time.time()
+        logger.info(f"👑 {self.owner} elected scheduler leader{' (takeover)' if takeover else ''}")
+        try:
+            self._on_elected(takeover)
+        except Exception as e:
+            logger.error(f"❌ Starting leader duties failed, stepping down: {e}")
+            self._step_down("on_elected failed")
+            self.backend.release(self.owner)
+
+    def _step_down(self, reason: str):
+        with self._lock:
+            if not self._leader:
+                return
+            self._leader = False
+            self._lease_expires_at = 0.0
+            self.demotions += 1
+        logger.warning(f"⚠️ {self.owner} is no longer scheduler leader: {reason}")
+        try:
+            self._on_demoted()
+        except Exception as e:
+            logger.error(f"❌ Stopping leader duties failed: {e}")
+
+    def stop(self):
+        """Stop campaigning and hand the lease over (process shutdown)"""
+        if self._pid != os.getpid():
+            return  # atexit inherited through fork: the lease is the parent's
+        self._stop.set()
+        if self._leader:
+            self._step_down("shutting down")
+        if self.backend is not None:
+            self.backend.release(self.owner)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Leadership of this process and the current lease holder"""
+        return {
+            "owner": self.owner,
+            "is_leader": self.is_leader,
+            "backend": self.backend.name if self.backend is not None else "none",
+            "lease_seconds": self.lease_seconds,
+            "heartbeat_seconds": self.heartbeat_seconds,
+            "lease_remaining_seconds": round(max(0.0, self._lease_expires_at - time.time()), 2)
+            if self.is_leader and self._lease_expires_at != float("inf") else None,
+            "elections": self.elections,
+            "demotions": self.demotions,
+            "heartbeats": self.heartbeats,
+            "holder": self.backend.holder() if self.backend is not None else {"owner": self.owner},
+        }
+
+
+# Create singleton instance
+leader_election = LeaderElection()
@@ -1,6 +1,5 @@
 # app/services/ml_service.py
 
-import joblib
 import pandas as pd
 import os
 from app.services.potential_location_service import get_all_potential_locations, update_potential_location
@@ -9,8 +8,31 @@ from app.ml_models.src.feature_engineering import engineer_features
 # Load the model using a relative path (no app context needed)
 base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))  # Adjust levels: from services/ to backend/
 MODEL_PATH = os.path.join(base_dir, 'app', 'ml_models', 'random_forest_model.pkl')
-model = joblib.load(MODEL_PATH)
-expected_features = model.feature_names_in_
+# Flattened, memory-mapped copy of the same forest (python -m app.ml_models.compiled_trees)
+COMPILED_MODEL_DIR = os.path.join(base_dir, 'app', 'ml_models', 'random_forest_model_compiled')
+
+_model = None
+
+def get_model():
+    """Load the location model once (compiled arrays when available, else the pickle)"""
+    global _model
+    if _model is None:
+        from app.ml_models.compiled_trees import load_compiled, tree_backend, use_compiled
+        # No ONNX graph for the location model: TREE_MODEL_BACKEND=onnx serves it compiled
+        serve_compiled = use_compiled(COMPILED_MODEL_DIR) or (
+            tree_backend() == "onnx" and os.path.exists(os.path.join(COMPILED_MODEL_DIR, 'meta.json')))
+        if serve_compiled:
+            _model = load_compiled(COMPILED_MODEL_DIR)
+        else:
+            import joblib
+            _model = joblib.load(MODEL_PATH)
+    return _model
+
+def get_expected_features():
+    """Feature columns in model order"""
+    model = get_model()
+    features = getattr(model, 'feature_names_in_', None)
+    return list(features if features is not None else model.features)
 
 def predict_for_all_locations():
     """Fetch all locations, prepare DF, predict, and update honey_production in DB."""
@@ -34,13 +56,14 @@ def predict_for_all_locations():
     df = engineer_features(df)  # Apply engineering (e.g., adds dist_to_resource)
 
     # Handle missing features
+    expected_features = get_expected_features()
     for col in expected_features:
         if col not in df.columns:
             df[col] = 0
     df = df[expected_features]
 
     # Predict
-    predictions = model.predict(df)
+    predictions = get_model().predict(df)
 
     # Update DB
     updated_count = 0
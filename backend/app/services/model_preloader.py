@@ -0,0 +1,153 @@
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (peak RSS where /proc is unavailable, 0 on Windows)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        # Windows: no resource module
+        return 0.0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KB on Linux
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+def mapped_mb(model: Any) -> float:
+    """Size of the files memory-mapped by a compiled model (0 for pickled models)"""
+    import numpy as np
+
+    attributes = vars(model).values() if hasattr(model, "__dict__") else ()
+    # Views of a memmap keep its filename; count every file once
+    files = {value.filename for value in attributes if isinstance(value, np.memmap) and value.filename}
+    return sum(os.path.getsize(path) for path in files) / (1024 * 1024)
+
+
+# ========== MODEL LOADERS ==========
+def _load_threat_model():
+    from app.ml_models.threat_detection.src.prediction_service_threat import preload
+
+    backend, model = preload()
+    return model, backend
+
+
+def _load_performance_model():
+    from app.services.performance_prediction_service import get_served_model
+
+    served = get_served_model()
+    return served.model[0], served.backend
+
+
+def _load_location_model():
+    from app.ml_models.compiled_trees import CompiledTreeEnsemble
+    from app.services.ml_service import get_model
+
+    model = get_model()
+    return model, "compiled" if isinstance(model, CompiledTreeEnsemble) else "native"
+
+
+class ModelPreloader:
+    """
+    Loads every ML model once per process and reports the cost.
+
+    Call preload() before the server forks workers (e.g. gunicorn --preload):
+    compiled models are read-only memory maps shared through the page cache,
+    and pickled models are inherited copy-on-write. gc.freeze() afterwards
+    keeps the garbage collector from touching (and un-sharing) those pages.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], tuple]] = {}
+        self._report: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.preloaded_at = None
+
+    def register(self, name: str, loader: Callable[[], tuple]):
+        """Register a loader returning (model, backend); loaders must cache their model"""
+        self._loaders[name] = loader
+
+    def load(self, name: str) -> Dict[str, Any]:
+        """Load one model and record its load time and RSS growth"""
+        with self._lock:
+            rss_before = current_rss_mb()
+            start = time.perf_counter()
+            try:
+                model, backend = self._loaders[name]()
+                entry = {
+                    "model": name,
+                    "backend": backend,
+                    "load_seconds": round(time.perf_counter() - start, 3),
+                    "rss_delta_mb": round(current_rss_mb() - rss_before, 1),
+                    "mapped_mb": round(mapped_mb(model), 1),
+                    "loaded": True
+                }
+            except Exception as e:
+                logger.error(f"Failed to preload model '{name}': {str(e)}")
+                entry = {
+                    "model": name,
+                    "load_seconds": round(time.perf_counter() - start, 3),
+                    "loaded": False,
+                    "error": str(e)
+                }
+            self._report[name] = entry
+            return entry
+
+    def preload(self, names: Optional[List[str]] = None, freeze: bool = True) -> List[Dict[str, Any]]:
+        """
+        Load all (or the named) models and log a per-model report
+
+        Args:
+            names: Models to load (default: all registered)
+            freeze: Move loaded objects to the permanent GC generation
+
+        Returns:
+            List of per-model report entries
+        """
+        start_rss = current_rss_mb()
+        report = [self.load(name) for name in (names or list(self._loaders))]
+
+        if freeze and hasattr(gc, "freeze"):
+            gc.collect()
+            gc.freeze()
+
+        self.preloaded_at = time.time()
+        logger.info(f"🧠 Preloaded {sum(e['loaded'] for e in report)}/{len(report)} models "
+                    f"(RSS {start_rss:.0f} -> {current_rss_mb():.0f} MB)")
+        for entry in report:
+            if entry["loaded"]:
+                logger.info(f"   {entry['model']:<12} {entry['backend']:<9} {entry['load_seconds']:>6.2f}s  "
+                            f"+{entry['rss_delta_mb']:.1f} MB RSS  {entry['mapped_mb']:.1f} MB mapped")
+            else:
+                logger.info(f"   {entry['model']:<12} failed: {entry['error']}")
+        return report
+
+    def get_report(self) -> Dict[str, Any]:
+        """Load report for every model loaded so far"""
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "rss_mb": round(current_rss_mb(), 1),
+                "preloaded_at": self.preloaded_at,
+                "models": list(self._report.values())
+            }
+
+
+# Create singleton instance
+model_preloader = ModelPreloader()
+model_preloader.register("threat", _load_threat_model)
+model_preloader.register("performance", _load_performance_model)
+model_preloader.register("location", _load_location_model)
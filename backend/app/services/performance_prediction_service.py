@@ -12,83 +12,111 @@ MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'ml_models', 'performa
 MODEL_PATH = os.path.join(MODEL_DIR, 'performance_model.pkl')
 SCALER_PATH = os.path.join(MODEL_DIR, 'scaler.pkl')
 META_PATH = os.path.join(MODEL_DIR, 'performance_model_meta.json')
+# Flattened forest + folded scaler (python -m app.ml_models.compiled_trees)
+COMPILED_MODEL_DIR = os.path.join(MODEL_DIR, 'performance_model_compiled')
+# Scaler + forest ONNX graph (python -m app.ml_models.onnx_models)
+ONNX_MODEL_PATH = os.path.join(MODEL_DIR, 'performance_model.onnx')
 
-# Cache loaded models (avoid reloading on every request)
-_model_cache = None
-_scaler_cache = None
-_metadata_cache = None
-_cache_lock = None
+REGISTRY_NAME = 'performance'
 
-def get_cached_model():
-    """Load and cache model artifacts (lazy loaded)"""
-    global _model_cache, _scaler_cache, _metadata_cache, _cache_lock
+# ========== MODEL REGISTRY ==========
+def _load_performance_model():
+    """
+    Registry loader -> ((model, scaler, metadata), version, backend).
+    TREE_MODEL_BACKEND=onnx serves the ONNX graph; otherwise compiled arrays
+    are used when exported from the current model files.
+    """
+    from app.ml_models.compiled_trees import (
+        PERFORMANCE_SOURCE_FILES, compiled_is_current, load_compiled, tree_backend, use_compiled
+    )
+    from app.ml_models.model_registry import content_version
+    from app.ml_models.onnx_models import load_onnx, onnx_is_current, use_onnx
     
-    # Quick return if already loaded
-    if _model_cache is not None and _scaler_cache is not None and _metadata_cache is not None:
-        logger.info("Using cached model artifacts")
-        return _model_cache, _scaler_cache, _metadata_cache
+    # Check if files exist
+    if not os.path.exists(MODEL_PATH):
+        raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
+    if not os.path.exists(SCALER_PATH):
+        raise FileNotFoundError(f"Scaler file not found: {SCALER_PATH}")
+    if not os.path.exists(META_PATH):
+        raise FileNotFoundError(f"Metadata file not found: {META_PATH}")
     
-    # Initialize lock if needed
-    import threading
-    if _cache_lock is None:
-        _cache_lock = threading.Lock()
+    version = content_version(PERFORMANCE_SOURCE_FILES)
+    with open(META_PATH, 'r') as f:
+        metadata = json.load(f)
     
-    # Thread-safe loading
-    with _cache_lock:
-        # Double-check after acquiring lock
-        if _model_cache is not None and _scaler_cache is not None and _metadata_cache is not None:
-            logger.info("Using cached model artifacts (after lock)")
-            return _model_cache, _scaler_cache, _metadata_cache
-        
-        # Import joblib only when needed (lazy loading)
-        import joblib
-        
-        logger.info("Loading model artifacts (first time)...")
-        
-        # Check if files exist
-        if not os.path.exists(MODEL_PATH):
-            raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
-        if not os.path.exists(SCALER_PATH):
-            raise FileNotFoundError(f"Scaler file not found: {SCALER_PATH}")
-        if not os.path.exists(META_PATH):
-            raise FileNotFoundError(f"Metadata file not found: {META_PATH}")
-        
-        try:
-            logger.info(f"Loading model from: {MODEL_PATH}")
-            _model_cache = joblib.load(MODEL_PATH)
-            logger.info("Model loaded successfully")
-            
-            # ALWAYS set n_jobs to 1 to avoid multiprocessing hangs in Flask
-            # This is critical - the default n_jobs=-1 causes the model to hang
-            if hasattr(_model_cache, 'set_params'):
-                original_n_jobs = getattr(_model_cache, 'n_jobs', None)
-                _model_cache.set_params(n_jobs=1)
-                logger.info(f"✅ Set model n_jobs from {original_n_jobs} to 1 to avoid threading issues")
-            else:
-                logger.warning("Model does not support set_params - may still have threading issues")
-            
-        except Exception as e:
-            logger.error(f"Error loading model: {str(e)}")
-            raise
-        
-        try:
-            logger.info(f"Loading scaler from: {SCALER_PATH}")
-            _scaler_cache = joblib.load(SCALER_PATH)
-            logger.info("Scaler loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading scaler: {str(e)}")
-            raise
-        
-        try:
-            logger.info(f"Loading metadata from: {META_PATH}")
-            with open(META_PATH, 'r') as f:
-                _metadata_cache = json.load(f)
-            logger.info("Metadata loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading metadata: {str(e)}")
-            raise
+    if use_onnx(ONNX_MODEL_PATH):
+        # onnxruntime session; the MinMaxScaler is part of the graph, so transform() only casts
+        model = load_onnx(ONNX_MODEL_PATH)
+        if not onnx_is_current(model, version):
+            raise ValueError(f"ONNX performance model is stale for {version}; re-run onnx_models")
+        logger.info(f"✅ Loaded ONNX performance model {version} from {ONNX_MODEL_PATH}")
+        return (model, model, metadata), version, 'onnx'
+    
+    if use_compiled(COMPILED_MODEL_DIR):
+        if compiled_is_current(COMPILED_MODEL_DIR, version):
+            # NumPy-only evaluator; it also applies the folded MinMaxScaler via transform()
+            model = load_compiled(COMPILED_MODEL_DIR)
+            logger.info(f"✅ Loaded compiled performance model {version} from {COMPILED_MODEL_DIR}")
+            return (model, model, metadata), version, 'compiled'
+        if tree_backend() == 'compiled':
+            raise ValueError(f"Compiled performance model is stale for {version}; re-run compiled_trees")
+        logger.warning(f"⚠️ Compiled performance model is stale for {version}; serving the joblib model")
     
-    return _model_cache, _scaler_cache, _metadata_cache
+    # Import joblib only when needed (lazy loading)
+    import joblib
+    
+    logger.info(f"Loading model from: {MODEL_PATH}")
+    model = joblib.load(MODEL_PATH)
+    
+    # ALWAYS set n_jobs to 1 to avoid multiprocessing hangs in Flask
+    # This is critical - the default n_jobs=-1 causes the model to hang
+    if hasattr(model, 'set_params'):
+        original_n_jobs = getattr(model, 'n_jobs', None)
+        model.set_params(n_jobs=1)
+        logger.info(f"✅ Set model n_jobs from {original_n_jobs} to 1 to avoid threading issues")
+    else:
+        logger.warning("Model does not support set_params - may still have threading issues")
+    
+    logger.info(f"Loading scaler from: {SCALER_PATH}")
+    scaler = joblib.load(SCALER_PATH)
+    return (model, scaler, metadata), version, 'native'
+
+def _validate_performance_model(artifacts):
+    """Smoke batch: scaled random weekly features must give finite probabilities summing to 1"""
+    import numpy as np
+    import pandas as pd
+    
+    model, scaler, metadata = artifacts
+    feature_cols = metadata['feature_columns']
+    X = pd.DataFrame(np.random.default_rng(0).uniform(0, 100, (16, len(feature_cols))), columns=feature_cols)
+    proba = np.asarray(model.predict_proba(scaler.transform(X)))
+    if proba.ndim != 2 or len(proba) != len(X):
+        raise ValueError(f"Smoke batch returned shape {proba.shape}")
+    if not np.isfinite(proba).all() or not np.allclose(proba.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("Smoke batch returned invalid probabilities")
+    return {'rows': len(X), 'classes': int(proba.shape[1])}
+
+def _register_model():
+    from app.ml_models.compiled_trees import PERFORMANCE_SOURCE_FILES
+    from app.ml_models.model_registry import model_registry
+    
+    model_registry.register(
+        REGISTRY_NAME,
+        loader=_load_performance_model,
+        watch_paths=PERFORMANCE_SOURCE_FILES + [os.path.join(COMPILED_MODEL_DIR, 'meta.json'), ONNX_MODEL_PATH],
+        validate=_validate_performance_model
+    )
+    return model_registry
+
+_registry = _register_model()
+
+def get_served_model():
+    """Active registry entry (LoadedModel) whose .model is (model, scaler, metadata)"""
+    return _registry.get(REGISTRY_NAME)
+
+def get_cached_model():
+    """(model, scaler, metadata) of the active model version"""
+    return get_served_model().model
 
 def predict_latest_performance(hive_id=1):
     """
@@ -308,7 +336,9 @@ def predict_latest_performance(hive_id=1):
         logger.info("Loading model artifacts...")
         
         try:
-            model, scaler, metadata = get_cached_model()
+            # One registry read: model, scaler and version stay consistent across a hot-reload
+            served = get_served_model()
+            model, scaler, metadata = served.model
             model_time = time.time() - model_start_time
             logger.info(f"Model artifacts loaded in {model_time:.2f}s")
             
@@ -380,7 +410,8 @@ def predict_latest_performance(hive_id=1):
             'all_probabilities': {
                 f'Level_{i+1}': float(prob) for i, prob in enumerate(probabilities)
             },
-            'data_points_used': len(records)
+            'data_points_used': len(records),
+            'model_version': served.version
         }
         
         # Risk assessment
@@ -4,10 +4,13 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from app import db
 from app.models.synchronized_data import SynchronizedData
+from app.models.threat_prediction import ThreatPrediction
 from app.services.threat_detection_service import threat_detection_service
-from app.ml_models.threat_detection.src.alert_store import add_alert, load_alerts
+from app.ml_models.threat_detection.src.alert_store import query_alerts
+from app.ml_models.threat_detection.src.alert_suppression import alert_suppression
 from app.ml_models.threat_detection.src.recommendation_service import get_recommendations
 from app.ml_models.threat_detection.src.prediction_service_threat import predict_threat
+from app.utils.response_cache import response_cache
 import numpy as np
 from collections import deque
 import threading
@@ -34,15 +37,9 @@ class RealTimeThreatDetectionService:
         self.monitoring_active = False
         self.last_prediction_time = None
         self.prediction_history = deque(maxlen=100)  # Keep last 100 predictions
+        self.latest_predictions = {}  # Most recent prediction per hive (for snapshots)
         
-        # Alert cooldown to prevent spam
-        self.alert_cooldowns = {
-            'Environmental': 300,  # 5 minutes
-            'Predator': 180,       # 3 minutes
-            'Wax_Moth': 240,      # 4 minutes
-            'No_Threat': 600      # 10 minutes
-        }
-        self.last_alert_times = {}
+        # Cooldowns and rate limits per hive/threat live in alert_suppression (shared by workers)
         
         # Performance metrics
         self.prediction_count = 0
@@ -144,6 +141,13 @@ class RealTimeThreatDetectionService:
                 "hive_id": hive_id
             })
             
+            self.latest_predictions[hive_id] = {
+                "threat_type": threat_type,
+                "probability": probability,
+                "data_timestamp": latest_data.collection_timestamp.isoformat() if latest_data.collection_timestamp else None,
+                "predicted_at": datetime.now().isoformat()
+            }
+            
             self.prediction_count += 1
             self.last_prediction_time = datetime.now()
             
@@ -153,8 +157,12 @@ class RealTimeThreatDetectionService:
             
             if self._should_generate_alert(threat_type, probability):
                 alert_data = self._generate_alert(latest_data, prediction_result)
-                alert_generated = True
-                self.alert_count += 1
+                # A reading is alerted once: polling the same latest row returns the stored alert;
+                # repeats within the cooldown/rate limit are aggregated into the previous alert
+                alert_generated = alert_data is not None and not (
+                    alert_data.get("deduplicated") or alert_data.get("suppressed"))
+                if alert_generated:
+                    self.alert_count += 1
             
             # Calculate threat trend
             threat_trend = self._calculate_threat_trend()
@@ -195,40 +203,38 @@ class RealTimeThreatDetectionService:
             Dict containing processing results
         """
         try:
-            # Get historical predictions
-            predictions = threat_detection_service.predict_threat_for_historical_data(hive_id, hours)
+            # Score only rows without a current-model prediction, then aggregate in SQL
+            threat_detection_service.ensure_predictions(hive_id, hours)
+            model_version = threat_detection_service.get_model_version()
+            
+            threat_analysis = self._analyze_threat_patterns(hive_id, hours, model_version)
             
-            if not predictions:
+            if "error" in threat_analysis:
                 return {
                     "success": False,
                     "error": f"No historical predictions available for hive {hive_id}"
                 }
             
-            # Analyze threat patterns
-            threat_analysis = self._analyze_threat_patterns(predictions)
-            
             # Generate historical alerts for high-probability threats
             historical_alerts = []
-            for pred in predictions:
-                if pred.get("success") and pred["prediction"].get("probability", 0) > 0.8:
-                    threat_type = pred["prediction"]["threat_type"]
-                    if threat_type != "No_Threat":
-                        alert_data = self._generate_historical_alert(pred)
-                        if alert_data:
-                            historical_alerts.append(alert_data)
+            high_probability = ThreatPrediction.get_high_probability(hive_id, hours, 0.8, model_version=model_version)
+            for prediction, record in high_probability:
+                alert_data = self._generate_historical_alert(self._stored_prediction_result(prediction, record))
+                if alert_data:
+                    historical_alerts.append(alert_data)
             
             result = {
                 "success": True,
                 "timestamp": datetime.now().isoformat(),
                 "hive_id": hive_id,
                 "hours_analyzed": hours,
-                "total_predictions": len(predictions),
+                "total_predictions": threat_analysis["total_predictions"],
                 "threat_analysis": threat_analysis,
                 "historical_alerts": historical_alerts,
                 "alert_count": len(historical_alerts)
             }
             
-            logger.info(f"Processed {len(predictions)} historical predictions for hive {hive_id}")
+            logger.info(f"Processed {threat_analysis['total_predictions']} historical predictions for hive {hive_id}")
             
             return result
             
@@ -239,6 +245,27 @@ class RealTimeThreatDetectionService:
                 "error": f"Historical processing failed: {str(e)}"
             }
     
+    def _stored_prediction_result(self, prediction: ThreatPrediction,
+                                  record: Optional[SynchronizedData]) -> Dict[str, Any]:
+        """Shape a stored prediction (and its reading) like predict_threat_from_synchronized_data output"""
+        return {
+            "success": True,
+            "prediction": {
+                "threat_type": prediction.threat_type,
+                "probability": prediction.probability
+            },
+            "data_source": {
+                "hive_id": prediction.hive_id,
+                "synchronized_data_id": prediction.synchronized_data_id,
+                "timestamp": prediction.collection_timestamp.isoformat()
+            },
+            "generated_fields": {
+                "sound_peak_freq": record.sensor_sound_peak_freq if record else None,
+                "vibration_hz": record.sensor_vibration_hz if record else None,
+                "vibration_var": record.sensor_vibration_var if record else None
+            }
+        }
+    
     def get_threat_dashboard_data(self, hive_id: int = 1, hours: int = 24) -> Dict[str, Any]:
         """
         Get comprehensive threat detection data for dashboard
@@ -250,12 +277,26 @@ class RealTimeThreatDetectionService:
         Returns:
             Dict containing dashboard data
         """
+        key = response_cache.make_key("threat_dashboard", hive_id, hours)
+        return response_cache.get_or_compute(
+            key,
+            lambda: self._build_threat_dashboard_data(hive_id, hours),
+            hive_id=hive_id,
+            should_cache=lambda result: result.get("success", False)
+        )
+    
+    def _build_threat_dashboard_data(self, hive_id: int, hours: int) -> Dict[str, Any]:
+        """Compute dashboard data (uncached)"""
         try:
             # Get threat statistics
             stats = threat_detection_service.get_threat_statistics(hive_id, hours)
             
-            # Get recent alerts
-            recent_alerts = load_alerts()
+            # Get recent alerts for this hive
+            recent_alerts = query_alerts(
+                since=datetime.utcnow() - timedelta(hours=hours),
+                hive_id=hive_id,
+                limit=10
+            )
             
             # Get prediction history
             recent_predictions = list(self.prediction_history)[-20:]  # Last 20 predictions
@@ -307,19 +348,7 @@ class RealTimeThreatDetectionService:
             return False
         
         threshold = self.alert_thresholds.get(threat_type, 0.7)
-        if probability < threshold:
-            return False
-        
-        # Check cooldown period
-        now = datetime.now()
-        last_alert_time = self.last_alert_times.get(threat_type)
-        
-        if last_alert_time:
-            cooldown_seconds = self.alert_cooldowns.get(threat_type, 300)
-            if (now - last_alert_time).total_seconds() < cooldown_seconds:
-                return False
-        
-        return True
+        return probability >= threshold
     
     def _generate_alert(self, data: SynchronizedData, prediction_result: Dict) -> Optional[Dict]:
         """Generate an alert for a threat detection"""
@@ -342,16 +371,24 @@ class RealTimeThreatDetectionService:
                 "timestamp": data.collection_timestamp.isoformat()
             }
             
-            # Add alert to store
-            alert_data = add_alert(
+            # Cooldown / rate limit per hive and threat type, then store the alert
+            decision, alert_data = alert_suppression.raise_alert(
                 threat_type=threat_type,
                 probability=probability,
                 used_features=used_features,
-                recommendations=recommendations
+                recommendations=recommendations,
+                hive_id=data.hive_id,
+                reading_id=data.id,
+                detected_at=data.collection_timestamp
             )
-            
-            # Update last alert time
-            self.last_alert_times[threat_type] = datetime.now()
+            if decision["action"] == "duplicate":
+                return dict(alert_data, deduplicated=True) if alert_data else dict(decision, deduplicated=True)
+            if decision["action"] == "suppress":
+                logger.info(f"🔕 {threat_type} alert suppressed for hive {data.hive_id} ({decision['reason']}, "
+                            f"{decision['occurrences']} occurrences)")
+                return dict(decision, suppressed=True)
+            if alert_data.get("deduplicated"):
+                return alert_data
             
             logger.warning(f"🚨 THREAT ALERT: {threat_type} detected with {probability:.3f} probability")
             
@@ -362,11 +399,16 @@ class RealTimeThreatDetectionService:
             return None
     
     def _generate_historical_alert(self, prediction_result: Dict) -> Optional[Dict]:
-        """Generate alert for historical high-probability threat"""
+        """
+        Alert for a historical high-probability threat, decided by the same
+        suppression engine as live readings (at the reading's time); None
+        when it was suppressed or its reading was already decided without one
+        """
         try:
             prediction = prediction_result["prediction"]
             threat_type = prediction["threat_type"]
             probability = prediction.get("probability", 0.0)
+            data_source = prediction_result.get("data_source", {})
             
             # Get recommendations
             recommendations = get_recommendations(threat_type)
@@ -374,13 +416,17 @@ class RealTimeThreatDetectionService:
             # Prepare used features
             used_features = prediction_result.get("generated_fields", {})
             
-            # Add alert to store
-            alert_data = add_alert(
+            decision, alert_data = alert_suppression.raise_alert(
                 threat_type=threat_type,
                 probability=probability,
                 used_features=used_features,
-                recommendations=recommendations
+                recommendations=recommendations,
+                hive_id=data_source.get("hive_id"),
+                reading_id=data_source.get("synchronized_data_id"),
+                detected_at=data_source.get("timestamp")
             )
+            if decision["action"] == "duplicate" and alert_data:
+                return dict(alert_data, deduplicated=True)
             
             return alert_data
             
@@ -436,60 +482,34 @@ class RealTimeThreatDetectionService:
             "prediction_count": len(recent_predictions)
         }
     
-    def _analyze_threat_patterns(self, predictions: List[Dict]) -> Dict[str, Any]:
-        """Analyze threat patterns from historical predictions"""
-        if not predictions:
-            return {"error": "No predictions to analyze"}
-        
-        successful_predictions = [p for p in predictions if p.get("success")]
+    def _analyze_threat_patterns(self, hive_id: int, hours: int, model_version: str = None) -> Dict[str, Any]:
+        """Analyze threat patterns from stored predictions (SQL aggregates)"""
+        stats = ThreatPrediction.get_window_statistics(hive_id, hours, model_version=model_version)
+        total = stats["total_predictions"]
         
-        if not successful_predictions:
-            return {"error": "No successful predictions to analyze"}
-        
-        # Extract threat types and probabilities
-        threat_types = [p["prediction"]["threat_type"] for p in successful_predictions]
-        probabilities = [p["prediction"].get("probability", 0) for p in successful_predictions]
-        
-        # Calculate statistics
-        threat_counts = {}
-        for threat_type in threat_types:
-            threat_counts[threat_type] = threat_counts.get(threat_type, 0) + 1
+        if not total:
+            return {"error": "No predictions to analyze"}
         
-        avg_probability = np.mean(probabilities)
-        max_probability = np.max(probabilities)
-        min_probability = np.min(probabilities)
+        threat_counts = stats["threat_type_counts"]
         
         # Find most common threat
         most_common_threat = max(threat_counts.items(), key=lambda x: x[1]) if threat_counts else ("No_Threat", 0)
         
-        # Calculate threat intensity over time
-        time_windows = []
-        window_size = max(1, len(successful_predictions) // 5)  # 5 time windows
-        
-        for i in range(0, len(successful_predictions), window_size):
-            window_predictions = successful_predictions[i:i+window_size]
-            window_threats = [p["prediction"]["threat_type"] for p in window_predictions]
-            window_probs = [p["prediction"].get("probability", 0) for p in window_predictions]
-            
-            time_windows.append({
-                "window": i // window_size + 1,
-                "threat_types": window_threats,
-                "avg_probability": np.mean(window_probs),
-                "max_probability": np.max(window_probs)
-            })
+        # Threat intensity over 5 equal time windows
+        time_windows = ThreatPrediction.get_time_windows(hive_id, hours, windows=5, model_version=model_version)
         
         return {
-            "total_predictions": len(successful_predictions),
+            "total_predictions": total,
             "threat_distribution": threat_counts,
             "most_common_threat": {
                 "type": most_common_threat[0],
                 "count": most_common_threat[1],
-                "percentage": (most_common_threat[1] / len(successful_predictions)) * 100
+                "percentage": (most_common_threat[1] / total) * 100
             },
             "probability_stats": {
-                "average": round(avg_probability, 3),
-                "maximum": round(max_probability, 3),
-                "minimum": round(min_probability, 3)
+                "average": round(stats["average_probability"], 3),
+                "maximum": round(stats["max_probability"], 3),
+                "minimum": round(stats["min_probability"], 3)
             },
             "time_analysis": time_windows
         }
@@ -547,29 +567,24 @@ class RealTimeThreatDetectionService:
     def _get_data_quality_info(self, hive_id: int, hours: int) -> Dict[str, Any]:
         """Get data quality information"""
         try:
-            historical_data = SynchronizedData.get_historical_data(hive_id, hours)
+            quality = SynchronizedData.get_data_quality_statistics(hive_id, hours)
             
-            if not historical_data:
+            total_records = quality["total_records"]
+            if not total_records:
                 return {"error": "No data available"}
             
-            total_records = len(historical_data)
-            records_with_threat_fields = len([
-                record for record in historical_data 
-                if self._has_threat_detection_fields(record)
-            ])
-            
-            quality_scores = [record.get_data_quality_score() for record in historical_data]
-            avg_quality_score = np.mean(quality_scores) if quality_scores else 0
+            records_with_threat_fields = quality["records_with_threat_fields"]
             
             return {
                 "total_records": total_records,
                 "records_with_threat_fields": records_with_threat_fields,
                 "threat_fields_completion_rate": (records_with_threat_fields / total_records * 100) if total_records > 0 else 0,
-                "average_quality_score": round(avg_quality_score, 2),
+                "average_quality_score": quality["average_quality_score"],
                 "quality_score_range": {
-                    "min": round(min(quality_scores), 2) if quality_scores else 0,
-                    "max": round(max(quality_scores), 2) if quality_scores else 0
-                }
+                    "min": quality["min_quality_score"],
+                    "max": quality["max_quality_score"]
+                },
+                "quality_distribution": quality["quality_distribution"]
             }
             
         except Exception as e:
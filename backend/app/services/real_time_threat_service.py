@@ -1,10 +1,15 @@
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List, Any
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Readings whose alert decision is remembered, so polling them again costs no DB work
+MAX_DECIDED_READINGS = 4096
+
 class RealTimeThreatService:
     """
     Service to perform real-time threat detection on synchronized hive data
@@ -14,11 +19,17 @@ class RealTimeThreatService:
         self.last_analysis_time = None
         self.threat_history = []  # Store recent threats for trend analysis
         self.max_history_size = 100
+        # (reading_id, threat_type) -> (suppression decision, alert or None)
+        self._decided: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._decided_lock = threading.Lock()
         
     def analyze_synchronized_data(self, sync_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Analyze synchronized data point and detect threats
         
+        Stored readings should go through analyze_reading() instead, which reuses
+        cached predictions and stores at most one alert per reading.
+        
         Args:
             sync_data: Dictionary from SynchronizedData.to_dict() or dummy data
             
@@ -28,8 +39,7 @@ class RealTimeThreatService:
         try:
             # Import here to avoid circular dependencies
             from app.ml_models.threat_detection.src.prediction_service_threat import predict_threat
-            from app.ml_models.threat_detection.src.recommendation_service import get_recommendations
-            from app.ml_models.threat_detection.src.alert_store import add_alert
+            from app.services.threat_feature_state import threat_feature_state
             
             # Extract sensor and weather data
             if not sync_data:
@@ -43,64 +53,156 @@ class RealTimeThreatService:
                 logger.warning("Could not build prediction payload - missing critical data")
                 return None
             
+            # Add the hive's streaming rolling features
+            payload = threat_feature_state.enrich_payload(sync_data.get("hive_id"), payload)
+            
             # Get threat prediction
             prediction = predict_threat(payload)
             
-            threat_type = prediction["threat_type"]
-            probability = prediction["probability"]
-            used_features = prediction["used_features"]
+            return self._analysis_result(
+                prediction, sync_data.get("hive_id"), sync_data.get("collection_timestamp")
+            )
             
-            logger.info(f"Threat Detection: {threat_type} (probability: {probability:.3f})")
+        except Exception as e:
+            logger.error(f"Error analyzing synchronized data: {str(e)}")
+            return None
+    
+    def analyze_reading(self, record) -> Optional[Dict[str, Any]]:
+        """
+        Analyze a stored SynchronizedData row
+        
+        The prediction comes from threat_detection_service (memoized per row and
+        model version) and the alert is idempotent per row, so polling the same
+        latest reading costs neither model nor alert writes.
+        
+        Args:
+            record: SynchronizedData instance
             
-            # Determine severity based on threat type and probability
-            severity = self._calculate_severity(threat_type, probability)
+        Returns:
+            Dict containing threat analysis results or None if no analysis performed
+        """
+        try:
+            from app.services.threat_detection_service import threat_detection_service
             
-            # Get actionable recommendations
-            recommendations = get_recommendations(threat_type)
+            if record is None:
+                logger.warning("No synchronized data provided for analysis")
+                return None
             
-            # Add severity to recommendations
-            recommendations["severity"] = severity
-            recommendations["probability"] = probability
-            recommendations["detection_timestamp"] = sync_data.get("collection_timestamp")
+            prediction_result = threat_detection_service.predict_threat_from_synchronized_data(record)
+            if not prediction_result.get("success"):
+                logger.warning(f"Could not analyze reading {record.id}: {prediction_result.get('error')}")
+                return None
             
-            # Store alert in database if threat is significant
-            if threat_type != "No_Threat" or probability > 0.3:
-                alert = add_alert(
+            return self._analysis_result(
+                prediction_result["prediction"],
+                record.hive_id,
+                record.collection_timestamp.isoformat() if record.collection_timestamp else None,
+                reading_id=record.id
+            )
+            
+        except Exception as e:
+            logger.error(f"Error analyzing reading: {str(e)}")
+            return None
+    
+    def _analysis_result(self, prediction: Dict[str, Any], hive_id: Optional[int], timestamp: Any,
+                         reading_id: Optional[int] = None) -> Dict[str, Any]:
+        """Severity, recommendations and alert for one prediction"""
+        from app.ml_models.threat_detection.src.recommendation_service import get_recommendations
+        from app.ml_models.threat_detection.src.alert_store import get_alert_for_reading
+        from app.ml_models.threat_detection.src.alert_suppression import alert_suppression
+        
+        threat_type = prediction["threat_type"]
+        probability = prediction["probability"]
+        used_features = prediction["used_features"]
+        
+        logger.info(f"Threat Detection: {threat_type} (probability: {probability:.3f})")
+        
+        # Determine severity based on threat type and probability
+        severity = self._calculate_severity(threat_type, probability)
+        
+        # Get actionable recommendations
+        recommendations = get_recommendations(threat_type)
+        
+        # Add severity to recommendations
+        recommendations["severity"] = severity
+        recommendations["probability"] = probability
+        recommendations["detection_timestamp"] = timestamp
+        
+        # Store alert if threat is significant (once per stored reading); repeats within the
+        # cooldown/rate limit for this hive are aggregated into the previous alert
+        alert = None
+        suppression = None
+        decided = self._get_decided(reading_id, threat_type)
+        if decided is not None:
+            # Already decided in this worker: no suppression lock, no alert lookup
+            suppression, alert = decided
+        elif threat_type != "No_Threat" or probability > 0.3:
+            # Decided by another worker: a plain read instead of the locking evaluate()
+            suppression = alert_suppression.already_evaluated(hive_id, threat_type, reading_id)
+            if suppression is not None:
+                alert = get_alert_for_reading(reading_id)
+            else:
+                suppression, alert = alert_suppression.raise_alert(
                     threat_type=threat_type,
                     probability=probability,
                     used_features=used_features,
-                    recommendations=recommendations
+                    recommendations=recommendations,
+                    hive_id=hive_id,
+                    reading_id=reading_id,
+                    detected_at=timestamp
                 )
-                
-                logger.info(f"✅ Alert stored: {threat_type} with {severity} severity")
-            else:
-                alert = None
-                logger.info(f"ℹ️ No threat detected (probability: {probability:.3f})")
-            
-            # Update threat history for trend analysis
-            self._update_threat_history(threat_type, probability, sync_data.get("collection_timestamp"))
-            
-            # Build comprehensive result
-            result = {
-                "threat_type": threat_type,
-                "probability": probability,
-                "severity": severity,
-                "recommendations": recommendations,
-                "used_features": used_features,
-                "timestamp": sync_data.get("collection_timestamp"),
-                "hive_id": sync_data.get("hive_id"),
-                "alert_stored": alert is not None,
-                "alert_id": alert.get("timestamp") if alert else None
-            }
-            
-            self.last_analysis_time = datetime.now()
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error analyzing synchronized data: {str(e)}")
-            return None
+            if suppression["action"] == "alert":
+                if not alert.get("deduplicated"):
+                    logger.info(f"✅ Alert stored: {threat_type} with {severity} severity")
+            elif suppression["action"] != "duplicate":
+                logger.info(f"🔕 Alert suppressed: {threat_type} ({suppression['reason']}, "
+                            f"{suppression['occurrences']} occurrences)")
+        else:
+            logger.info(f"ℹ️ No threat detected (probability: {probability:.3f})")
+        if decided is None:
+            self._remember_decided(reading_id, threat_type, suppression, alert)
+        
+        # Update threat history for trend analysis
+        self._update_threat_history(threat_type, probability, timestamp, reading_id)
+        
+        # Build comprehensive result
+        result = {
+            "threat_type": threat_type,
+            "probability": probability,
+            "severity": severity,
+            "recommendations": recommendations,
+            "used_features": used_features,
+            "model_version": prediction.get("model_version"),
+            "timestamp": timestamp,
+            "hive_id": hive_id,
+            "synchronized_data_id": reading_id,
+            "alert_stored": alert is not None,
+            "alert_id": alert.get("timestamp") if alert else None,
+            "alert_suppression": suppression
+        }
+        
+        self.last_analysis_time = datetime.now()
+        
+        return result
     
+    def _get_decided(self, reading_id: Optional[int], threat_type: str) -> Optional[tuple]:
+        if reading_id is None:
+            return None
+        with self._decided_lock:
+            decided = self._decided.get((reading_id, threat_type))
+            if decided is not None:
+                self._decided.move_to_end((reading_id, threat_type))
+            return decided
+
+    def _remember_decided(self, reading_id: Optional[int], threat_type: str,
+                          suppression: Optional[Dict[str, Any]], alert: Optional[Dict[str, Any]]):
+        if reading_id is None:
+            return
+        with self._decided_lock:
+            self._decided[(reading_id, threat_type)] = (suppression, alert)
+            while len(self._decided) > MAX_DECIDED_READINGS:
+                self._decided.popitem(last=False)
+
     def _build_prediction_payload(self, sync_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Build prediction payload from synchronized data
@@ -219,14 +321,19 @@ class RealTimeThreatService:
         else:
             return "Low"
     
-    def _update_threat_history(self, threat_type: str, probability: float, timestamp: Any):
+    def _update_threat_history(self, threat_type: str, probability: float, timestamp: Any,
+                               reading_id: Optional[int] = None):
         """
-        Update threat history for trend analysis
+        Update threat history for trend analysis (a stored reading is counted once)
         """
+        if reading_id is not None and any(t.get("reading_id") == reading_id for t in self.threat_history):
+            return
+        
         self.threat_history.append({
             "threat_type": threat_type,
             "probability": probability,
-            "timestamp": timestamp
+            "timestamp": timestamp,
+            "reading_id": reading_id
         })
         
         # Keep only recent history
@@ -323,17 +430,18 @@ class RealTimeThreatService:
             # Try to import the appropriate data service
             try:
                 from app.scheduler import USE_DUMMY_DATA
-                
-                if USE_DUMMY_DATA:
-                    from app.services.dummy_data_service import dummy_data_service
-                    latest_data = dummy_data_service.get_latest_synchronized_data(hive_id)
-                else:
-                    from app.services.synchronized_monitoring_service import synchronized_monitoring_service
-                    latest_data = synchronized_monitoring_service.get_latest_synchronized_data(hive_id)
             except ImportError:
                 # Fallback to dummy data if scheduler module not available
+                USE_DUMMY_DATA = True
+            
+            if USE_DUMMY_DATA:
                 from app.services.dummy_data_service import dummy_data_service
                 latest_data = dummy_data_service.get_latest_synchronized_data(hive_id)
+                data_timestamp = latest_data.get("collection_timestamp") if latest_data else None
+            else:
+                from app.models.synchronized_data import SynchronizedData
+                latest_data = SynchronizedData.get_latest(hive_id)
+                data_timestamp = latest_data.collection_timestamp.isoformat() if latest_data else None
             
             if not latest_data:
                 return {
@@ -342,22 +450,25 @@ class RealTimeThreatService:
                     "hive_id": hive_id
                 }
             
-            # Analyze latest data
-            threat_result = self.analyze_synchronized_data(latest_data)
+            # Analyze latest data (stored readings reuse their cached prediction)
+            if USE_DUMMY_DATA:
+                threat_result = self.analyze_synchronized_data(latest_data)
+            else:
+                threat_result = self.analyze_reading(latest_data)
             
             if not threat_result:
                 return {
                     "status": "analysis_failed",
                     "message": "Could not analyze threat from latest data",
                     "hive_id": hive_id,
-                    "latest_data_timestamp": latest_data.get("collection_timestamp")
+                    "latest_data_timestamp": data_timestamp
                 }
             
             return {
                 "status": "success",
                 "hive_id": hive_id,
                 "current_threat": threat_result,
-                "data_timestamp": latest_data.get("collection_timestamp")
+                "data_timestamp": data_timestamp
             }
             
         except Exception as e:
@@ -0,0 +1,375 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from flask import request
+from flask_socketio import join_room, leave_room
+
+from app.config import Config
+from app.utils.realtime_wire import PreSerialized, diff_state, serialize
+
+logger = logging.getLogger(__name__)
+
+# Events kept per hive for subscribe snapshots (threat_alert keeps the latest alert)
+SNAPSHOT_EVENTS = ("hive_update", "synchronized_update", "threat_detection_update", "threat_alert")
+
+# Per-hive state streams sent as keyframes + deltas (alerts are discrete events, sent whole)
+DELTA_EVENTS = ("hive_update", "synchronized_update", "threat_detection_update")
+
+# Room every hive's updates are also sent to ({"all": true} subscriptions)
+ALL_HIVES_ROOM = "hives:all"
+
+# Hive state replicated to the other workers' hubs through the message queue
+# (no client can join this room, so it never reaches a browser)
+STATE_SYNC_EVENT = "realtime_hub_state"
+STATE_SYNC_ROOM = "realtime_hub:sync"
+
+
+def hive_room(hive_id: int) -> str:
+    return f"hive:{hive_id}"
+
+
+def apiary_room(name: str) -> str:
+    return f"apiary:{name}"
+
+
+def parse_apiary_groups(spec: str) -> Dict[str, List[int]]:
+    """Parse "north:1,2,3;south:4,5" into {"north": [1, 2, 3], "south": [4, 5]}"""
+    groups = {}
+    for part in (spec or "").split(";"):
+        if ":" not in part:
+            continue
+        name, hive_ids = part.split(":", 1)
+        try:
+            groups[name.strip()] = [int(hive_id) for hive_id in hive_ids.split(",") if hive_id.strip()]
+        except ValueError:
+            logger.warning(f"⚠️ Ignoring malformed apiary group '{part}'")
+    return {name: hive_ids for name, hive_ids in groups.items() if name}
+
+
+class RealtimeHub:
+    """
+    Per-hive Socket.IO rooms for scheduler updates.
+
+    Clients emit "subscribe" with {"hive_ids": [...], "apiaries": [...]} (or
+    {"all": true}) and join one room per hive or apiary group. publish()
+    sends an update only to the rooms of its hive (python-socketio delivers
+    once per client even when several of its rooms match) and keeps it as
+    the hive's latest state. A subscribe is answered with a "snapshot" event
+    built from that in-memory state, so a dashboard never has to call a REST
+    endpoint to fill in before the next tick.
+
+    Hive state updates are delta-encoded against the previous update of the
+    same hive (with a keyframe every keyframe_interval frames) and every
+    payload is serialized once, whatever the number of recipients.
+    """
+
+    def __init__(self, apiary_groups: Optional[Dict[str, List[int]]] = None, max_subscriptions: int = 100,
+                 keyframe_interval: int = 10):
+        self.apiary_groups = apiary_groups or {}
+        self.max_subscriptions = max_subscriptions
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.socketio = None
+        self.replicate = False
+
+        self._apiaries_by_hive: Dict[int, List[str]] = {}
+        for name, hive_ids in self.apiary_groups.items():
+            for hive_id in hive_ids:
+                self._apiaries_by_hive.setdefault(hive_id, []).append(name)
+
+        self._latest: Dict[int, Dict[str, Any]] = {}     # hive_id -> {event: {seq, data, json}}
+        self._updated_at: Dict[int, str] = {}
+        self._snapshot_json: Dict[int, str] = {}
+        self._subscriptions: Dict[str, Set[str]] = {}    # sid -> rooms
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.published = 0
+        self.remote_updates = 0
+        self.keyframes = 0
+        self.bytes_published = 0
+        self.bytes_full = 0
+        self.snapshots_sent = 0
+        self.subscribes = 0
+
+    def init_app(self, socketio, replicate: bool = False):
+        """
+        Register the subscription handlers on the app's SocketIO instance.
+
+        Args:
+            socketio: The app's SocketIO
+            replicate: Send hive state to the other workers' hubs (set when
+                       a message queue connects several workers)
+        """
+        self.socketio = socketio
+        self.replicate = replicate
+        socketio.on_event("subscribe", self._on_subscribe)
+        socketio.on_event("unsubscribe", self._on_unsubscribe)
+        socketio.on_event("resync", self._on_resync)
+        socketio.on_event("disconnect", self._on_disconnect)
+
+    # ========== ROOMS ==========
+    def rooms_for_hive(self, hive_id: int) -> List[str]:
+        """Every room an update for this hive is delivered to"""
+        rooms = [hive_room(hive_id), ALL_HIVES_ROOM]
+        rooms.extend(apiary_room(name) for name in self._apiaries_by_hive.get(hive_id, ()))
+        return rooms
+
+    def _requested_rooms(self, data: Dict[str, Any]):
+        """Validate a subscribe/unsubscribe payload: (rooms, hive_ids covered, errors)"""
+        rooms, hive_ids, errors = [], [], []
+        if data.get("all"):
+            rooms.append(ALL_HIVES_ROOM)
+            with self._lock:
+                hive_ids.extend(self._latest)
+        for value in data.get("hive_ids") or []:
+            try:
+                hive_id = int(value)
+            except (TypeError, ValueError):
+                errors.append(f"Invalid hive id: {value!r}")
+                continue
+            rooms.append(hive_room(hive_id))
+            hive_ids.append(hive_id)
+        for name in data.get("apiaries") or []:
+            if name not in self.apiary_groups:
+                errors.append(f"Unknown apiary: {name!r}")
+                continue
+            rooms.append(apiary_room(name))
+            hive_ids.extend(self.apiary_groups[name])
+        return list(dict.fromkeys(rooms)), list(dict.fromkeys(hive_ids)), errors
+
+    # ========== SOCKET.IO HANDLERS ==========
+    def _on_subscribe(self, data=None):
+        data = data if isinstance(data, dict) else {}
+        rooms, hive_ids, errors = self._requested_rooms(data)
+        sid = request.sid
+
+        with self._lock:
+            current = self._subscriptions.setdefault(sid, set())
+            new_rooms = [room for room in rooms if room not in current]
+            if len(current) + len(new_rooms) > self.max_subscriptions:
+                return {"success": False,
+                        "message": f"At most {self.max_subscriptions} subscriptions per client"}
+            current.update(new_rooms)
+            self.subscribes += 1
+
+        for room in new_rooms:
+            join_room(room)
+        self.socketio.emit("snapshot", self.snapshot(hive_ids), to=sid)
+        with self._lock:
+            self.snapshots_sent += 1
+
+        logger.info(f"📡 {sid} subscribed to {', '.join(rooms) or 'nothing'}")
+        return {"success": not errors, "rooms": sorted(self._subscriptions.get(sid, ())), "errors": errors}
+
+    def _on_unsubscribe(self, data=None):
+        data = data if isinstance(data, dict) else {}
+        rooms, _, errors = self._requested_rooms(data)
+        sid = request.sid
+        with self._lock:
+            current = self._subscriptions.get(sid, set())
+            left = [room for room in rooms if room in current]
+            current.difference_update(left)
+        for room in left:
+            leave_room(room)
+        return {"success": not errors, "rooms": sorted(current), "errors": errors}
+
+    def _on_resync(self, data=None):
+        """Re-send the snapshot for subscribed hives (after a missed delta frame)"""
+        data = data if isinstance(data, dict) else {}
+        if not any(data.get(key) for key in ("hive_ids", "apiaries", "all")):
+            # Default: everything this client is subscribed to
+            with self._lock:
+                rooms = list(self._subscriptions.get(request.sid, ()))
+            data = {
+                "all": ALL_HIVES_ROOM in rooms,
+                "hive_ids": [room.split(":", 1)[1] for room in rooms if room.startswith("hive:")],
+                "apiaries": [room.split(":", 1)[1] for room in rooms if room.startswith("apiary:")],
+            }
+        _, hive_ids, errors = self._requested_rooms(data)
+        with self._lock:
+            self.snapshots_sent += 1
+        self.socketio.emit("snapshot", self.snapshot(hive_ids), to=request.sid)
+        return {"success": not errors, "errors": errors}
+
+    def _on_disconnect(self, *args):
+        # Socket.IO drops the rooms itself; only the bookkeeping is ours
+        with self._lock:
+            self._subscriptions.pop(request.sid, None)
+
+    # ========== PUBLISHING ==========
+    def publish(self, event: str, payload: Dict[str, Any], hive_id: Optional[int] = None):
+        """
+        Emit an update to the rooms of its hive and remember it for snapshots.
+
+        State events (DELTA_EVENTS) are sent as frames numbered per hive and
+        event: {"hive_id", "seq", "keyframe", "data"[, "removed"]}. A keyframe
+        carries the full update; other frames only the fields that changed
+        since the previous one (see realtime_wire.diff_state). Clients apply
+        the frame with the next seq, take every keyframe, and emit "resync"
+        when they miss one. Other events (threat_alert) are sent whole.
+        Each frame is serialized once and the same bytes go to every client.
+
+        Args:
+            event: Socket.IO event name
+            payload: JSON-serializable update (must not be mutated afterwards)
+            hive_id: Hive the update belongs to (default: payload["hive_id"])
+        """
+        hive_id = payload.get("hive_id") if hive_id is None else hive_id
+        if hive_id is None:
+            raise ValueError(f"Cannot publish '{event}' without a hive_id")
+
+        full = serialize(payload)
+        with self._lock:
+            if event in DELTA_EVENTS:
+                stream = self._latest.setdefault(hive_id, {}).get(event)
+                seq = stream["seq"] + 1 if stream else 1
+                frame = None
+                if stream and seq - stream["keyframe_seq"] < self.keyframe_interval:
+                    changes, removed = diff_state(stream["data"], payload)
+                    delta = {"hive_id": hive_id, "seq": seq, "keyframe": False, "data": changes}
+                    if removed:
+                        delta["removed"] = removed
+                    frame = serialize(delta)
+                    if len(frame) >= len(full):
+                        frame = None  # the change is as big as the update: send a keyframe
+                if frame is None:
+                    frame = serialize({"hive_id": hive_id, "seq": seq, "keyframe": True, "data": payload})
+                    self.keyframes += 1
+                    keyframe_seq = seq
+                else:
+                    keyframe_seq = stream["keyframe_seq"]
+                self._latest[hive_id][event] = {"seq": seq, "keyframe_seq": keyframe_seq,
+                                                 "data": payload, "json": full}
+            else:
+                seq = keyframe_seq = None
+                frame = full
+                if event in SNAPSHOT_EVENTS:
+                    self._latest.setdefault(hive_id, {})[event] = {"seq": None, "data": payload, "json": full}
+            if event in SNAPSHOT_EVENTS:
+                self._updated_at[hive_id] = datetime.now().isoformat()
+                self._snapshot_json.pop(hive_id, None)
+            self.published += 1
+            self.bytes_published += len(frame)
+            self.bytes_full += len(full)
+
+        if self.socketio is not None:
+            self.socketio.emit(event, frame, to=self.rooms_for_hive(hive_id))
+            if self.replicate and event in SNAPSHOT_EVENTS:
+                self.socketio.emit(STATE_SYNC_EVENT, {
+                    "hive_id": hive_id, "event": event, "seq": seq, "keyframe_seq": keyframe_seq,
+                    "updated_at": self._updated_at.get(hive_id), "data": full,
+                }, to=STATE_SYNC_ROOM)
+
+    def apply_remote_state(self, state: Dict[str, Any]):
+        """Take over hive state published by another worker (keeps snapshots and seq numbers in step)"""
+        hive_id, event = state["hive_id"], state["event"]
+        with self._lock:
+            self._latest.setdefault(hive_id, {})[event] = {
+                "seq": state.get("seq"), "keyframe_seq": state.get("keyframe_seq"),
+                "data": state["data"], "json": serialize(state["data"]),
+            }
+            self._updated_at[hive_id] = state.get("updated_at")
+            self._snapshot_json.pop(hive_id, None)
+            self.remote_updates += 1
+
+    def _hive_snapshot_json(self, hive_id: int) -> str:
+        """Serialized snapshot entry for one hive, cached until its next update (caller holds the lock)"""
+        cached = self._snapshot_json.get(hive_id)
+        if cached is None:
+            updates = ",".join(
+                f'{serialize(event)}:{{"seq":{serialize(stream["seq"])},"data":{stream["json"]}}}'
+                for event, stream in self._latest.get(hive_id, {}).items()
+            )
+            cached = (f'{{"hive_id":{serialize(hive_id)},"updated_at":{serialize(self._updated_at.get(hive_id))},'
+                      f'"updates":{{{updates}}}}}')
+            self._snapshot_json[hive_id] = cached
+        return cached
+
+    def snapshot(self, hive_ids: Iterable[int]) -> PreSerialized:
+        """
+        Latest state held in memory for the given hives, pre-serialized:
+        {"hives": [{"hive_id", "updated_at", "updates": {event: {"seq", "data"}}}], "timestamp"}
+        """
+        with self._lock:
+            hives = ",".join(self._hive_snapshot_json(hive_id) for hive_id in hive_ids)
+        return PreSerialized(f'{{"hives":[{hives}],"timestamp":{serialize(datetime.now().isoformat())}}}')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Subscriptions and publish counters for this worker"""
+        with self._lock:
+            room_counts = {}
+            for rooms in self._subscriptions.values():
+                for room in rooms:
+                    room_counts[room] = room_counts.get(room, 0) + 1
+            return {
+                "clients": len(self._subscriptions),
+                "keyframe_interval": self.keyframe_interval,
+                "keyframes": self.keyframes,
+                "bytes_published": self.bytes_published,
+                "bytes_full_updates": self.bytes_full,
+                "compression_ratio": round(self.bytes_published / self.bytes_full, 4) if self.bytes_full else 0.0,
+                "rooms": room_counts,
+                "hives_with_state": sorted(self._latest.keys()),
+                "apiary_groups": self.apiary_groups,
+                "replicate": self.replicate,
+                "published": self.published,
+                "remote_updates": self.remote_updates,
+                "subscribes": self.subscribes,
+                "snapshots_sent": self.snapshots_sent,
+            }
+
+
+# ========== MESSAGE QUEUE ==========
+class HubSyncMixin:
+    """
+    Client manager mixin: state messages from the publishing worker go to
+    this worker's hub instead of to clients. Mixed into the python-socketio
+    pub/sub manager chosen by create_client_manager().
+    """
+    hub: "RealtimeHub" = None
+
+    def _handle_emit(self, message):
+        if message.get("event") == STATE_SYNC_EVENT:
+            if message.get("host_id") != self.host_id and self.hub is not None:
+                self.hub.apply_remote_state(message["data"][0])
+            return
+        super()._handle_emit(message)
+
+
+def create_client_manager(url: str, channel: str = "flask-socketio", hub: Optional[RealtimeHub] = None):
+    """
+    Socket.IO client manager for a message queue URL, so every worker can
+    deliver emits made in any worker.
+
+    broker://host:port uses the built-in MessageBroker (no extra service);
+    redis://, kafka://, zmq+tcp:// and Kombu URLs use python-socketio's
+    managers (which need their client libraries installed).
+    """
+    import socketio
+
+    if url.startswith("broker://"):
+        from app.utils.message_broker import BrokerManager
+        base = BrokerManager
+    elif url.startswith(("redis://", "rediss://")):
+        base = socketio.RedisManager
+    elif url.startswith("kafka://"):
+        base = socketio.KafkaManager
+    elif url.startswith("zmq"):
+        base = socketio.ZmqManager
+    else:
+        base = socketio.KombuManager
+
+    manager_class = type(f"HubSync{base.__name__}", (HubSyncMixin, base), {})
+    manager = manager_class(url, channel=channel)
+    manager.hub = hub or realtime_hub
+    return manager
+
+
+# Create singleton instance
+realtime_hub = RealtimeHub(
+    apiary_groups=parse_apiary_groups(Config.APIARY_GROUPS),
+    max_subscriptions=Config.REALTIME_MAX_SUBSCRIPTIONS,
+    keyframe_interval=Config.REALTIME_KEYFRAME_INTERVAL,
+)
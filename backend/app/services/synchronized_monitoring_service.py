@@ -186,8 +186,15 @@ class SynchronizedMonitoringService:
                 # Calculate threat detection fields from existing data
                 synchronized_record.calculate_threat_detection_fields()
                 
+                # Score data quality once at insert time (stored and indexed)
+                synchronized_record.refresh_data_quality_score()
+                
                 db.session.add(synchronized_record)
                 
+                # Keep per-hive daily counters in step (same transaction)
+                from app.models.hive_daily_counter import HiveDailyCounter
+                HiveDailyCounter.record(synchronized_record)
+                
             except Exception as e:
                 error_msg = f"SynchronizedData creation error: {str(e)}"
                 results["errors"].append(error_msg)
@@ -538,30 +545,25 @@ class SynchronizedMonitoringService:
             Dict containing alignment statistics
         """
         try:
-            from app.models.synchronized_data import SynchronizedData
-            
-            since_time = datetime.now() - timedelta(hours=hours)
+            from app.models.hive_daily_counter import HiveDailyCounter
             
-            # Get synchronized data records
-            records = SynchronizedData.query.filter(
-                SynchronizedData.hive_id == hive_id,
-                SynchronizedData.collection_timestamp >= since_time
-            ).all()
+            # Read running counters instead of loading every record
+            totals = HiveDailyCounter.get_window_totals(hive_id, hours)
+            total_records = totals['total_records']
             
-            if not records:
+            if not total_records:
                 return {
                     'error': f'No synchronized data found for hive {hive_id} in the last {hours} hours'
                 }
             
-            total_records = len(records)
-            successful_collections = len([r for r in records if r.collection_success])
+            successful_collections = totals['successful_collections']
             
             # Calculate alignment statistics
-            weather_data_count = len([r for r in records if r.weather_temperature is not None])
-            sensor_data_count = len([r for r in records if r.sensor_temperature is not None])
+            weather_data_count = totals['perfect_alignment'] + totals['weather_only']
+            sensor_data_count = totals['perfect_alignment'] + totals['sensor_only']
             
             # Calculate average sensor data count per record
-            avg_sensor_data = sum(r.sensor_data_count for r in records) / total_records if total_records > 0 else 0
+            avg_sensor_data = totals['sensor_readings'] / total_records
             
             return {
                 'total_records': total_records,
@@ -572,8 +574,8 @@ class SynchronizedMonitoringService:
                 'average_sensor_data_per_record': round(avg_sensor_data, 2),
                 'perfect_alignment_rate': (weather_data_count / total_records * 100) if total_records > 0 else 0,
                 'time_range': {
-                    'start': min(r.collection_timestamp for r in records).isoformat(),
-                    'end': max(r.collection_timestamp for r in records).isoformat()
+                    'start': totals['first_collection_at'].isoformat() if totals['first_collection_at'] else None,
+                    'end': totals['last_collection_at'].isoformat() if totals['last_collection_at'] else None
                 }
             }
             
@@ -659,8 +661,23 @@ class SynchronizedMonitoringService:
             "rate_limit_reset_times": {
                 "weather": self.weather_calls_reset_time.isoformat(),
                 "adafruit": self.adafruit_calls_reset_time.isoformat()
-            }
+            },
+            "stored_records": self.get_stored_record_counts()
         }
+    
+    def get_stored_record_counts(self) -> Dict[str, Any]:
+        """Per-hive record totals from the daily counters table (no table scans)"""
+        try:
+            from app.models.hive_daily_counter import HiveDailyCounter
+            
+            per_hive = HiveDailyCounter.get_hive_totals()
+            return {
+                "total_records": sum(totals["total_records"] for totals in per_hive.values()),
+                "per_hive": per_hive
+            }
+        except Exception as e:
+            logger.error(f"Error reading hive daily counters: {str(e)}")
+            return {"error": str(e)}
 
 # Create singleton instance
 synchronized_monitoring_service = SynchronizedMonitoringService()
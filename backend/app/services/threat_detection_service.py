@@ -3,6 +3,9 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from app import db
 from app.models.synchronized_data import SynchronizedData
+from app.models.threat_prediction import ThreatPrediction
+from app.services.threat_feature_state import threat_feature_state, ROLLING_WINDOW
+from app.services.threat_inference_cache import threat_inference_cache
 
 logger = logging.getLogger(__name__)
 
@@ -19,22 +22,34 @@ class ThreatDetectionService:
     def _load_threat_model(self):
         """Load the threat detection model"""
         try:
-            from app.ml_models.threat_detection.src.prediction_service_threat import predict_threat
+            from app.ml_models.threat_detection.src.prediction_service_threat import (
+                predict_threat, predict_threat_batch, get_model_version, build_used_features
+            )
             self.predict_threat = predict_threat
+            self.predict_threat_batch = predict_threat_batch
+            self.get_model_version = get_model_version
+            self.build_used_features = build_used_features
             logger.info("Threat detection model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load threat detection model: {str(e)}")
             self.predict_threat = None
+            self.predict_threat_batch = None
+            self.get_model_version = None
+            self.build_used_features = None
     
     def predict_threat_from_synchronized_data(self, synchronized_data: SynchronizedData) -> Dict[str, Any]:
         """
         Predict threat using SynchronizedData
         
+        Results are memoized per (row id, model version) in threat_inference_cache,
+        and a row already scored by the current model in threat_predictions is
+        not run through the model again.
+        
         Args:
             synchronized_data: SynchronizedData instance
             
         Returns:
-            Dict containing threat prediction results
+            Dict containing threat prediction results (shared when cached - do not mutate)
         """
         try:
             if not self.predict_threat:
@@ -43,11 +58,35 @@ class ThreatDetectionService:
                     "error": "Threat detection model not available"
                 }
             
-            # Get threat detection payload from SynchronizedData
-            payload = synchronized_data.get_threat_detection_payload()
-            
-            # Make prediction
-            prediction_result = self.predict_threat(payload)
+            reading_id = synchronized_data.id
+            model_version = self.get_model_version()
+            if reading_id is not None:
+                cached = threat_inference_cache.get(reading_id, model_version)
+                if cached is not None:
+                    return cached
+            
+            # Get threat detection payload from SynchronizedData, with the hive's streaming rolling features
+            payload = threat_feature_state.enrich_payload(
+                synchronized_data.hive_id, synchronized_data.get_threat_detection_payload()
+            )
+            
+            stored = ThreatPrediction.query.filter_by(
+                synchronized_data_id=reading_id, model_version=model_version
+            ).first() if reading_id is not None else None
+            if stored is not None:
+                # Scored before (another worker, or a batch): reuse it, only the features are rebuilt
+                prediction_result = {
+                    "threat_type": stored.threat_type,
+                    "probability": stored.probability,
+                    "used_features": self.build_used_features(payload),
+                    "model_version": stored.model_version
+                }
+            else:
+                # Make prediction
+                prediction_result = self.predict_threat(payload)
+                
+                # Persist it so statistics never re-score this row
+                self._store_predictions([synchronized_data], [prediction_result])
             
             # Add metadata
             result = {
@@ -55,6 +94,7 @@ class ThreatDetectionService:
                 "prediction": prediction_result,
                 "data_source": {
                     "hive_id": synchronized_data.hive_id,
+                    "synchronized_data_id": reading_id,
                     "timestamp": synchronized_data.collection_timestamp.isoformat(),
                     "data_quality_score": synchronized_data.get_data_quality_score()
                 },
@@ -65,6 +105,9 @@ class ThreatDetectionService:
                 }
             }
             
+            if reading_id is not None:
+                threat_inference_cache.put(reading_id, prediction_result["model_version"], result)
+            
             logger.info(f"Threat prediction completed for hive {synchronized_data.hive_id}: {prediction_result['threat_type']}")
             return result
             
@@ -122,22 +165,124 @@ class ThreatDetectionService:
             if not historical_data:
                 return []
             
-            predictions = []
-            for data_point in historical_data:
-                prediction = self.predict_threat_from_synchronized_data(data_point)
-                predictions.append(prediction)
+            return self.predict_threat_for_records(historical_data)
+            
+        except Exception as e:
+            logger.error(f"Error predicting threats for historical data: {str(e)}")
+            return []
+    
+    def predict_threat_for_records(self, records: List[SynchronizedData]) -> List[Dict[str, Any]]:
+        """
+        Predict threats for many SynchronizedData records with one batched model call
+        
+        Args:
+            records: SynchronizedData instances
             
-            logger.info(f"Generated {len(predictions)} threat predictions for hive {hive_id}")
+        Returns:
+            List of threat prediction results (same format as predict_threat_from_synchronized_data)
+        """
+        try:
+            if not records:
+                return []
+            
+            if not self.predict_threat_batch:
+                return [{
+                    "success": False,
+                    "error": "Threat detection model not available"
+                } for _ in records]
+            
+            # Rolling windows over the batch itself, per hive in time order (as in training)
+            payloads = threat_feature_state.rolling_features_for_sequence(
+                [record.get_threat_detection_payload() for record in records],
+                [record.hive_id for record in records]
+            )
+            prediction_results = self.predict_threat_batch(payloads)
+            
+            predictions = []
+            for record, prediction_result in zip(records, prediction_results):
+                predictions.append({
+                    "success": True,
+                    "prediction": prediction_result,
+                    "data_source": {
+                        "hive_id": record.hive_id,
+                        "synchronized_data_id": record.id,
+                        "timestamp": record.collection_timestamp.isoformat(),
+                        "data_quality_score": record.get_data_quality_score()
+                    },
+                    "generated_fields": {
+                        "sound_peak_freq": record.sensor_sound_peak_freq,
+                        "vibration_hz": record.sensor_vibration_hz,
+                        "vibration_var": record.sensor_vibration_var
+                    }
+                })
+            
+            logger.info(f"Generated {len(predictions)} threat predictions in one batch")
             return predictions
             
         except Exception as e:
-            logger.error(f"Error predicting threats for historical data: {str(e)}")
+            logger.error(f"Error predicting threats for records: {str(e)}")
             return []
     
+    # ========== PERSISTED PREDICTIONS ==========
+    def _store_predictions(self, records: List[SynchronizedData], predictions: List[Dict[str, Any]]) -> int:
+        """Write predictions to threat_predictions and commit (failures are logged, not raised)"""
+        try:
+            written = ThreatPrediction.store(records, predictions, self.get_model_version())
+            if written:
+                db.session.commit()
+            return written
+        except Exception as e:
+            logger.error(f"Error storing threat predictions: {str(e)}")
+            db.session.rollback()
+            return 0
+    
+    def ensure_predictions(self, hive_id: int = 1, hours: int = 24) -> int:
+        """
+        Score rows in the window that have no prediction from the current model
+        
+        Rows are re-scored from the first unscored one onwards, together with the
+        preceding readings needed for the rolling features, in one batch.
+        
+        Args:
+            hive_id: The hive ID to score
+            hours: Number of hours of historical data
+            
+        Returns:
+            Number of predictions written
+        """
+        if not self.predict_threat_batch:
+            return 0
+        
+        since_time = datetime.now() - timedelta(hours=hours)
+        first_unscored = ThreatPrediction.first_unscored_timestamp(hive_id, since_time, self.get_model_version())
+        if first_unscored is None:
+            return 0
+        
+        context = SynchronizedData.query.filter(
+            SynchronizedData.hive_id == hive_id,
+            SynchronizedData.collection_timestamp < first_unscored
+        ).order_by(SynchronizedData.collection_timestamp.desc()).limit(ROLLING_WINDOW - 1).all()
+        records = SynchronizedData.query.filter(
+            SynchronizedData.hive_id == hive_id,
+            SynchronizedData.collection_timestamp >= first_unscored
+        ).order_by(SynchronizedData.collection_timestamp.asc()).all()
+        
+        batch = list(reversed(context)) + records
+        predictions = self.predict_threat_for_records(batch)
+        if len(predictions) != len(batch):
+            return 0
+        
+        written = self._store_predictions(records, [p["prediction"] for p in predictions[len(context):]])
+        logger.info(f"Scored {written} synchronized_data rows for hive {hive_id} since {first_unscored}")
+        return written
+    
     def get_threat_statistics(self, hive_id: int = 1, hours: int = 24) -> Dict[str, Any]:
         """
         Get threat statistics for a hive
         
+        New or stale rows are scored first; the statistics themselves are SQL
+        aggregates over threat_predictions.
+        
         Args:
             hive_id: The hive ID to get stats for
             hours: Number of hours of historical data
@@ -146,44 +291,41 @@ class ThreatDetectionService:
             Dict containing threat statistics
         """
         try:
-            predictions = self.predict_threat_for_historical_data(hive_id, hours)
-            
-            if not predictions:
+            if not self.predict_threat_batch:
                 return {
                     "success": False,
-                    "error": f"No threat predictions available for hive {hive_id}"
+                    "error": "Threat detection model not available"
                 }
             
-            # Calculate statistics
-            successful_predictions = [p for p in predictions if p.get("success", False)]
-            threat_types = [p["prediction"]["threat_type"] for p in successful_predictions]
-            
-            # Count threat types
-            threat_counts = {}
-            for threat_type in threat_types:
-                threat_counts[threat_type] = threat_counts.get(threat_type, 0) + 1
+            self.ensure_predictions(hive_id, hours)
+            model_version = self.get_model_version()
+            stats = ThreatPrediction.get_window_statistics(hive_id, hours, model_version=model_version)
             
-            # Calculate average probability
-            probabilities = [p["prediction"]["probability"] for p in successful_predictions if p["prediction"].get("probability")]
-            avg_probability = sum(probabilities) / len(probabilities) if probabilities else 0
+            total = stats["total_predictions"]
+            if not total:
+                return {
+                    "success": False,
+                    "error": f"No threat predictions available for hive {hive_id}"
+                }
             
-            # Find most common threat
+            threat_counts = stats["threat_type_counts"]
             most_common_threat = max(threat_counts.items(), key=lambda x: x[1]) if threat_counts else ("No_Threat", 0)
             
             return {
                 "success": True,
                 "statistics": {
-                    "total_predictions": len(predictions),
-                    "successful_predictions": len(successful_predictions),
+                    "total_predictions": total,
+                    "successful_predictions": total,
                     "threat_type_counts": threat_counts,
                     "most_common_threat": {
                         "type": most_common_threat[0],
                         "count": most_common_threat[1],
-                        "percentage": (most_common_threat[1] / len(successful_predictions) * 100) if successful_predictions else 0
+                        "percentage": most_common_threat[1] / total * 100
                     },
-                    "average_probability": round(avg_probability, 3),
+                    "average_probability": round(stats["average_probability"], 3),
                     "time_range_hours": hours,
-                    "hive_id": hive_id
+                    "hive_id": hive_id,
+                    "model_version": model_version
                 }
             }
             
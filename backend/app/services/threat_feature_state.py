@@ -0,0 +1,304 @@
+import copy
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Same window as training: rolling(3, min_periods=1) in _add_rolling_features
+ROLLING_WINDOW = 3
+
+# Payload keys read by the threat model for the rolling features
+ROLLING_FEATURES = ("sound_roll3", "vib_roll3", "sound_var3", "vib_var3")
+
+
+def _reading(payload: Dict[str, Any], key: str, default: float) -> float:
+    """Payload value as float (missing/None -> model default)"""
+    value = payload.get(key)
+    return default if value is None else float(value)
+
+
+class RollingWindow:
+    """
+    Mean and sample variance (ddof=1) over the last k values, updated in O(1).
+    Matches pandas rolling(k, min_periods=1).mean() / .var().fillna(0).
+    """
+
+    def __init__(self, size: int = ROLLING_WINDOW):
+        self.size = size
+        self.values = deque()
+        self.mean = 0.0
+        self._m2 = 0.0  # sum of squared deviations from the mean
+
+    def push(self, value: float):
+        """Add a value, dropping the oldest one once the window is full"""
+        if len(self.values) < self.size:
+            self.values.append(value)
+            delta = value - self.mean
+            self.mean += delta / len(self.values)
+            self._m2 += delta * (value - self.mean)
+        else:
+            oldest = self.values.popleft()
+            self.values.append(value)
+            new_mean = self.mean + (value - oldest) / self.size
+            self._m2 += (value - oldest) * (value - new_mean + oldest - self.mean)
+            self.mean = new_mean
+        # Guard against tiny negative values from floating point cancellation
+        self._m2 = max(self._m2, 0.0)
+
+    @property
+    def variance(self) -> float:
+        n = len(self.values)
+        return self._m2 / (n - 1) if n > 1 else 0.0
+
+
+class HiveFeatureState:
+    """Rolling sound / vibration windows for one hive"""
+
+    def __init__(self, size: int = ROLLING_WINDOW):
+        self.sound = RollingWindow(size)
+        self.vibration = RollingWindow(size)
+        self.last_timestamp: Optional[datetime] = None
+
+    def push(self, timestamp: datetime, sound_db: float, vibration_hz: float):
+        self.sound.push(sound_db)
+        self.vibration.push(vibration_hz)
+        self.last_timestamp = timestamp
+
+    def copy(self) -> "HiveFeatureState":
+        return copy.deepcopy(self)
+
+    def features(self) -> Dict[str, float]:
+        return {
+            "sound_roll3": self.sound.mean,
+            "vib_roll3": self.vibration.mean,
+            "sound_var3": self.sound.variance,
+            "vib_var3": self.vibration.variance
+        }
+
+
+class ThreatFeatureStateService:
+    """
+    Per-hive streaming rolling features for live threat inference.
+
+    Each new reading is pushed into its hive's window once (keyed by reading
+    timestamp), so repeated predictions for the same reading reuse the same
+    features. State is seeded from the last readings in synchronized_data at
+    startup, or lazily the first time a hive is seen, and re-seeded when a
+    reading arrives more than reseed_gap_seconds after the hive's last one
+    (this worker missed readings collected by another). Ad-hoc readings
+    (record=False) are scored against the window without changing it.
+    """
+
+    def __init__(self, window: int = ROLLING_WINDOW, reseed_gap_seconds: float = 90):
+        self.window = window
+        self.reseed_gap = timedelta(seconds=reseed_gap_seconds)
+        self._states: Dict[int, HiveFeatureState] = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.pushed = 0
+        self.reused = 0
+        self.out_of_order = 0
+        self.previewed = 0
+        self.reseeded = 0
+
+    @staticmethod
+    def _normalize_timestamp(timestamp: Any) -> datetime:
+        """str/datetime -> naive datetime (wall-clock, tz dropped); missing -> now"""
+        if isinstance(timestamp, str):
+            try:
+                timestamp = datetime.fromisoformat(timestamp)
+            except ValueError:
+                timestamp = None
+        if not isinstance(timestamp, datetime):
+            return datetime.now()
+        return timestamp.replace(tzinfo=None)
+
+    def _load_recent(self, hive_id: int) -> HiveFeatureState:
+        """Seed a hive's windows from its last `window` synchronized_data rows"""
+        from app.models.synchronized_data import SynchronizedData
+
+        state = HiveFeatureState(self.window)
+        rows = SynchronizedData.query.filter_by(hive_id=hive_id).order_by(
+            SynchronizedData.collection_timestamp.desc()
+        ).limit(self.window).all()
+
+        for record in reversed(rows):
+            payload = record.get_threat_detection_payload()
+            state.push(record.collection_timestamp, float(payload["hive_sound_db"]), float(payload["vibration_hz"]))
+        return state
+
+    def _seed(self, hive_id: int) -> HiveFeatureState:
+        """Windows loaded from the database (called without the lock held)"""
+        try:
+            return self._load_recent(hive_id)
+        except Exception as e:
+            logger.warning(f"Could not seed rolling features for hive {hive_id}: {str(e)}")
+            return HiveFeatureState(self.window)
+
+    def _needs_seed(self, state: Optional[HiveFeatureState], timestamp: Optional[datetime]) -> bool:
+        """No state yet, or (for a recorded reading) a gap longer than the collection interval"""
+        if state is None:
+            return True
+        return (timestamp is not None and state.last_timestamp is not None
+                and timestamp - state.last_timestamp > self.reseed_gap)
+
+    def _get_state(self, hive_id: int, timestamp: Optional[datetime] = None) -> HiveFeatureState:
+        """
+        State for a hive, seeded from the database when missing or stale.
+        Takes the lock; the seed query runs outside it.
+        """
+        with self._lock:
+            state = self._states.get(hive_id)
+            if not self._needs_seed(state, timestamp):
+                return state
+        seeded = self._seed(hive_id)
+        with self._lock:
+            # Another thread may have seeded or pushed meanwhile: keep the newer window
+            state = self._states.get(hive_id)
+            if self._needs_seed(state, timestamp) and (
+                state is None or seeded.last_timestamp is None or state.last_timestamp is None
+                or seeded.last_timestamp >= state.last_timestamp
+            ):
+                if state is not None:
+                    self.reseeded += 1
+                self._states[hive_id] = state = seeded
+            return state
+
+    def rebuild(self, hive_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Reload rolling state from the database (startup / maintenance).
+        Requires an app context.
+
+        Args:
+            hive_ids: Hives to rebuild (default: every hive with synchronized data)
+
+        Returns:
+            Number of hives loaded
+        """
+        if hive_ids is None:
+            from app import db
+            from app.models.synchronized_data import SynchronizedData
+            hive_ids = [row[0] for row in db.session.query(SynchronizedData.hive_id).distinct()]
+
+        states = {hive_id: self._load_recent(hive_id) for hive_id in hive_ids}
+        with self._lock:
+            self._states.update(states)
+        logger.info(f"Rolling threat features rebuilt for {len(states)} hive(s)")
+        return len(states)
+
+    def observe(self, hive_id: int, timestamp: Any, sound_db: float, vibration_hz: float,
+                record: bool = True) -> Dict[str, float]:
+        """
+        Return a reading's rolling features, recording it in the hive's window.
+
+        A reading newer than the hive's last one is pushed; the same reading
+        again reuses the current window. Older (out-of-order) readings are not
+        pushed and get the no-history fallback used by the model.
+
+        Args:
+            record: False for ad-hoc readings (client payloads): features are
+                    computed on a copy of the window, which stays unchanged
+        """
+        timestamp = self._normalize_timestamp(timestamp)
+        sound_db = float(sound_db)
+        vibration_hz = float(vibration_hz)
+
+        if not record:
+            state = self._get_state(hive_id)
+            with self._lock:
+                self.previewed += 1
+                if timestamp == state.last_timestamp:
+                    return state.features()
+                preview = state.copy()
+            preview.push(timestamp, sound_db, vibration_hz)
+            return preview.features()
+
+        state = self._get_state(hive_id, timestamp)
+        with self._lock:
+            state = self._states.get(hive_id, state)
+            if state.last_timestamp is None or timestamp > state.last_timestamp:
+                state.push(timestamp, sound_db, vibration_hz)
+                self.pushed += 1
+            elif timestamp == state.last_timestamp:
+                self.reused += 1
+            else:
+                self.out_of_order += 1
+                return {"sound_roll3": sound_db, "vib_roll3": vibration_hz, "sound_var3": 0.0, "vib_var3": 0.0}
+            return state.features()
+
+    def enrich_payload(self, hive_id: Optional[int], payload: Dict[str, Any], record: bool = True) -> Dict[str, Any]:
+        """
+        Return a copy of a threat payload with streaming rolling features added.
+        Payloads without a hive, or that already carry rolling features, are returned unchanged.
+
+        Args:
+            record: Push the reading into the hive's live window; pass False for
+                    readings that are not stored synchronized_data rows
+        """
+        if hive_id is None or any(key in payload for key in ROLLING_FEATURES):
+            return payload
+        try:
+            hive_id = int(hive_id)
+        except (TypeError, ValueError):
+            return payload
+        features = self.observe(
+            hive_id,
+            payload.get("timestamp"),
+            _reading(payload, "hive_sound_db", 70.0),
+            _reading(payload, "vibration_hz", 200.0),
+            record=record
+        )
+        return {**payload, **features}
+
+    @staticmethod
+    def rolling_features_for_sequence(payloads: List[Dict[str, Any]], hive_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Rolling features for a batch of historical readings, per hive in
+        timestamp order (same windows as training). Does not touch live state.
+        """
+        order = sorted(range(len(payloads)), key=lambda i: (hive_ids[i], payloads[i].get("timestamp") or ""))
+        states: Dict[int, HiveFeatureState] = {}
+        enriched = list(payloads)
+        for i in order:
+            payload = payloads[i]
+            state = states.setdefault(hive_ids[i], HiveFeatureState())
+            state.push(None, _reading(payload, "hive_sound_db", 70.0), _reading(payload, "vibration_hz", 200.0))
+            enriched[i] = {**payload, **state.features()}
+        return enriched
+
+    def get_state(self, hive_id: int) -> Optional[Dict[str, Any]]:
+        """Current window for a hive (None if not loaded)"""
+        with self._lock:
+            state = self._states.get(hive_id)
+            if state is None:
+                return None
+            return {
+                "hive_id": hive_id,
+                "window": self.window,
+                "sound_values": list(state.sound.values),
+                "vibration_values": list(state.vibration.values),
+                "last_timestamp": state.last_timestamp.isoformat() if state.last_timestamp else None,
+                **state.features()
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hives": len(self._states),
+                "window": self.window,
+                "pushed": self.pushed,
+                "reused": self.reused,
+                "out_of_order": self.out_of_order,
+                "previewed": self.previewed,
+                "reseeded": self.reseeded
+            }
+
+
+# Create singleton instance
+threat_feature_state = ThreatFeatureStateService(reseed_gap_seconds=Config.THREAT_FEATURE_RESEED_GAP_SECONDS)
@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional
+
+from app.config import Config
+from app.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class ThreatInferenceBatcher:
+    """
+    Micro-batching dispatcher for single-reading threat predictions.
+
+    Concurrent predict() calls are queued; a dispatcher thread waits up to
+    window_ms after the first queued request (or until max_batch_size
+    requests are waiting), runs one predict_threat_batch() call and hands
+    each caller its own result. The window is only held open while other
+    callers are still on their way in: a lone request is predicted inline,
+    and a batch that already holds every active caller is sent at once.
+    If a batch fails, its payloads are predicted one by one so a bad
+    payload only fails its own request. The dispatcher starts lazily in
+    each worker process, so it is safe to create the app before forking.
+    """
+
+    def __init__(self, window_ms: float = 1, max_batch_size: int = 64,
+                 timeout_seconds: float = 5, enabled: bool = True):
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.timeout_seconds = timeout_seconds
+        self.enabled = enabled
+
+        self._pending: List[tuple] = []
+        self._active = 0  # callers inside predict()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+
+        # Metrics
+        self.requests = 0
+        self.batches = 0
+        self.fallbacks = 0
+        self.errors = 0
+        self.inline = 0
+        self.started_at = time.time()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram()
+        self.model_ms = Histogram()
+        self.latency_ms = Histogram()
+
+    def _ensure_dispatcher(self):
+        """Start the dispatcher thread in this process (caller holds the condition)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        # Threads do not survive fork: requests queued in the parent are not ours to serve
+        if self._pid != os.getpid():
+            self._pending = []
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._dispatch_loop, name="threat-inference-batcher", daemon=True)
+        self._thread.start()
+
+    def _next_batch(self) -> List[tuple]:
+        """Block until a batch is ready: window elapsed since the first request, or batch full"""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0][2] + self.window_seconds
+            # Nobody else can join once every active caller is queued
+            while len(self._pending) < self.max_batch_size and self._active > len(self._pending):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _predict_each(self, batch: List[tuple]):
+        """Predict a failed batch row by row: only the bad payloads fail"""
+        from app.ml_models.threat_detection.src.prediction_service_threat import predict_threat
+
+        for payload, future, _ in batch:
+            try:
+                future.set_result(predict_threat(payload))
+            except Exception as e:
+                self.errors += 1
+                future.set_exception(e)
+
+    def _dispatch_loop(self):
+        from app.ml_models.threat_detection.src.prediction_service_threat import predict_threat_batch
+
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                self.queue_wait_ms.observe((started - queued_at) * 1000)
+
+            try:
+                results = predict_threat_batch([payload for payload, _, _ in batch])
+            except Exception as e:
+                logger.warning(f"Batched threat prediction failed for {len(batch)} requests, "
+                               f"predicting them one by one: {str(e)}")
+                self._predict_each(batch)
+                continue
+
+            self.model_ms.observe((time.perf_counter() - started) * 1000)
+            self.batch_sizes.observe(len(batch))
+            self.batches += 1
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def predict(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Predict a threat for one payload, batched with concurrent callers
+
+        Args:
+            payload: Same payload as predict_threat()
+
+        Returns:
+            predict_threat()-style result dict
+        """
+        from app.ml_models.threat_detection.src.prediction_service_threat import predict_threat
+
+        if not self.enabled:
+            return predict_threat(payload)
+
+        queued_at = time.perf_counter()
+        with self._cond:
+            self._active += 1
+            self.requests += 1
+            alone = self._active == 1
+        try:
+            if alone:
+                # No concurrent callers to batch with: skip the dispatcher hand-off
+                self.inline += 1
+                result = predict_threat(payload)
+            else:
+                result = self._predict_batched(payload, queued_at)
+        finally:
+            with self._cond:
+                self._active -= 1
+                if self._pending:
+                    self._cond.notify()
+
+        self.latency_ms.observe((time.perf_counter() - queued_at) * 1000)
+        return result
+
+    def _predict_batched(self, payload: Dict[str, Any], queued_at: float) -> Dict[str, Any]:
+        from app.ml_models.threat_detection.src.prediction_service_threat import predict_threat
+
+        future: Future = Future()
+        with self._cond:
+            self._ensure_dispatcher()
+            self._pending.append((payload, future, queued_at))
+            # Wake the dispatcher for the first request, when the batch fills up
+            # and when every active caller is queued
+            if (len(self._pending) == 1 or len(self._pending) >= self.max_batch_size
+                    or len(self._pending) >= self._active):
+                self._cond.notify()
+
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            logger.warning("Batched threat prediction timed out; predicting inline")
+            self.fallbacks += 1
+            return predict_threat(payload)
+
+    def reset_stats(self):
+        self.requests = self.batches = self.fallbacks = self.errors = self.inline = 0
+        self.started_at = time.time()
+        for histogram in (self.batch_sizes, self.queue_wait_ms, self.model_ms, self.latency_ms):
+            histogram.reset()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Throughput and latency/batch-size histograms for this worker"""
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window_seconds * 1000,
+            "max_batch_size": self.max_batch_size,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batch_sizes.total / self.batches, 2) if self.batches else 0.0,
+            "requests_per_second": round(self.requests / elapsed, 2),
+            "inline": self.inline,
+            "fallbacks": self.fallbacks,
+            "errors": self.errors,
+            "pending": len(self._pending),
+            "batch_size": self.batch_sizes.to_dict(),
+            "queue_wait_ms": self.queue_wait_ms.to_dict(),
+            "model_ms": self.model_ms.to_dict(),
+            "latency_ms": self.latency_ms.to_dict()
+        }
+
+
+# Create singleton instance
+threat_inference_batcher = ThreatInferenceBatcher(
+    window_ms=Config.THREAT_BATCH_WINDOW_MS,
+    max_batch_size=Config.THREAT_BATCH_MAX_SIZE,
+    timeout_seconds=Config.THREAT_BATCH_TIMEOUT_SECONDS,
+    enabled=Config.THREAT_BATCH_ENABLED
+)
@@ -0,0 +1,72 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ThreatInferenceCache:
+    """
+    Bounded LRU of threat prediction results keyed by
+    (synchronized_data id, model version).
+
+    Shared by every consumer of a stored reading (routes, scheduler,
+    real-time services), so a reading is scored once per model version no
+    matter how often dashboards poll. A hot-reloaded model has a new version
+    and therefore misses. Cached results are shared: callers must not mutate them.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, reading_id: int, model_version: str) -> Optional[Dict[str, Any]]:
+        """Cached result for a reading scored by model_version, or None"""
+        key = (reading_id, model_version)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, reading_id: int, model_version: str, result: Dict[str, Any]):
+        """Store a result, evicting least recently used entries beyond max_entries"""
+        key = (reading_id, model_version)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and size of this worker's cache"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+
+# Create singleton instance
+threat_inference_cache = ThreatInferenceCache(max_entries=Config.THREAT_INFERENCE_CACHE_SIZE)
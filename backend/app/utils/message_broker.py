@@ -0,0 +1,296 @@
+import logging
+import queue
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from socketio.pubsub_manager import PubSubManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROKER_PORT = 5055
+
+# Frames are a 4-byte big-endian length followed by "<channel>\0<json message>"
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+# Reconnect delays (seconds) while no broker is reachable
+MAX_RECONNECT_DELAY = 5.0
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def parse_broker_url(url: str) -> Tuple[str, int]:
+    """broker://host:port -> (host, port)"""
+    parsed = urlparse(url)
+    return parsed.hostname or "127.0.0.1", parsed.port or DEFAULT_BROKER_PORT
+
+
+def _read_exact(conn: socket.socket, size: int) -> Optional[bytes]:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = conn.recv(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(conn: socket.socket) -> Optional[bytes]:
+    """Next frame body from a connection, or None once it is closed"""
+    header = _read_exact(conn, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {size} bytes exceeds {MAX_FRAME_BYTES}")
+    return _read_exact(conn, size)
+
+
+def encode_frame(body: bytes) -> bytes:
+    return _HEADER.pack(len(body)) + body
+
+
+class _BrokerClient:
+    """One broker connection with its own bounded send queue"""
+
+    def __init__(self, conn: socket.socket, address, max_pending: int):
+        self.conn = conn
+        self.address = address
+        self.outbox = queue.Queue(maxsize=max_pending)
+        self.closed = False
+
+
+class MessageBroker:
+    """
+    Minimal TCP fan-out broker for Socket.IO message queues.
+
+    Every frame received from one connection is forwarded to every other
+    connection, each through its own bounded send queue: a subscriber that
+    falls max_pending frames behind is disconnected (and reconnects) instead
+    of stalling the others. Like Redis pub/sub, delivery is at most once.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_BROKER_PORT, max_pending: int = 10000):
+        self.host = host
+        self.port = port
+        self.max_pending = max_pending
+        self._server: Optional[socket.socket] = None
+        self._clients = set()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.frames_in = 0
+        self.frames_out = 0
+        self.dropped_clients = 0
+
+    def start(self) -> bool:
+        """Bind and serve in background threads; False if the address is already taken"""
+        server = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            server.bind((self.host, self.port))
+        except OSError:
+            server.close()
+            return False
+        server.listen(128)
+        self._server = server
+        threading.Thread(target=self._accept_loop, name="message-broker", daemon=True).start()
+        logger.info(f"📮 Message broker listening on {self.host}:{self.port}")
+        return True
+
+    def serve_forever(self):
+        """Run as a standalone process (python -m app.utils.message_broker)"""
+        if not self.start():
+            raise OSError(f"Cannot bind message broker to {self.host}:{self.port}")
+        while True:
+            time.sleep(3600)
+
+    def stop(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            self._drop(client)
+
+    def _accept_loop(self):
+        while self._server is not None:
+            try:
+                conn, address = self._server.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = _BrokerClient(conn, address, self.max_pending)
+            with self._lock:
+                self._clients.add(client)
+            threading.Thread(target=self._read_loop, args=(client,), daemon=True).start()
+            threading.Thread(target=self._write_loop, args=(client,), daemon=True).start()
+
+    def _read_loop(self, client: _BrokerClient):
+        try:
+            while True:
+                body = read_frame(client.conn)
+                if body is None:
+                    break
+                frame = encode_frame(body)
+                with self._lock:
+                    self.frames_in += 1
+                    targets = [other for other in self._clients if other is not client]
+                for target in targets:
+                    try:
+                        target.outbox.put_nowait(frame)
+                    except queue.Full:
+                        logger.warning(f"⚠️ Broker subscriber {target.address} fell behind, disconnecting")
+                        self.dropped_clients += 1
+                        self._drop(target)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Broker connection {client.address} closed: {e}")
+        finally:
+            self._drop(client)
+
+    def _write_loop(self, client: _BrokerClient):
+        while not client.closed:
+            frame = client.outbox.get()
+            if frame is None:
+                return
+            try:
+                client.conn.sendall(frame)
+                self.frames_out += 1
+            except OSError:
+                self._drop(client)
+                return
+
+    def _drop(self, client: _BrokerClient):
+        with self._lock:
+            if client.closed:
+                return
+            client.closed = True
+            self._clients.discard(client)
+        try:
+            client.conn.close()
+        except OSError:
+            pass
+        try:
+            client.outbox.put_nowait(None)  # wake the writer
+        except queue.Full:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "address": f"{self.host}:{self.port}",
+                "listening": self._server is not None,
+                "connections": len(self._clients),
+                "frames_in": self.frames_in,
+                "frames_out": self.frames_out,
+                "dropped_clients": self.dropped_clients,
+            }
+
+
+# Broker started inside this process (embedded mode), if any
+_embedded_broker: Optional[MessageBroker] = None
+_embedded_lock = threading.Lock()
+
+
+def start_embedded_broker(host: str, port: int) -> bool:
+    """Host the broker in this process unless another process already does"""
+    global _embedded_broker
+    with _embedded_lock:
+        if _embedded_broker is not None:
+            return True
+        broker = MessageBroker(host, port)
+        if not broker.start():
+            return False
+        _embedded_broker = broker
+        return True
+
+
+class BrokerManager(PubSubManager):
+    """
+    python-socketio client manager backed by MessageBroker (broker://host:port).
+
+    Every worker keeps one connection for publishing and one for listening.
+    With embedded=True and a loopback address, a worker that cannot reach
+    the broker starts one itself; the first to bind the port hosts it and
+    the others connect to it, and if that worker exits another one takes
+    over on its next reconnect.
+    """
+    name = "broker"
+
+    def __init__(self, url: str = f"broker://127.0.0.1:{DEFAULT_BROKER_PORT}", channel: str = "flask-socketio",
+                 write_only: bool = False, logger=None, json=None, embedded: bool = True):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.url = url
+        self.host, self.port = parse_broker_url(url)
+        self.embedded = embedded and self.host in LOOPBACK_HOSTS
+        self._prefix = channel.encode("utf-8") + b"\0"
+        self._publish_conn: Optional[socket.socket] = None
+        self._publish_lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        try:
+            conn = socket.create_connection((self.host, self.port), timeout=5)
+        except OSError:
+            if not (self.embedded and start_embedded_broker(self.host, self.port)):
+                raise
+            conn = socket.create_connection((self.host, self.port), timeout=5)
+        conn.settimeout(None)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
+
+    def _publish(self, data):
+        frame = encode_frame(self._prefix + self.json.dumps(data).encode("utf-8"))
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publish_conn is None:
+                        self._publish_conn = self._connect()
+                    self._publish_conn.sendall(frame)
+                    return
+                except OSError as e:
+                    if self._publish_conn is not None:
+                        self._publish_conn.close()
+                        self._publish_conn = None
+                    if attempt:
+                        self._get_logger().error(f"Cannot publish to message broker {self.url}: {e}")
+
+    def _listen(self):
+        delay = 0.1
+        while True:
+            try:
+                conn = self._connect()
+            except OSError as e:
+                self._get_logger().error(f"Cannot reach message broker {self.url}, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                continue
+            delay = 0.1
+            try:
+                while True:
+                    body = read_frame(conn)
+                    if body is None:
+                        break
+                    if body.startswith(self._prefix):
+                        yield body[len(self._prefix):].decode("utf-8")
+            except (OSError, ValueError) as e:
+                self._get_logger().error(f"Message broker connection lost: {e}")
+            finally:
+                conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🐝 Socket.IO message broker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_BROKER_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    MessageBroker(args.host, args.port).serve_forever()
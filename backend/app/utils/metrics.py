@@ -0,0 +1,73 @@
+import bisect
+import threading
+from typing import Any, Dict, List, Sequence
+
+# Default latency buckets (milliseconds, upper bounds)
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with count/sum/min/max and bucket-interpolated
+    percentiles. Thread-safe; memory does not grow with observations.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last bucket is +Inf
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100), interpolated within the bucket"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q / 100 * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self._counts):
+                if bucket_count and seen + bucket_count >= rank:
+                    lower = self.buckets[index - 1] if index > 0 else min(self.min, self.buckets[0])
+                    upper = self.buckets[index] if index < len(self.buckets) else self.max
+                    fraction = (rank - seen) / bucket_count
+                    # Clamp to the observed range
+                    return min(max(lower + (upper - lower) * fraction, self.min), self.max)
+                seen += bucket_count
+            return self.max
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.min = None
+            self.max = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            buckets: List[Dict[str, Any]] = [
+                {"le": bound, "count": count} for bound, count in zip(self.buckets, self._counts)
+            ]
+            buckets.append({"le": "+Inf", "count": self._counts[-1]})
+            count, total, minimum, maximum = self.count, self.total, self.min, self.max
+        return {
+            "count": count,
+            "mean": round(total / count, 3) if count else 0.0,
+            "min": round(minimum, 3) if minimum is not None else None,
+            "max": round(maximum, 3) if maximum is not None else None,
+            "p50": round(self.percentile(50), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+            "buckets": buckets
+        }
@@ -0,0 +1,97 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+# Compact separators: the wire format is never read by humans
+_SEPARATORS = (",", ":")
+
+
+class PreSerialized(str):
+    """
+    JSON text produced once and spliced verbatim into every Socket.IO packet
+    that carries it, instead of being re-encoded per emit, snapshot or worker.
+    """
+
+
+def serialize(value: Any) -> PreSerialized:
+    return PreSerialized(json.dumps(value, separators=_SEPARATORS))
+
+
+def _contains_preserialized(obj) -> bool:
+    if isinstance(obj, PreSerialized):
+        return True
+    if isinstance(obj, list):
+        return any(_contains_preserialized(item) for item in obj)
+    if isinstance(obj, dict):
+        return any(_contains_preserialized(value) for value in obj.values())
+    return False
+
+
+class wire_json:
+    """
+    json module for python-socketio (SocketIO(json=wire_json)).
+    Packets are encoded as json.dumps([event, *args]) and message queue
+    messages as json.dumps({..., "data": [*args]}); PreSerialized values
+    anywhere in those lists and dicts are inserted as-is.
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        if not _contains_preserialized(obj):
+            return json.dumps(obj, **kwargs)
+        if isinstance(obj, PreSerialized):
+            return str(obj)
+        if isinstance(obj, list):
+            return "[" + ",".join(wire_json.dumps(item, **kwargs) for item in obj) + "]"
+        return "{" + ",".join(
+            json.dumps(str(key)) + ":" + wire_json.dumps(value, **kwargs) for key, value in obj.items()
+        ) + "}"
+
+    @staticmethod
+    def loads(text, **kwargs):
+        return json.loads(text, **kwargs)
+
+
+# ========== DELTA ENCODING ==========
+def diff_state(previous: Dict[str, Any], current: Dict[str, Any]) -> Tuple[Dict[str, Any], List[List[str]]]:
+    """
+    Fields of current that differ from previous.
+
+    Nested dicts are compared key by key; lists and scalars are replaced
+    whole when they differ.
+
+    Returns:
+        (changes, removed): changes is a nested dict of new values, removed a
+        list of key paths present in previous but not in current
+    """
+    changes, removed = {}, []
+    for key, value in current.items():
+        if key not in previous:
+            changes[key] = value
+            continue
+        old = previous[key]
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested_changes, nested_removed = diff_state(old, value)
+            if nested_changes:
+                changes[key] = nested_changes
+            removed.extend([key] + path for path in nested_removed)
+        elif value != old or type(value) is not type(old):
+            changes[key] = value
+    removed.extend([key] for key in previous if key not in current)
+    return changes, removed
+
+
+def apply_delta(state: Dict[str, Any], changes: Dict[str, Any], removed: List[List[str]] = ()) -> Dict[str, Any]:
+    """Apply a diff_state() result to a copy of state (what a client does with a delta frame)"""
+    result = dict(state)
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = apply_delta(result[key], value)
+        else:
+            result[key] = value
+    for path in removed:
+        target = result
+        for key in path[:-1]:
+            target[key] = dict(target[key])
+            target = target[key]
+        target.pop(path[-1], None)
+    return result
@@ -0,0 +1,235 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Tables whose committed inserts/updates invalidate cached responses for a hive
+INVALIDATING_TABLES = {"synchronized_data", "sensor_data", "threat_alerts"}
+
+# Sentinel used when a committed row has no hive (invalidate every hive)
+ALL_HIVES = "*"
+
+_SESSION_INFO_KEY = "response_cache_hives"
+
+
+class ResponseCache:
+    """
+    Process-local LRU cache for analytics responses.
+
+    Entries are keyed by (endpoint, hive, window, time bucket, extra args),
+    bounded in size, expire after a TTL and are invalidated per hive when
+    new synchronized_data or alert rows are committed.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300, bucket_seconds: int = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = bucket_seconds
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._keys_by_hive: Dict[Any, set] = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, endpoint: str, hive_id: Any, window: Any = None, extra: tuple = ()) -> tuple:
+        """Build a cache key; the time bucket makes sliding windows roll over"""
+        bucket = int(time.time() // self.bucket_seconds) if self.bucket_seconds else 0
+        return (endpoint, hive_id, window, bucket, extra)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None (counts as hit/miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, hive_id, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, hive_id: Any = None):
+        """Store a value, evicting least recently used entries beyond max_entries"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, hive_id, value)
+            self._keys_by_hive.setdefault(hive_id, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], hive_id: Any = None,
+                       should_cache: Callable[[Any], bool] = None) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = compute()
+        if should_cache is None or should_cache(value):
+            self.set(key, value, hive_id=hive_id)
+        return value
+
+    def invalidate_hive(self, hive_id: Any):
+        """Drop every entry for a hive (ALL_HIVES drops everything)"""
+        with self._lock:
+            if hive_id == ALL_HIVES:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._keys_by_hive.clear()
+            else:
+                keys = list(self._keys_by_hive.get(hive_id, ()))
+                # Entries not tied to a hive depend on every hive's data
+                keys.extend(self._keys_by_hive.get(None, ()))
+                removed = 0
+                for key in keys:
+                    if key in self._entries:
+                        self._remove(key)
+                        removed += 1
+            self.invalidations += removed
+
+    def clear(self):
+        """Remove all entries (metrics are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_hive.clear()
+
+    def _remove(self, key: Hashable):
+        """Remove an entry and its hive index reference (caller holds the lock)"""
+        _, hive_id, _ = self._entries.pop(key)
+        keys = self._keys_by_hive.get(hive_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_hive[hive_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit-rate and size metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "bucket_seconds": self.bucket_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+def cached_response(endpoint: str, hive_arg: str = "hive_id", window_arg: str = "hours",
+                    default_hive: Any = 1, default_window: Any = 24):
+    """
+    Cache successful (200) JSON responses of a Flask view.
+
+    The hive is read from the view arguments or query string, the window from
+    the query string; any other query arguments become part of the key.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import current_app, make_response, request
+
+            hive_id = kwargs.get(hive_arg, request.args.get(hive_arg, default_hive, type=int))
+            window = request.args.get(window_arg, default_window, type=int)
+            extra = tuple(sorted(
+                (name, value) for name, value in request.args.items()
+                if name not in (hive_arg, window_arg)
+            ))
+            key = response_cache.make_key(endpoint, hive_id, window, extra)
+
+            cached = response_cache.get(key)
+            if cached is not None:
+                data, status, mimetype = cached
+                response = current_app.response_class(data, status=status, mimetype=mimetype)
+                response.headers["X-Cache"] = "HIT"
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and response.is_json:
+                response_cache.set(key, (response.get_data(), response.status_code, response.mimetype), hive_id=hive_id)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
+
+
+# ========== COMMIT-TIME INVALIDATION ==========
+def _collect_changed_hives(session, flush_context):
+    """after_flush: remember which hives got new or updated rows in this transaction"""
+    hives = session.info.setdefault(_SESSION_INFO_KEY, set())
+    for instance in list(session.new) + list(session.dirty):
+        if getattr(instance, "__tablename__", None) in INVALIDATING_TABLES:
+            hive_id = getattr(instance, "hive_id", None)
+            hives.add(hive_id if hive_id is not None else ALL_HIVES)
+
+
+def _invalidate_committed_hives(session):
+    """after_commit: invalidate cached responses for hives touched by the transaction"""
+    hives = session.info.pop(_SESSION_INFO_KEY, None)
+    if not hives:
+        return
+    if ALL_HIVES in hives:
+        response_cache.invalidate_hive(ALL_HIVES)
+        return
+    for hive_id in hives:
+        response_cache.invalidate_hive(hive_id)
+
+
+def _discard_rolled_back_hives(session):
+    """after_rollback: nothing was committed, nothing to invalidate"""
+    session.info.pop(_SESSION_INFO_KEY, None)
+
+
+_hooks_registered = False
+
+
+def register_invalidation_hooks():
+    """Attach the invalidation hooks to every SQLAlchemy session (idempotent)"""
+    global _hooks_registered
+    if _hooks_registered:
+        return
+
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    event.listen(Session, "after_flush", _collect_changed_hives)
+    event.listen(Session, "after_commit", _invalidate_committed_hives)
+    event.listen(Session, "after_rollback", _discard_rolled_back_hives)
+    _hooks_registered = True
+    logger.info("Response cache invalidation hooks registered")
+
+
+# Create singleton instance
+response_cache = ResponseCache(
+    max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.RESPONSE_CACHE_TTL_SECONDS,
+    bucket_seconds=Config.RESPONSE_CACHE_BUCKET_SECONDS
+)
@@ -0,0 +1,489 @@
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl  # POSIX only: serializes appends from several worker processes
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = re.compile(r"^segment-(\d+)\.jsonl$")
+
+# First line of the index of a segment produced by compaction; it supersedes
+# every lower-numbered segment
+COMPACTED_HEADER = "#compacted"
+
+
+def _epoch(value: Any) -> float:
+    """Seconds for a datetime, ISO string or number (naive values stay naive)"""
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return 0.0
+    return value.timestamp()
+
+
+class SegmentLog:
+    """
+    Append-only JSONL log split into size-bounded segments.
+
+    Each append writes one line to the active segment and one entry
+    (timestamp, offset, length, hive, key) to the segment's sidecar .idx
+    file, so appends cost the same however long the history is. Readers keep
+    the index in memory and seek straight to the records a time-range or
+    hive query needs. Segments are fsynced every fsync_every appends or
+    fsync_interval seconds, whichever comes first.
+
+    When key_field is set a record supersedes earlier records with the same
+    key (updates are appended, not rewritten). Once compact_segments segments
+    are sealed they are rewritten into one, dropping superseded records and
+    anything beyond retention_records. Several processes may share a
+    directory: appends and compaction hold a lock file, and each process
+    picks up the others' appends from the index files before reading.
+    """
+
+    def __init__(self, directory, key_field: Optional[str] = None, timestamp_field: str = "timestamp",
+                 hive_field: str = "hive_id", max_segment_bytes: int = 4 * 1024 * 1024,
+                 fsync_every: int = 32, fsync_interval: float = 1.0,
+                 retention_records: Optional[int] = None, compact_segments: int = 8):
+        self.directory = Path(directory)
+        self.key_field = key_field
+        self.timestamp_field = timestamp_field
+        self.hive_field = hive_field
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.retention_records = retention_records
+        self.compact_segments = compact_segments
+
+        self._lock = threading.RLock()
+        self._pid = None
+        self._lock_file = None
+        self._handles = None  # (segment number, segment file, index file)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._reset_index()
+
+        # Metrics
+        self.appends = 0
+        self.fsyncs = 0
+        self.compactions = 0
+
+    # ========== INDEX ==========
+    def _reset_index(self):
+        self._ts: List[float] = []
+        self._seg: List[int] = []
+        self._off: List[int] = []
+        self._len: List[int] = []
+        self._keys: List[Any] = []
+        self._latest: Dict[Any, int] = {}       # key -> position of its newest record
+        self._hives: Dict[Any, tuple] = {}      # hive -> (timestamps, positions)
+        self._known: Dict[int, tuple] = {}      # segment -> (inode, bytes of .idx consumed)
+        self._sorted = True
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"segment-{number:06d}.jsonl"
+
+    def _index_path(self, number: int) -> Path:
+        return self.directory / f"segment-{number:06d}.idx"
+
+    def _list_segments(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _index_line(self, ts: float, offset: int, length: int, hive: Any, key: Any) -> str:
+        return f"{ts!r}\t{offset}\t{length}\t{json.dumps(hive)}\t{json.dumps(key)}\n"
+
+    def _add_entry(self, ts: float, segment: int, offset: int, length: int, hive: Any, key: Any):
+        position = len(self._ts)
+        if self._ts and ts < self._ts[-1]:
+            self._sorted = False
+        self._ts.append(ts)
+        self._seg.append(segment)
+        self._off.append(offset)
+        self._len.append(length)
+        self._keys.append(key)
+        if key is not None:
+            self._latest[key] = position
+        timestamps, positions = self._hives.setdefault(hive, ([], []))
+        timestamps.append(ts)
+        positions.append(position)
+
+    def _catch_up(self):
+        """Index records appended since the last call (by any process)"""
+        segments = self._list_segments()
+        for number, (inode, _) in self._known.items():
+            path = self._segment_path(number)
+            if number not in segments or not path.exists() or path.stat().st_ino != inode:
+                # Compacted by another process: start over
+                self._reset_index()
+                break
+
+        for number in segments:
+            inode, consumed = self._known.get(number, (None, 0))
+            if inode is None:
+                try:
+                    inode = self._segment_path(number).stat().st_ino
+                except FileNotFoundError:
+                    continue
+            try:
+                with open(self._index_path(number), "rb") as handle:
+                    handle.seek(consumed)
+                    data = handle.read()
+            except FileNotFoundError:
+                data = b""
+            # A writer may be mid-line: only consume complete entries
+            complete = data[:data.rfind(b"\n") + 1]
+            for line in complete.decode("utf-8").splitlines():
+                if line.startswith("#"):
+                    continue
+                ts, offset, length, hive, key = line.split("\t")
+                self._add_entry(float(ts), number, int(offset), int(length), json.loads(hive), json.loads(key))
+            self._known[number] = (inode, consumed + len(complete))
+
+    # ========== LOCKING / RECOVERY ==========
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Thread lock plus (on POSIX) an exclusive lock shared with other processes"""
+        with self._lock:
+            self._ensure_open()
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _ensure_open(self):
+        """First use in this process: take the lock file and repair what a crash left behind"""
+        if self._pid == os.getpid():
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pid = os.getpid()
+        self._handles = None
+        self._lock_file = open(self.directory / ".lock", "a")
+        self._reset_index()
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            self._recover()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _recover(self):
+        for path in self.directory.glob("*.tmp"):
+            path.unlink()
+
+        compacted = [number for number in self._list_segments() if self._repair(number)]
+        if compacted:
+            # A compaction finished its rename but not its cleanup
+            for number in self._list_segments():
+                if number < compacted[-1]:
+                    self._segment_path(number).unlink()
+                    self._index_path(number).unlink(missing_ok=True)
+
+    def _repair(self, number: int) -> bool:
+        """
+        Make a segment's index agree with the segment: drop a torn final line,
+        index records the index is missing, rebuild an index written for other
+        contents. Only the unindexed tail is read. Returns True if the segment
+        is the output of a compaction.
+        """
+        segment_path = self._segment_path(number)
+        index_path = self._index_path(number)
+        size = segment_path.stat().st_size
+
+        lines, compacted_size, indexed_end, dirty = [], None, 0, False
+        if index_path.exists():
+            raw = index_path.read_text(encoding="utf-8")
+            complete = raw[:raw.rfind("\n") + 1]
+            dirty = complete != raw
+            for line in complete.splitlines():
+                if line.startswith(COMPACTED_HEADER):
+                    compacted_size = int(line.split()[1])
+                    continue
+                _, offset, length, _, _ = line.split("\t")
+                if int(offset) != indexed_end:
+                    dirty = True
+                    break
+                lines.append(line + "\n")
+                indexed_end = int(offset) + int(length)
+        else:
+            dirty = True
+
+        if (compacted_size is not None and compacted_size != size) or indexed_end > size:
+            # Index written for other contents (compaction interrupted between its renames)
+            lines, compacted_size, indexed_end, dirty = [], None, 0, True
+
+        if indexed_end < size:
+            dirty = True
+            with open(segment_path, "rb") as handle:
+                handle.seek(indexed_end)
+                tail = handle.read()
+            if not tail.endswith(b"\n"):
+                tail = tail[:tail.rfind(b"\n") + 1]
+                with open(segment_path, "r+b") as handle:
+                    handle.truncate(indexed_end + len(tail))
+                logger.warning(f"⚠️ Dropped a torn record at the end of {segment_path.name}")
+            offset = indexed_end
+            for raw_line in tail.splitlines(keepends=True):
+                try:
+                    record = json.loads(raw_line)
+                except ValueError:
+                    logger.warning(f"⚠️ Unreadable record at {segment_path.name}:{offset}")
+                    record = {}
+                ts, hive, key = self._entry_fields(record)
+                lines.append(self._index_line(ts, offset, len(raw_line), hive, key))
+                offset += len(raw_line)
+
+        if dirty:
+            header = [f"{COMPACTED_HEADER} {compacted_size}\n"] if compacted_size is not None else []
+            index_path.write_text("".join(header + lines), encoding="utf-8")
+        return compacted_size is not None
+
+    def _entry_fields(self, record: Dict[str, Any]):
+        return (_epoch(record.get(self.timestamp_field)), record.get(self.hive_field),
+                record.get(self.key_field) if self.key_field else None)
+
+    # ========== WRITE ==========
+    def append(self, record: Dict[str, Any]):
+        """Append one record (O(1): one segment line and one index entry)"""
+        data = (json.dumps(record, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+        ts, hive, key = self._entry_fields(record)
+
+        with self._locked():
+            self._catch_up()
+            segments = self._list_segments()
+            number = segments[-1] if segments else 1
+            rolled = False
+            if segments and self._segment_path(number).stat().st_size >= self.max_segment_bytes:
+                number += 1
+                rolled = True
+
+            segment_file, index_file = self._active_handles(number)
+            offset = os.fstat(segment_file.fileno()).st_size
+            segment_file.write(data)
+            segment_file.flush()
+            entry = self._index_line(ts, offset, len(data), hive, key).encode("utf-8")
+            index_file.write(entry)
+            index_file.flush()
+
+            inode, consumed = self._known.get(number, (os.fstat(segment_file.fileno()).st_ino, 0))
+            self._known[number] = (inode, consumed + len(entry))
+            self._add_entry(ts, number, offset, len(data), hive, key)
+            self.appends += 1
+
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync_handles()
+
+            if rolled and len(segments) >= self.compact_segments:
+                self._compact_locked()
+
+    def _active_handles(self, number: int):
+        if self._handles is not None and self._handles[0] == number:
+            segment_file = self._handles[1]
+            path = self._segment_path(number)
+            if path.exists() and path.stat().st_ino == os.fstat(segment_file.fileno()).st_ino:
+                return self._handles[1], self._handles[2]
+        self._close_handles()
+        segment_file = open(self._segment_path(number), "ab")
+        index_file = open(self._index_path(number), "ab")
+        self._handles = (number, segment_file, index_file)
+        return segment_file, index_file
+
+    def _sync_handles(self):
+        if self._handles is not None and self._unsynced:
+            os.fsync(self._handles[1].fileno())
+            os.fsync(self._handles[2].fileno())
+            self.fsyncs += 1
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _close_handles(self):
+        if self._handles is not None:
+            self._sync_handles()
+            self._handles[1].close()
+            self._handles[2].close()
+            self._handles = None
+
+    def sync(self):
+        """fsync appends not yet on disk"""
+        with self._lock:
+            if self._pid == os.getpid():
+                self._sync_handles()
+
+    # ========== READ ==========
+    def _live(self, position: int) -> bool:
+        key = self._keys[position]
+        return key is None or self._latest.get(key) == position
+
+    def _read_positions(self, positions: List[int]) -> List[Dict[str, Any]]:
+        records = []
+        handles = {}
+        try:
+            for position in positions:
+                number = self._seg[position]
+                if number not in handles:
+                    handles[number] = open(self._segment_path(number), "rb")
+                handle = handles[number]
+                handle.seek(self._off[position])
+                records.append(json.loads(handle.read(self._len[position])))
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return records
+
+    def read_range(self, since=None, until=None, hive_id: Any = None, limit: Optional[int] = None,
+                   newest_first: bool = True) -> List[Dict[str, Any]]:
+        """
+        Records with since <= timestamp < until (optionally one hive), newest
+        first by default. Only the matching records are read from disk.
+        """
+        with self._lock:
+            self._ensure_open()
+            for attempt in range(2):
+                self._catch_up()
+                positions = self._select(since, until, hive_id, limit, newest_first)
+                try:
+                    return self._read_positions(positions)
+                except (OSError, ValueError):
+                    if attempt:
+                        raise
+                    # Compacted underneath us: re-index and try again
+                    self._reset_index()
+        return []
+
+    def _select(self, since, until, hive_id, limit, newest_first) -> List[int]:
+        if hive_id is not None:
+            timestamps, positions = self._hives.get(hive_id, ([], []))
+        else:
+            timestamps, positions = self._ts, None
+
+        start, stop = 0, len(timestamps)
+        if self._sorted:
+            if since is not None:
+                start = bisect.bisect_left(timestamps, _epoch(since))
+            if until is not None:
+                stop = bisect.bisect_left(timestamps, _epoch(until))
+        since_ts = _epoch(since) if since is not None else None
+        until_ts = _epoch(until) if until is not None else None
+
+        order = range(stop - 1, start - 1, -1) if newest_first else range(start, stop)
+        selected = []
+        for index in order:
+            position = positions[index] if positions is not None else index
+            ts = self._ts[position]
+            if (since_ts is not None and ts < since_ts) or (until_ts is not None and ts >= until_ts):
+                continue
+            if not self._live(position):
+                continue
+            selected.append(position)
+            if limit is not None and len(selected) >= limit:
+                break
+        return selected
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        """Every live record, oldest first"""
+        return self.read_range(newest_first=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_open()
+            self._catch_up()
+            return sum(1 for position in range(len(self._ts)) if self._live(position))
+
+    # ========== COMPACTION ==========
+    def compact(self):
+        """Rewrite sealed segments now (normally triggered by appends)"""
+        with self._locked():
+            self._catch_up()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Merge every sealed segment into the newest sealed one (caller holds the lock)"""
+        segments = self._list_segments()
+        sealed = segments[:-1]
+        if not sealed:
+            return
+        started = time.perf_counter()
+
+        live_total = sum(1 for position in range(len(self._ts)) if self._live(position))
+        drop = max(0, live_total - self.retention_records) if self.retention_records else 0
+        sealed_set = set(sealed)
+        keep = []
+        for position in range(len(self._ts)):
+            if self._seg[position] not in sealed_set or not self._live(position):
+                continue
+            if drop:
+                drop -= 1
+                continue
+            keep.append(position)
+
+        target = sealed[-1]
+        segment_tmp = self.directory / f"segment-{target:06d}.jsonl.tmp"
+        index_tmp = self.directory / f"segment-{target:06d}.idx.tmp"
+        offset = 0
+        with open(segment_tmp, "wb") as segment_file:
+            lines = []
+            for position, record in zip(keep, self._read_positions(keep)):
+                data = (json.dumps(record, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+                segment_file.write(data)
+                ts, hive, key = self._entry_fields(record)
+                lines.append(self._index_line(ts, offset, len(data), hive, key))
+                offset += len(data)
+            segment_file.flush()
+            os.fsync(segment_file.fileno())
+        with open(index_tmp, "w", encoding="utf-8") as index_file:
+            index_file.write(f"{COMPACTED_HEADER} {offset}\n" + "".join(lines))
+            index_file.flush()
+            os.fsync(index_file.fileno())
+
+        # Index first: recovery rebuilds an index whose size does not match its segment
+        if self._handles is not None and self._handles[0] in sealed_set:
+            self._close_handles()
+        os.replace(index_tmp, self._index_path(target))
+        os.replace(segment_tmp, self._segment_path(target))
+        for number in sealed[:-1]:
+            self._segment_path(number).unlink()
+            self._index_path(number).unlink(missing_ok=True)
+
+        self.compactions += 1
+        self._reset_index()
+        self._catch_up()
+        logger.info(f"🗜️ Compacted {len(sealed)} segments of {self.directory.name} into "
+                    f"{len(keep)} records in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Segment/record counts and write counters for this process"""
+        with self._lock:
+            return {
+                "directory": str(self.directory),
+                "segments": len(self._known),
+                "records": len(self._ts),
+                "live_records": sum(1 for position in range(len(self._ts)) if self._live(position)),
+                "appends": self.appends,
+                "fsyncs": self.fsyncs,
+                "compactions": self.compactions,
+            }
@@ -0,0 +1,45 @@
+"""
+Rebuild the hourly threat alert rollups from threat_alerts.
+Run from the backend directory after restoring alerts or if statistics look off:
+
+    python backfill_alert_rollups.py                 # every hive, all time
+    python backfill_alert_rollups.py --hive-id 1 --days 30
+"""
+import sys
+import os
+import time
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.ml_models.threat_detection.src.alert_store import flush_alerts, rebuild_alert_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description='🐝 Rebuild hourly threat alert rollups')
+    parser.add_argument('--hive-id', type=int, help='Only rebuild this hive (default: every hive)')
+    parser.add_argument('--days', type=int, help='Only rebuild the last N days (default: all time)')
+    args = parser.parse_args()
+
+    since = datetime.utcnow() - timedelta(days=args.days) if args.days else None
+
+    print("=" * 70)
+    print("🐝 THREAT ALERT ROLLUP BACKFILL")
+    print("=" * 70)
+    print(f"   Hive: {args.hive_id if args.hive_id is not None else 'all'}")
+    print(f"   Since: {since.isoformat() if since else 'beginning'}")
+
+    # Alerts still queued by this process are written (and counted) first
+    flush_alerts()
+    start = time.time()
+    try:
+        rows = rebuild_alert_rollups(hive_id=args.hive_id, since=since)
+    except Exception as e:
+        print(f"❌ Backfill failed: {str(e)}")
+        sys.exit(1)
+    print(f"✅ Wrote {rows:,} rollup rows in {time.time() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmark threat inference throughput: per-row predict_threat vs predict_threat_batch,
+and concurrent clients with and without the /threat/predict micro-batcher.
+Run from the backend directory: python benchmark_threat_inference.py
+"""
+import sys
+import os
+import math
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.ml_models.threat_detection.src.prediction_service_threat import (
+    FEATURES_BASE, _build_feature_row, _build_feature_values, _get_predictor,
+    _load_bundle, get_model_version, predict_threat, predict_threat_batch
+)
+
+BATCH_SIZES = [1_000, 10_000, 100_000]
+# The per-row path is timed on a sample and extrapolated for large sizes
+PER_ROW_SAMPLE = 500
+# Requests timed for single-row latency percentiles
+LATENCY_SAMPLES = 1_000
+# Concurrent clients for the micro-batching comparison, and requests per client
+CONCURRENCY_LEVELS = [1, 8, 32, 64]
+REQUESTS_PER_CLIENT = 200
+
+
+def make_payloads(n, seed=42):
+    """Synthetic payloads shaped like SynchronizedData.get_threat_detection_payload()"""
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(minutes=n)
+    return [
+        {
+            "weather_temp_c": rng.uniform(20, 40),
+            "weather_humidity_pct": rng.uniform(40, 95),
+            "hive_sound_db": rng.uniform(40, 100),
+            "hive_sound_peak_freq": rng.uniform(100, 600),
+            "vibration_hz": rng.uniform(0, 400),
+            "vibration_var": rng.uniform(0, 30),
+            "timestamp": (start + timedelta(minutes=i)).isoformat()
+        }
+        for i in range(n)
+    ]
+
+
+def same_prediction(expected, actual):
+    """
+    Same class and features, probability equal up to float rounding between
+    evaluators; model_version is bookkeeping and not compared.
+    """
+    return (expected["threat_type"] == actual["threat_type"]
+            and expected["used_features"] == actual["used_features"]
+            and math.isclose(expected["probability"], actual["probability"], abs_tol=1e-5))
+
+
+def check_parity(payloads):
+    """Batch results must match the single-row path"""
+    batch = predict_threat_batch(payloads)
+    for payload, result in zip(payloads, batch):
+        single = predict_threat(payload)
+        assert same_prediction(single, result), (single, result)
+    return len(batch)
+
+
+def predict_threat_pandas(payload):
+    """Previous single-row path: DataFrame row, predict + predict_proba, inverse_transform"""
+    bundle = _load_bundle()
+    X = _build_feature_row(payload)
+    pred_idx = bundle["model"].predict(X)[0]
+    probability = float(np.max(bundle["model"].predict_proba(X)))
+    return {
+        "threat_type": bundle["label_encoder"].inverse_transform([pred_idx])[0],
+        "probability": probability,
+        "used_features": X.to_dict(orient="records")[0],
+        "model_version": get_model_version()
+    }
+
+
+def python_overhead(payload):
+    """Fast-path work outside the model call: feature values, vector, result dict"""
+    _, class_names = _get_predictor()
+    values = _build_feature_values(payload)
+    X = np.empty((1, len(FEATURES_BASE)), dtype=np.float32)
+    X[0] = values
+    return {"threat_type": class_names[0], "probability": 0.0, "used_features": dict(zip(FEATURES_BASE, values))}
+
+
+def latency_percentiles(fn, payloads):
+    """p50/p99 latency in microseconds"""
+    timings = []
+    for payload in payloads:
+        start = time.perf_counter()
+        fn(payload)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def run_latency_benchmark():
+    print(f"\n⏱️  Single-row latency ({LATENCY_SAMPLES:,} requests)")
+    payloads = make_payloads(LATENCY_SAMPLES, seed=11)
+
+    mismatches = sum(not same_prediction(predict_threat_pandas(p), predict_threat(p)) for p in payloads[:200])
+    print(f"   Fast path vs pandas path mismatches: {mismatches}")
+
+    print(f"\n{'path':>22} | {'p50 (us)':>10} | {'p99 (us)':>10}")
+    print("-" * 50)
+    for name, fn in [
+        ("pandas (previous)", predict_threat_pandas),
+        ("predict_threat", predict_threat),
+        ("python overhead only", python_overhead),
+    ]:
+        p50, p99 = latency_percentiles(fn, payloads)
+        print(f"{name:>22} | {p50:>10,.0f} | {p99:>10,.0f}")
+
+
+def run_concurrent(predict, clients, payloads):
+    """Each client thread sends its share of payloads one by one; returns (rows/s, latency Histogram)"""
+    from app.utils.metrics import Histogram
+
+    latency = Histogram()
+    per_client = len(payloads) // clients
+
+    def client(chunk):
+        for payload in chunk:
+            start = time.perf_counter()
+            predict(payload)
+            latency.observe((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(payloads[i * per_client:(i + 1) * per_client],))
+               for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return clients * per_client / (time.perf_counter() - start), latency
+
+
+def run_batching_benchmark():
+    from app.config import Config
+    from app.services.threat_inference_batcher import ThreatInferenceBatcher
+
+    print(f"\n📦 Micro-batching ({Config.THREAT_BATCH_WINDOW_MS:g} ms window): concurrent clients x {REQUESTS_PER_CLIENT} requests")
+    print(f"\n{'clients':>8} | {'path':>9} | {'rows/s':>9} | {'p50 ms':>7} | {'p99 ms':>7} | {'avg batch':>9}")
+    print("-" * 64)
+    for clients in CONCURRENCY_LEVELS:
+        payloads = make_payloads(clients * REQUESTS_PER_CLIENT, seed=clients)
+
+        rate, latency = run_concurrent(predict_threat, clients, payloads)
+        print(f"{clients:>8} | {'direct':>9} | {rate:>9,.0f} | {latency.percentile(50):>7.2f} | "
+              f"{latency.percentile(99):>7.2f} | {'-':>9}")
+
+        batcher = ThreatInferenceBatcher(window_ms=Config.THREAT_BATCH_WINDOW_MS,
+                                         max_batch_size=Config.THREAT_BATCH_MAX_SIZE)
+        rate, latency = run_concurrent(batcher.predict, clients, payloads)
+        stats = batcher.get_stats()
+        print(f"{clients:>8} | {'batched':>9} | {rate:>9,.0f} | {latency.percentile(50):>7.2f} | "
+              f"{latency.percentile(99):>7.2f} | {stats['avg_batch_size']:>9.1f}")
+
+
+def run_benchmark():
+    print("=" * 70)
+    print("🐝 THREAT INFERENCE BENCHMARK")
+    print("=" * 70)
+
+    start = time.time()
+    _load_bundle()
+    print(f"\n📦 Model loaded in {time.time() - start:.2f}s")
+
+    checked = check_parity(make_payloads(200, seed=7))
+    print(f"✅ Batch/single parity verified on {checked} rows")
+
+    print(f"\n{'rows':>10} | {'per-row (rows/s)':>18} | {'batch (rows/s)':>16} | {'speedup':>8}")
+    print("-" * 64)
+    for n in BATCH_SIZES:
+        payloads = make_payloads(n)
+
+        sample = payloads[:min(n, PER_ROW_SAMPLE)]
+        start = time.time()
+        for payload in sample:
+            predict_threat(payload)
+        per_row_rate = len(sample) / (time.time() - start)
+
+        start = time.time()
+        results = predict_threat_batch(payloads)
+        batch_rate = len(results) / (time.time() - start)
+
+        print(f"{n:>10,} | {per_row_rate:>18,.0f} | {batch_rate:>16,.0f} | {batch_rate / per_row_rate:>7.1f}x")
+
+    run_latency_benchmark()
+    run_batching_benchmark()
+
+    print("\n" + "=" * 70)
+    print("✅ Benchmark complete")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -43,6 +43,26 @@ def check_database_performance():
             hive_counts[hive_id] = count
             print(f"   Hive {hive_id}: {count:,} records ({elapsed:.2f}s)")
         
+        # 2b. Compare with the per-hive daily counters (what status endpoints read)
+        print("\n🧮 Checking hive daily counters...")
+        counter_drift = []
+        try:
+            from app.models.hive_daily_counter import HiveDailyCounter
+            start = time.time()
+            counter_totals = HiveDailyCounter.get_hive_totals()
+            elapsed = time.time() - start
+            counter_total = sum(t["total_records"] for t in counter_totals.values())
+            print(f"   Counter total: {counter_total:,} records ({elapsed:.3f}s)")
+            for hive_id, count in hive_counts.items():
+                counted = counter_totals.get(hive_id, {}).get("total_records", 0)
+                if counted != count:
+                    counter_drift.append(hive_id)
+                    print(f"   ⚠️ Hive {hive_id}: counters={counted:,} table={count:,}")
+            if not counter_drift:
+                print("   ✅ Counters match table counts")
+        except Exception as e:
+            print(f"   ❌ Could not read hive daily counters: {e}")
+        
         # 3. Simulate the actual query
         print("\n🔍 Simulating performance prediction query...")
         since_time = datetime.now() - timedelta(days=7)
@@ -103,6 +123,10 @@ def check_database_performance():
             problems.append("No data found for last 7 days")
             recommendations.append("⚠️ Check if data collection is working")
         
+        if counter_drift:
+            problems.append(f"Daily counters out of sync for hives {counter_drift}")
+            recommendations.append("🔧 Run HiveDailyCounter.rebuild() to recompute counters")
+        
         if total > 100000:
             problems.append(f"Database is large ({total:,} records)")
             recommendations.append("💡 Consider archiving old data")
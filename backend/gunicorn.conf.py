@@ -0,0 +1,37 @@
+"""
+Gunicorn settings for the backend: gunicorn -c gunicorn.conf.py run:app
+
+Preloading and scheduler leader election
+----------------------------------------
+preload_app imports the app once in the master, so create_app loads every
+ML model there (PRELOAD_MODELS) and the forked workers share those pages.
+
+The background services must not start in the master: it serves no
+Socket.IO clients, and a leader elected there would run the scheduler in
+the arbiter while the workers inherit a stale lease. So
+BACKGROUND_SERVICES_AFTER_FORK makes create_app only remember the app, and
+post_worker_init below starts each worker's own services: rolling feature
+rebuild, alert writer, and a campaign for the leader lease (its own owner
+id, heartbeat thread and MySQL connection). Exactly one worker then runs
+the scheduled jobs; its emits reach every worker through
+SOCKETIO_MESSAGE_QUEUE. A worker that dies is replaced by a fresh fork that
+campaigns again, and a leader that dies is replaced by another worker
+within LEADER_LEASE_SECONDS + LEADER_HEARTBEAT_SECONDS.
+
+Without gunicorn (python run.py) nothing forks: create_app starts the
+services itself. Other pre-forking servers get them on each worker's first
+request.
+"""
+import os
+
+# Read by app.config when preload_app imports the app, after this file
+os.environ.setdefault("BACKGROUND_SERVICES_AFTER_FORK", "true")
+
+preload_app = True
+worker_class = "eventlet"
+
+
+def post_worker_init(worker):
+    """Start this worker's background services (feature rebuild, alert writer, election)"""
+    from app.scheduler import ensure_background_services
+    ensure_background_services()
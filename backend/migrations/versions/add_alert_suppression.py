@@ -0,0 +1,65 @@
+"""Add alert_suppression_state table and threat_alerts occurrences/last_seen_at
+
+Revision ID: add_alert_suppression
+Revises: add_threat_alert_reading_id
+Create Date: 2025-11-14 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_alert_suppression'
+down_revision = 'add_threat_alert_reading_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    if 'alert_suppression_state' not in tables:
+        op.create_table(
+            'alert_suppression_state',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('hive_id', sa.Integer(), nullable=False),
+            sa.Column('threat_type', sa.String(length=64), nullable=False),
+            sa.Column('episode_started_at', sa.DateTime(), nullable=True),
+            sa.Column('last_seen_at', sa.DateTime(), nullable=True),
+            sa.Column('last_alert_at', sa.DateTime(), nullable=True),
+            sa.Column('recent_alerts', sa.Text(), nullable=True),
+            sa.Column('occurrences', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('suppressed_total', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('max_probability', sa.Float(), nullable=True),
+            sa.Column('last_reading_id', sa.Integer(), nullable=True),
+            sa.UniqueConstraint('hive_id', 'threat_type', name='uq_alert_suppression_hive_threat'),
+        )
+        print("✅ Created alert_suppression_state table")
+
+    # threat_alerts is created lazily by alert_store; only alter it if present
+    if 'threat_alerts' not in tables:
+        print("⚠️ threat_alerts does not exist yet - alert_store will create it with occurrences/last_seen_at")
+        return
+
+    columns = [column['name'] for column in inspector.get_columns('threat_alerts')]
+    if 'occurrences' not in columns:
+        op.add_column('threat_alerts', sa.Column('occurrences', sa.Integer(), nullable=False, server_default='1'))
+        print("✅ Added threat_alerts.occurrences column")
+    if 'last_seen_at' not in columns:
+        op.add_column('threat_alerts', sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+        print("✅ Added threat_alerts.last_seen_at column")
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+    if 'threat_alerts' in tables:
+        columns = [column['name'] for column in inspector.get_columns('threat_alerts')]
+        if 'last_seen_at' in columns:
+            op.drop_column('threat_alerts', 'last_seen_at')
+        if 'occurrences' in columns:
+            op.drop_column('threat_alerts', 'occurrences')
+    if 'alert_suppression_state' in tables:
+        op.drop_table('alert_suppression_state')
@@ -0,0 +1,57 @@
+"""Add persisted data_quality_score to synchronized_data
+
+Revision ID: add_data_quality_score
+Revises: add_performance_indexes
+Create Date: 2025-11-03 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_data_quality_score'
+down_revision = 'add_performance_indexes'
+branch_labels = None
+depends_on = None
+
+# Rows updated per statement during the backfill
+BACKFILL_CHUNK_SIZE = 5000
+
+QUALITY_SCORE_FIELDS = [
+    'weather_temperature', 'weather_humidity', 'weather_wind_speed',
+    'weather_light_intensity', 'weather_rainfall',
+    'sensor_temperature', 'sensor_humidity', 'sensor_sound', 'sensor_weight'
+]
+
+
+def upgrade():
+    op.add_column('synchronized_data', sa.Column('data_quality_score', sa.Float(), nullable=True))
+    op.create_index('ix_synchronized_data_data_quality_score', 'synchronized_data', ['data_quality_score'], unique=False)
+    print("✅ Added data_quality_score column and index")
+
+    # Chunked backfill by primary key range so each UPDATE stays small
+    bind = op.get_bind()
+    bounds = bind.execute(sa.text("SELECT MIN(id), MAX(id) FROM synchronized_data")).fetchone()
+    if not bounds or bounds[0] is None:
+        return
+
+    present = " + ".join(
+        f"(CASE WHEN {field} IS NOT NULL THEN 1 ELSE 0 END)" for field in QUALITY_SCORE_FIELDS
+    )
+    update_sql = sa.text(
+        f"UPDATE synchronized_data SET data_quality_score = ({present}) * 100.0 / {len(QUALITY_SCORE_FIELDS)} "
+        "WHERE id >= :start AND id < :end AND data_quality_score IS NULL"
+    )
+
+    min_id, max_id = bounds
+    updated_chunks = 0
+    for start in range(min_id, max_id + 1, BACKFILL_CHUNK_SIZE):
+        bind.execute(update_sql, {"start": start, "end": start + BACKFILL_CHUNK_SIZE})
+        updated_chunks += 1
+    print(f"✅ Backfilled data_quality_score in {updated_chunks} chunks")
+
+
+def downgrade():
+    op.drop_index('ix_synchronized_data_data_quality_score', table_name='synchronized_data')
+    op.drop_column('synchronized_data', 'data_quality_score')
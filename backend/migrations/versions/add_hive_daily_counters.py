@@ -0,0 +1,74 @@
+"""Add per-hive daily counters for synchronized_data
+
+Revision ID: add_hive_daily_counters
+Revises: add_threat_alert_severity
+Create Date: 2025-11-09 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hive_daily_counters'
+down_revision = 'add_threat_alert_severity'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'hive_daily_counters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('hive_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('total_records', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('successful_collections', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('perfect_alignment', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('weather_only', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sensor_only', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sensor_readings', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('weather_api_calls', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('adafruit_api_calls', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('first_collection_at', sa.DateTime(), nullable=True),
+        sa.Column('last_collection_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['hive_id'], ['hives.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('hive_id', 'day', name='uq_hive_daily_counters_hive_day')
+    )
+    op.create_index('ix_hive_daily_counters_hive_id', 'hive_daily_counters', ['hive_id'], unique=False)
+    op.create_index('ix_hive_daily_counters_day', 'hive_daily_counters', ['day'], unique=False)
+    print("✅ Created hive_daily_counters table")
+
+    # Backfill one row per hive/day with a single set-based aggregate
+    op.execute("""
+        INSERT INTO hive_daily_counters (
+            hive_id, day, total_records, successful_collections, perfect_alignment,
+            weather_only, sensor_only, sensor_readings, weather_api_calls, adafruit_api_calls,
+            first_collection_at, last_collection_at, updated_at
+        )
+        SELECT
+            hive_id,
+            DATE(collection_timestamp),
+            COUNT(*),
+            SUM(CASE WHEN collection_success = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN weather_temperature IS NOT NULL AND sensor_temperature IS NOT NULL THEN 1 ELSE 0 END),
+            SUM(CASE WHEN weather_temperature IS NOT NULL AND sensor_temperature IS NULL THEN 1 ELSE 0 END),
+            SUM(CASE WHEN weather_temperature IS NULL AND sensor_temperature IS NOT NULL THEN 1 ELSE 0 END),
+            COALESCE(SUM(sensor_data_count), 0),
+            COALESCE(SUM(api_usage_weather_calls), 0),
+            COALESCE(SUM(api_usage_adafruit_calls), 0),
+            MIN(collection_timestamp),
+            MAX(collection_timestamp),
+            CURRENT_TIMESTAMP
+        FROM synchronized_data
+        GROUP BY hive_id, DATE(collection_timestamp)
+    """)
+    print("✅ Backfilled hive_daily_counters from synchronized_data")
+
+
+def downgrade():
+    op.drop_index('ix_hive_daily_counters_day', table_name='hive_daily_counters')
+    op.drop_index('ix_hive_daily_counters_hive_id', table_name='hive_daily_counters')
+    op.drop_table('hive_daily_counters')
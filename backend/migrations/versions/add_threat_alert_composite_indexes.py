@@ -0,0 +1,64 @@
+"""Composite indexes for hive-scoped threat_alerts queries
+
+Revision ID: add_threat_alert_composite_indexes
+Revises: add_alert_suppression
+Create Date: 2025-11-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_threat_alert_composite_indexes'
+down_revision = 'add_alert_suppression'
+branch_labels = None
+depends_on = None
+
+COMPOSITE_INDEXES = [
+    # Covers per-hive statistics: WHERE hive_id = ? AND timestamp >= ? GROUP BY threat_type, severity
+    ('ix_threat_alerts_hive_timestamp_type_severity', ['hive_id', 'timestamp', 'threat_type', 'severity']),
+    ('ix_threat_alerts_hive_type_timestamp', ['hive_id', 'threat_type', 'timestamp']),
+    ('ix_threat_alerts_type_timestamp', ['threat_type', 'timestamp']),
+    ('ix_threat_alerts_severity_timestamp', ['severity', 'timestamp']),
+]
+
+# Single-column indexes that are leftmost prefixes of the composites above
+REDUNDANT_INDEXES = [
+    ('ix_threat_alerts_hive_id', ['hive_id']),
+    ('ix_threat_alerts_threat_type', ['threat_type']),
+    ('ix_threat_alerts_severity', ['severity']),
+]
+
+
+def upgrade():
+    # threat_alerts is created lazily by alert_store; only alter it if present.
+    # hive_id and severity were added and backfilled by add_threat_alert_hive_id / add_threat_alert_severity
+    inspector = sa.inspect(op.get_bind())
+    if 'threat_alerts' not in inspector.get_table_names():
+        print("⚠️ threat_alerts does not exist yet - alert_store will create it with composite indexes")
+        return
+
+    indexes = [index['name'] for index in inspector.get_indexes('threat_alerts')]
+    for index_name, columns in COMPOSITE_INDEXES:
+        if index_name not in indexes:
+            op.create_index(index_name, 'threat_alerts', columns, unique=False)
+            print(f"✅ Created index {index_name}")
+
+    for index_name, _ in REDUNDANT_INDEXES:
+        if index_name in indexes:
+            op.drop_index(index_name, table_name='threat_alerts')
+            print(f"🗑️ Dropped redundant index {index_name}")
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'threat_alerts' not in inspector.get_table_names():
+        return
+    indexes = [index['name'] for index in inspector.get_indexes('threat_alerts')]
+    for index_name, columns in REDUNDANT_INDEXES:
+        if index_name not in indexes:
+            op.create_index(index_name, 'threat_alerts', columns, unique=False)
+    for index_name, _ in COMPOSITE_INDEXES:
+        if index_name in indexes:
+            op.drop_index(index_name, table_name='threat_alerts')
@@ -0,0 +1,51 @@
+"""Add hive_id to threat_alerts
+
+Revision ID: add_threat_alert_hive_id
+Revises: add_data_quality_score
+Create Date: 2025-11-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_threat_alert_hive_id'
+down_revision = 'add_data_quality_score'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # threat_alerts is created lazily by alert_store; only alter it if present
+    inspector = sa.inspect(op.get_bind())
+    if 'threat_alerts' not in inspector.get_table_names():
+        print("⚠️ threat_alerts does not exist yet - alert_store will create it with hive_id")
+        return
+
+    columns = [column['name'] for column in inspector.get_columns('threat_alerts')]
+    if 'hive_id' not in columns:
+        op.add_column('threat_alerts', sa.Column('hive_id', sa.Integer(), nullable=True))
+        op.create_index('ix_threat_alerts_hive_id', 'threat_alerts', ['hive_id'], unique=False)
+        print("✅ Added threat_alerts.hive_id column and index")
+
+    # Alerts written before this column existed came from the scheduler job, the
+    # real-time service and ad-hoc /threat/predict calls alike, so no hive can be
+    # assumed for them: they stay NULL (no hive) unless they point at a reading
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('threat_alerts')]
+    if 'synchronized_data_id' in columns:
+        op.execute(
+            "UPDATE threat_alerts SET hive_id = ("
+            "SELECT synchronized_data.hive_id FROM synchronized_data "
+            "WHERE synchronized_data.id = threat_alerts.synchronized_data_id) "
+            "WHERE hive_id IS NULL AND synchronized_data_id IS NOT NULL"
+        )
+        print("✅ Backfilled threat_alerts.hive_id from the readings the alerts were raised for")
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'threat_alerts' not in inspector.get_table_names():
+        return
+    op.drop_index('ix_threat_alerts_hive_id', table_name='threat_alerts')
+    op.drop_column('threat_alerts', 'hive_id')
@@ -0,0 +1,40 @@
+"""Add synchronized_data_id to threat_alerts (one alert per reading)
+
+Revision ID: add_threat_alert_reading_id
+Revises: add_threat_predictions
+Create Date: 2025-11-12 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_threat_alert_reading_id'
+down_revision = 'add_threat_predictions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # threat_alerts is created lazily by alert_store; only alter it if present
+    inspector = sa.inspect(op.get_bind())
+    if 'threat_alerts' not in inspector.get_table_names():
+        print("⚠️ threat_alerts does not exist yet - alert_store will create it with synchronized_data_id")
+        return
+
+    columns = [column['name'] for column in inspector.get_columns('threat_alerts')]
+    if 'synchronized_data_id' not in columns:
+        # Existing alerts keep NULL: the unique index only applies to alerts raised for a reading
+        op.add_column('threat_alerts', sa.Column('synchronized_data_id', sa.Integer(), nullable=True))
+        op.create_index('ix_threat_alerts_synchronized_data_id', 'threat_alerts', ['synchronized_data_id'],
+                        unique=True)
+        print("✅ Added threat_alerts.synchronized_data_id column and unique index")
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'threat_alerts' not in inspector.get_table_names():
+        return
+    op.drop_index('ix_threat_alerts_synchronized_data_id', table_name='threat_alerts')
+    op.drop_column('threat_alerts', 'synchronized_data_id')
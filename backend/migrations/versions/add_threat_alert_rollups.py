@@ -0,0 +1,69 @@
+"""Add hourly threat_alert_rollups for alert statistics
+
+Revision ID: add_threat_alert_rollups
+Revises: add_threat_alert_composite_indexes
+Create Date: 2025-11-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_threat_alert_rollups'
+down_revision = 'add_threat_alert_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    if 'threat_alert_rollups' not in tables:
+        op.create_table(
+            'threat_alert_rollups',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('hour', sa.DateTime(), nullable=False),
+            sa.Column('hive_id', sa.Integer(), nullable=False),
+            sa.Column('threat_type', sa.String(length=64), nullable=False),
+            sa.Column('severity', sa.String(length=16), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+            sa.UniqueConstraint('hive_id', 'hour', 'threat_type', 'severity',
+                                name='uq_threat_alert_rollups_hive_hour_type_severity'),
+        )
+        op.create_index('ix_threat_alert_rollups_hour', 'threat_alert_rollups', ['hour'], unique=False)
+        print("✅ Created threat_alert_rollups table")
+    else:
+        # Importing alert_store (create_app does) creates the table empty, and a running
+        # worker may already have counted a few new alerts: rebuild it from threat_alerts
+        print("⚠️ threat_alert_rollups already exists - rebuilding it from threat_alerts")
+
+    # threat_alerts is created lazily by alert_store; nothing to backfill without it
+    if 'threat_alerts' not in tables:
+        print("⚠️ threat_alerts does not exist yet - rollups start empty")
+        return
+
+    # Backfill one row per hour/hive/type/severity with a single set-based aggregate
+    op.execute("DELETE FROM threat_alert_rollups")
+    if bind.dialect.name == 'mysql':
+        hour = "DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00')"
+    else:
+        # Same text format SQLAlchemy stores DateTime values in on SQLite
+        hour = "strftime('%Y-%m-%d %H:00:00.000000', timestamp)"
+    op.execute(f"""
+        INSERT INTO threat_alert_rollups (hour, hive_id, threat_type, severity, count)
+        SELECT {hour}, COALESCE(hive_id, 0), threat_type, COALESCE(severity, ''), COUNT(*)
+        FROM threat_alerts
+        WHERE timestamp IS NOT NULL
+        GROUP BY {hour}, COALESCE(hive_id, 0), threat_type, COALESCE(severity, '')
+    """)
+    print("✅ Backfilled threat_alert_rollups from threat_alerts")
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'threat_alert_rollups' in inspector.get_table_names():
+        op.drop_index('ix_threat_alert_rollups_hour', table_name='threat_alert_rollups')
+        op.drop_table('threat_alert_rollups')
@@ -0,0 +1,84 @@
+"""Add severity column and query indexes to threat_alerts
+
+Revision ID: add_threat_alert_severity
+Revises: add_threat_alert_hive_id
+Create Date: 2025-11-07 00:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_threat_alert_severity'
+down_revision = 'add_threat_alert_hive_id'
+branch_labels = None
+depends_on = None
+
+# Rows read per batch while backfilling severity from the recommendations JSON
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def upgrade():
+    # threat_alerts is created lazily by alert_store; only alter it if present
+    inspector = sa.inspect(op.get_bind())
+    if 'threat_alerts' not in inspector.get_table_names():
+        print("⚠️ threat_alerts does not exist yet - alert_store will create it with severity")
+        return
+
+    columns = [column['name'] for column in inspector.get_columns('threat_alerts')]
+    indexes = [index['name'] for index in inspector.get_indexes('threat_alerts')]
+
+    if 'severity' not in columns:
+        op.add_column('threat_alerts', sa.Column('severity', sa.String(length=16), nullable=True))
+        print("✅ Added threat_alerts.severity column")
+
+    for index_name, column_name in [
+        ('ix_threat_alerts_severity', 'severity'),
+        ('ix_threat_alerts_timestamp', 'timestamp'),
+        ('ix_threat_alerts_threat_type', 'threat_type'),
+    ]:
+        if index_name not in indexes:
+            op.create_index(index_name, 'threat_alerts', [column_name], unique=False)
+            print(f"✅ Created index {index_name}")
+
+    # Severity lives inside the recommendations JSON; decode it in id-range chunks
+    bind = op.get_bind()
+    bounds = bind.execute(sa.text("SELECT MIN(id), MAX(id) FROM threat_alerts")).fetchone()
+    if not bounds or bounds[0] is None:
+        return
+
+    select_sql = sa.text(
+        "SELECT id, recommendations FROM threat_alerts "
+        "WHERE id >= :start AND id < :end AND severity IS NULL AND recommendations IS NOT NULL"
+    )
+    update_sql = sa.text("UPDATE threat_alerts SET severity = :severity WHERE id = :id")
+
+    min_id, max_id = bounds
+    updated = 0
+    for start in range(min_id, max_id + 1, BACKFILL_CHUNK_SIZE):
+        rows = bind.execute(select_sql, {"start": start, "end": start + BACKFILL_CHUNK_SIZE}).fetchall()
+        params = []
+        for alert_id, recommendations in rows:
+            try:
+                severity = json.loads(recommendations).get("severity")
+            except (ValueError, AttributeError):
+                continue
+            if severity:
+                params.append({"id": alert_id, "severity": severity})
+        if params:
+            bind.execute(update_sql, params)
+            updated += len(params)
+    print(f"✅ Backfilled severity for {updated} alerts")
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'threat_alerts' not in inspector.get_table_names():
+        return
+    op.drop_index('ix_threat_alerts_threat_type', table_name='threat_alerts')
+    op.drop_index('ix_threat_alerts_timestamp', table_name='threat_alerts')
+    op.drop_index('ix_threat_alerts_severity', table_name='threat_alerts')
+    op.drop_column('threat_alerts', 'severity')
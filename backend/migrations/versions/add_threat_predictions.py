@@ -0,0 +1,47 @@
+"""Add threat_predictions table for persisted model outputs
+
+Revision ID: add_threat_predictions
+Revises: add_hive_daily_counters
+Create Date: 2025-11-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_threat_predictions'
+down_revision = 'add_hive_daily_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'threat_predictions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('synchronized_data_id', sa.Integer(), nullable=False),
+        sa.Column('hive_id', sa.Integer(), nullable=False),
+        sa.Column('collection_timestamp', sa.DateTime(), nullable=False),
+        sa.Column('threat_type', sa.String(length=64), nullable=False),
+        sa.Column('probability', sa.Float(), nullable=False),
+        sa.Column('model_version', sa.String(length=32), nullable=False),
+        sa.Column('predicted_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['synchronized_data_id'], ['synchronized_data.id']),
+        sa.ForeignKeyConstraint(['hive_id'], ['hives.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('synchronized_data_id')
+    )
+    op.create_index('ix_threat_predictions_hive_timestamp', 'threat_predictions',
+                    ['hive_id', 'collection_timestamp'], unique=False)
+    op.create_index('ix_threat_predictions_threat_type', 'threat_predictions', ['threat_type'], unique=False)
+    op.create_index('ix_threat_predictions_model_version', 'threat_predictions', ['model_version'], unique=False)
+    # Rows are scored lazily by the threat detection service on first use
+    print("✅ Created threat_predictions table")
+
+
+def downgrade():
+    op.drop_index('ix_threat_predictions_model_version', table_name='threat_predictions')
+    op.drop_index('ix_threat_predictions_threat_type', table_name='threat_predictions')
+    op.drop_index('ix_threat_predictions_hive_timestamp', table_name='threat_predictions')
+    op.drop_table('threat_predictions')
@@ -0,0 +1,218 @@
+"""
+Scheduler leader election between worker processes sharing a lease file:
+exactly one leader, failover after a crashed leader within one lease, a
+fast handover when the leader shuts down cleanly, the is_leader fence
+of a leader that can no longer renew, and forked workers starting over.
+Run from the backend directory: python test_leader_election.py
+"""
+import sys
+import os
+import time
+import signal
+import tempfile
+import subprocess
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+# app first: it monkey-patches with eventlet before the driver starts threads
+from app.services.leader_election import FileLeaseBackend, LeaderElection
+
+WORKERS = 3
+LEASE_SECONDS = 1.0
+HEARTBEAT_SECONDS = 0.2
+
+
+# ========== WORKER PROCESS ==========
+def run_worker(lock_file):
+    """Campaigns like start_background_services, printing instead of scheduling"""
+    def on_elected(takeover):
+        print(f"ELECTED {os.getpid()} {'takeover' if takeover else 'startup'} {time.time()}", flush=True)
+
+    def on_demoted():
+        print(f"DEMOTED {os.getpid()} {time.time()}", flush=True)
+
+    election = LeaderElection(lease_seconds=LEASE_SECONDS, heartbeat_seconds=HEARTBEAT_SECONDS)
+    election.backend = FileLeaseBackend(lock_file)
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))  # run atexit -> release
+    election.start(on_elected, on_demoted)
+    while True:
+        time.sleep(1)
+
+
+# ========== TEST DRIVER ==========
+class Worker:
+    def __init__(self, lock_file):
+        self.process = subprocess.Popen([sys.executable, "-W", "ignore", __file__, "--worker", lock_file],
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        self.events = []
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            self.events.append(line.split())
+
+    @property
+    def is_leader(self):
+        kinds = [event[0] for event in self.events]
+        return bool(kinds) and kinds[-1] == "ELECTED"
+
+    def elected_at(self):
+        return float(self.events[-1][-1])
+
+
+def wait_until(condition, timeout=10.0, message="condition"):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return
+        time.sleep(0.02)
+    raise AssertionError(f"Timed out waiting for {message}")
+
+
+def leaders(workers):
+    return [worker for worker in workers if worker.process.poll() is None and worker.is_leader]
+
+
+def start_workers(lock_file):
+    return [Worker(lock_file) for _ in range(WORKERS)]
+
+
+def stop_workers(workers):
+    for worker in workers:
+        if worker.process.poll() is None:
+            worker.process.terminate()
+    for worker in workers:
+        worker.process.wait()
+
+
+# ========== PYTEST FIXTURES ==========
+# The checks below share one set of workers and run in file order: elect, crash, shut down
+@pytest.fixture(scope="module")
+def workers(tmp_path_factory):
+    started = start_workers(str(tmp_path_factory.mktemp("leader") / "scheduler.lock"))
+    yield started
+    stop_workers(started)
+
+
+def test_single_leader(workers):
+    print("\n🧪 Exactly one worker is elected")
+    wait_until(lambda: len(leaders(workers)) == 1, message="a leader")
+    time.sleep(LEASE_SECONDS * 3)  # several lease periods of renewals
+    current = leaders(workers)
+    assert len(current) == 1, [worker.events for worker in workers]
+    assert sum(len(worker.events) for worker in workers) == 1, [worker.events for worker in workers]
+    print(f"   pid {current[0].process.pid} leads, no other election in {LEASE_SECONDS * 3:.0f}s, ✅ Passed")
+
+
+def test_failover_after_crash(workers):
+    print("\n🧪 A crashed leader is replaced within one lease")
+    wait_until(lambda: len(leaders(workers)) == 1, message="a leader")
+    leader = leaders(workers)[0]
+    killed_at = time.time()
+    leader.process.kill()
+    leader.process.wait()
+    wait_until(lambda: len(leaders(workers)) == 1, message="a new leader")
+    successor = leaders(workers)[0]
+    failover = successor.elected_at() - killed_at
+    assert successor.events[-1][2] == "takeover"
+    assert failover <= LEASE_SECONDS + HEARTBEAT_SECONDS + 0.5, failover
+    print(f"   pid {successor.process.pid} took over after {failover:.2f}s "
+          f"(lease {LEASE_SECONDS}s + heartbeat {HEARTBEAT_SECONDS}s), ✅ Passed")
+
+
+def test_handover_on_shutdown(workers):
+    print("\n🧪 A leader that shuts down hands over on the next heartbeat")
+    wait_until(lambda: len(leaders(workers)) == 1, message="a leader")
+    leader = leaders(workers)[0]
+    stopped_at = time.time()
+    leader.process.terminate()
+    leader.process.wait()
+    assert leader.events[-1][0] == "DEMOTED", leader.events
+    wait_until(lambda: len(leaders(workers)) == 1, message="a new leader")
+    handover = leaders(workers)[0].elected_at() - stopped_at
+    assert handover <= HEARTBEAT_SECONDS + 0.5, handover
+    print(f"   handed over after {handover:.2f}s, ✅ Passed")
+
+
+def test_fence_without_renewal():
+    print("\n🧪 is_leader turns False once a leader cannot renew its lease")
+
+    class StalledBackend:
+        name = "stalled"
+        renew = True
+
+        def try_acquire(self, owner, lease_seconds):
+            if not self.renew:
+                time.sleep(3600)  # hung storage: the heartbeat never returns
+            return True
+
+        def release(self, owner):
+            pass
+
+        def holder(self):
+            return {}
+
+    demoted = []
+    election = LeaderElection(lease_seconds=0.5, heartbeat_seconds=0.1)
+    election.backend = StalledBackend()
+    election.start(lambda takeover: None, lambda: demoted.append(True))
+    wait_until(lambda: election.is_leader, message="election")
+    election.backend.renew = False
+    wait_until(lambda: not election.is_leader, timeout=2, message="lease expiry")
+    assert election.get_status()["is_leader"] is False
+    print("   scheduled jobs see is_leader == False after 0.5s without renewal, ✅ Passed")
+
+
+def test_forked_child_starts_over():
+    print("\n🧪 A worker forked from a leader does not inherit its leadership")
+    election = LeaderElection(lease_seconds=LEASE_SECONDS, heartbeat_seconds=HEARTBEAT_SECONDS)
+    election.backend = FileLeaseBackend(os.path.join(tempfile.mkdtemp(), "scheduler.lock"))
+    election.start(lambda takeover: None, lambda: None)
+    wait_until(lambda: election.is_leader, message="election")
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        parent_owner = election.owner
+        inherited = election.is_leader
+        election.start(lambda takeover: None, lambda: None)
+        time.sleep(HEARTBEAT_SECONDS * 3)
+        os.write(write_fd, f"{inherited} {election.owner != parent_owner} {election.is_leader}".encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+    inherited, new_owner, child_leads = os.read(read_fd, 100).decode().split()
+    os.close(read_fd)
+    os.close(write_fd)
+    election.stop()
+
+    assert inherited == "False", "a forked child must not trust the parent's lease"
+    assert new_owner == "True", "a forked child campaigns under its own owner id"
+    assert child_leads == "False", "the parent still holds the lease"
+    print("   child starts as follower with its own owner id, ✅ Passed")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--worker":
+        run_worker(sys.argv[2])
+        sys.exit(0)
+
+    print("=" * 70)
+    print("🐝 SCHEDULER LEADER ELECTION")
+    print("=" * 70)
+
+    workers = start_workers(os.path.join(tempfile.mkdtemp(), "scheduler.lock"))
+    try:
+        test_single_leader(workers)
+        test_failover_after_crash(workers)
+        test_handover_on_shutdown(workers)
+        test_fence_without_renewal()
+        test_forked_child_starts_over()
+    finally:
+        stop_workers(workers)
+
+    print("\n" + "=" * 70)
+    print("✅ All leader election checks passed")
+    print("=" * 70)
@@ -0,0 +1,169 @@
+"""
+ONNX Runtime models vs the original joblib models: parity, batch latency
+per thread count, and import time / peak RSS of a cold process.
+Run from the backend directory: python test_onnx_models.py
+(needs onnxruntime; regenerate graphs with: python -m app.ml_models.onnx_models)
+"""
+import sys
+import os
+import time
+import subprocess
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.ml_models.compiled_trees import THREAT_MODEL_FILE, PERFORMANCE_MODELS_DIR
+from app.ml_models.onnx_models import load_onnx, THREAT_ONNX_FILE, PERFORMANCE_ONNX_FILE
+
+PARITY_ROWS = 5_000
+BATCH_SIZES = [1, 100, 1_440, 20_000]
+THREAD_COUNTS = [1, 4]
+# onnxruntime sums float32 tree outputs in a different order than libxgboost
+PROBABILITY_TOLERANCE = 1e-5
+
+
+def random_inputs(n, n_features, seed=0, nan_fraction=0.02):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(-1, 2, size=(n, n_features)) * rng.uniform(1, 500, size=n_features)
+    X[rng.random(X.shape) < nan_fraction] = np.nan
+    return X
+
+
+def load_threat_pair(num_threads=1):
+    import joblib
+    bundle = joblib.load(THREAT_MODEL_FILE)
+    return bundle, load_onnx(THREAT_ONNX_FILE, num_threads=num_threads)
+
+
+def load_performance_pair(num_threads=1):
+    import joblib
+    model = joblib.load(PERFORMANCE_MODELS_DIR / "performance_model.pkl")
+    scaler = joblib.load(PERFORMANCE_MODELS_DIR / "scaler.pkl")
+    return model, scaler, load_onnx(PERFORMANCE_ONNX_FILE, num_threads=num_threads)
+
+
+def test_threat_parity():
+    print("\n🧪 Threat model (XGBoost) parity")
+    bundle, onnx_model = load_threat_pair()
+    assert list(onnx_model.classes_) == [str(c) for c in bundle["label_encoder"].classes_]
+    X = random_inputs(PARITY_ROWS, len(bundle["features"])).astype(np.float32)
+
+    native = bundle["model"].get_booster().inplace_predict(X, validate_features=False)
+    ours = onnx_model.predict_proba(X)
+
+    max_diff = float(np.abs(native - ours).max())
+    agreement = float((native.argmax(axis=1) == ours.argmax(axis=1)).mean())
+    print(f"   max |Δp| = {max_diff:.2e}, argmax agreement = {agreement:.2%}")
+    assert max_diff < PROBABILITY_TOLERANCE, max_diff
+    assert agreement == 1.0, agreement
+    print("   ✅ Passed")
+
+
+def test_performance_parity():
+    print("\n🧪 Performance model (MinMaxScaler + RandomForest graph) parity")
+    model, scaler, onnx_model = load_performance_pair()
+    X = random_inputs(PARITY_ROWS, scaler.n_features_in_, nan_fraction=0.0)
+
+    native = model.predict_proba(scaler.transform(X))
+    # The scaler is inside the graph: transform() only casts
+    ours = onnx_model.predict_proba(onnx_model.transform(X))
+
+    max_diff = float(np.abs(native - ours).max())
+    print(f"   max |Δp| = {max_diff:.2e}")
+    # Leaf fractions come back as float32
+    assert max_diff < PROBABILITY_TOLERANCE, max_diff
+    assert (model.classes_[native.argmax(axis=1)] == onnx_model.predict(X)).all()
+    print("   ✅ Passed")
+
+
+def time_call(fn, X, repeats):
+    fn(X)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats
+
+
+def test_batch_latency():
+    print("\n⏱️  Batch latency (ms per call)")
+    bundle, _ = load_threat_pair()
+    booster = bundle["model"].get_booster()
+    rf, scaler, _ = load_performance_pair()
+    threat_onnx = {threads: load_onnx(THREAT_ONNX_FILE, num_threads=threads) for threads in THREAD_COUNTS}
+    perf_onnx = {threads: load_onnx(PERFORMANCE_ONNX_FILE, num_threads=threads) for threads in THREAD_COUNTS}
+
+    onnx_columns = " | ".join(f"{f'onnx x{threads}':>9}" for threads in THREAD_COUNTS)
+    print(f"{'rows':>8} | {'threat native':>14} | {onnx_columns} | {'perf native':>12} | {onnx_columns}")
+    print("-" * (48 + 24 * len(THREAD_COUNTS)))
+    for n in BATCH_SIZES:
+        repeats = max(3, 2_000 // n)
+        X = random_inputs(n, len(bundle["features"]), seed=n).astype(np.float32)
+        threat_native = time_call(lambda x: booster.inplace_predict(x, validate_features=False), X, repeats)
+        threat_times = [time_call(threat_onnx[threads].predict_proba, X, repeats) for threads in THREAD_COUNTS]
+
+        Xp = random_inputs(n, scaler.n_features_in_, seed=n, nan_fraction=0.0)
+        perf_native = time_call(lambda x: rf.predict_proba(scaler.transform(x)), Xp, repeats)
+        perf_times = [time_call(perf_onnx[threads].predict_proba, Xp, repeats) for threads in THREAD_COUNTS]
+
+        print(f"{n:>8,} | {threat_native * 1e3:>14.2f} | "
+              + " | ".join(f"{t * 1e3:>9.2f}" for t in threat_times)
+              + f" | {perf_native * 1e3:>12.2f} | "
+              + " | ".join(f"{t * 1e3:>9.2f}" for t in perf_times))
+
+
+# Each snippet runs in a fresh interpreter: load both models, predict one row
+COLD_START_SNIPPETS = {
+    "native": (
+        "import joblib, numpy as np\n"
+        "from app.ml_models.compiled_trees import THREAT_MODEL_FILE, PERFORMANCE_MODELS_DIR\n"
+        "b = joblib.load(THREAT_MODEL_FILE)\n"
+        "rf = joblib.load(PERFORMANCE_MODELS_DIR / 'performance_model.pkl')\n"
+        "sc = joblib.load(PERFORMANCE_MODELS_DIR / 'scaler.pkl')\n"
+        "b['model'].predict_proba(np.zeros((1, len(b['features'])), dtype=np.float32))\n"
+        "rf.predict_proba(sc.transform(np.zeros((1, sc.n_features_in_))))\n"
+    ),
+    "onnx": (
+        "import numpy as np\n"
+        "from app.ml_models.onnx_models import load_onnx, THREAT_ONNX_FILE, PERFORMANCE_ONNX_FILE\n"
+        "t = load_onnx(THREAT_ONNX_FILE)\n"
+        "p = load_onnx(PERFORMANCE_ONNX_FILE)\n"
+        "t.predict_proba(np.zeros((1, len(t.features))))\n"
+        "p.predict_proba(np.zeros((1, len(p.features))))\n"
+    ),
+}
+
+COLD_START_WRAPPER = (
+    "import time, resource\n"
+    "start = time.perf_counter()\n"
+    "{snippet}"
+    "elapsed = time.perf_counter() - start\n"
+    "print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+)
+
+
+def test_cold_start():
+    print("\n🚀 Cold start: import + load + first prediction (fresh process)")
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    for name, snippet in COLD_START_SNIPPETS.items():
+        result = subprocess.run(
+            [sys.executable, "-c", COLD_START_WRAPPER.format(snippet=snippet)],
+            cwd=backend_dir, capture_output=True, text=True, check=True
+        )
+        elapsed, max_rss_kb = result.stdout.split()[-2:]
+        print(f"   {name:>8}: {float(elapsed):.2f}s, peak RSS {int(max_rss_kb) / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("🐝 ONNX RUNTIME MODELS")
+    print("=" * 70)
+
+    test_threat_parity()
+    test_performance_parity()
+    test_batch_latency()
+    test_cold_start()
+
+    print("\n" + "=" * 70)
+    print("✅ All ONNX model checks passed")
+    print("=" * 70)
@@ -0,0 +1,120 @@
+"""
+Append-only JSONL segment log: range reads through the offset index, keyed
+updates, compaction, crash repair and appends from several processes.
+Run from the backend directory: python test_segment_log.py
+"""
+import sys
+import os
+import glob
+import time
+import shutil
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+from multiprocessing import Process
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.utils.segment_log import SegmentLog
+
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def record(i, hive_id=None, **extra):
+    return dict({"timestamp": (BASE_TIME + timedelta(minutes=i)).isoformat(),
+                 "hive_id": i % 3 if hive_id is None else hive_id, "n": i}, **extra)
+
+
+def test_range_reads(tmp_path):
+    print("\n🧪 Time and hive range reads")
+    log = SegmentLog(tmp_path, max_segment_bytes=4000, compact_segments=100)
+    for i in range(500):
+        log.append(record(i))
+
+    window = log.read_range(since=BASE_TIME + timedelta(minutes=100), until=BASE_TIME + timedelta(minutes=105))
+    assert [r["n"] for r in window] == [104, 103, 102, 101, 100], window
+    assert [r["n"] for r in log.read_range(hive_id=1, limit=3)] == [499, 496, 493]
+    assert [r["n"] for r in log.read_all()] == list(range(500))
+    print(f"   {log.get_stats()['segments']} segments, ✅ Passed")
+
+
+def test_keyed_updates_and_compaction(tmp_path):
+    print("\n🧪 Keyed updates survive compaction and reopening")
+    log = SegmentLog(tmp_path, key_field="alert_id", max_segment_bytes=1500, compact_segments=3)
+    for i in range(60):
+        log.append(record(i, alert_id=f"A{i}", status="ACTIVE"))
+    log.append(record(5, alert_id="A5", status="RESOLVED"))
+    log.compact()
+
+    reopened = SegmentLog(tmp_path, key_field="alert_id")
+    alerts = reopened.read_all()
+    assert len(alerts) == 60, len(alerts)
+    assert [a["status"] for a in alerts if a["alert_id"] == "A5"] == ["RESOLVED"]
+    print(f"   {log.compactions} compactions, ✅ Passed")
+
+
+def test_torn_write_repair(tmp_path):
+    print("\n🧪 A torn final record is dropped on reopen")
+    log = SegmentLog(tmp_path)
+    for i in range(10):
+        log.append(record(i))
+    log.sync()
+    with open(sorted(glob.glob(os.path.join(tmp_path, "segment-*.jsonl")))[-1], "ab") as handle:
+        handle.write(b'{"timestamp": "2025-01-')
+
+    reopened = SegmentLog(tmp_path)
+    assert len(reopened.read_all()) == 10
+    reopened.append(record(10))
+    assert reopened.read_range(limit=1)[0]["n"] == 10
+    print("   ✅ Passed")
+
+
+def _append_from_worker(directory, worker):
+    log = SegmentLog(directory, max_segment_bytes=3000, compact_segments=3)
+    for i in range(250):
+        log.append(record(i, hive_id=worker))
+
+
+def test_concurrent_processes(tmp_path):
+    print("\n🧪 Four processes appending to one log")
+    workers = [Process(target=_append_from_worker, args=(tmp_path, worker)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    log = SegmentLog(tmp_path)
+    assert len(log.read_all()) == 1000
+    assert all(len(log.read_range(hive_id=worker)) == 250 for worker in range(4))
+    print("   ✅ Passed")
+
+
+def test_append_cost(tmp_path):
+    print("\n⏱️  Append cost does not grow with history")
+    log = SegmentLog(tmp_path)
+    for batch in range(3):
+        start = time.perf_counter()
+        for i in range(2000):
+            log.append(record(batch * 2000 + i))
+        elapsed = time.perf_counter() - start
+        print(f"   records {batch * 2000:>5}-{(batch + 1) * 2000:>5}: {elapsed / 2000 * 1e6:.0f} µs/append")
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("🐝 SEGMENT LOG")
+    print("=" * 70)
+
+    root = tempfile.mkdtemp(prefix="segment_log_")
+    try:
+        test_range_reads(Path(root, "range"))
+        test_keyed_updates_and_compaction(Path(root, "keyed"))
+        test_torn_write_repair(Path(root, "torn"))
+        test_concurrent_processes(Path(root, "concurrent"))
+        test_append_cost(Path(root, "cost"))
+    finally:
+        shutil.rmtree(root)
+
+    print("\n" + "=" * 70)
+    print("✅ All segment log checks passed")
+    print("=" * 70)
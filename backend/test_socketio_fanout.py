@@ -0,0 +1,235 @@
+"""
+Socket.IO fan-out across several web workers through the built-in message
+broker: updates published in one worker reach subscribers on every worker,
+snapshots are served from replicated state, and the broker moves to another
+worker when the one hosting it exits.
+Run from the backend directory: python test_socketio_fanout.py
+"""
+import sys
+import os
+import time
+import socket
+import subprocess
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+WORKERS = 3
+BROKER_URL = "broker://127.0.0.1:{port}"
+
+
+# ========== WORKER PROCESS ==========
+def run_worker(port, broker_url):
+    """One web worker wired like create_app: wire_json + message queue client manager + hub"""
+    import eventlet
+    eventlet.monkey_patch()
+
+    from app.services.realtime_hub import RealtimeHub, create_client_manager
+    from app.utils.realtime_wire import wire_json
+    from flask import Flask, jsonify, request
+    from flask_socketio import SocketIO
+
+    app = Flask(__name__)
+    hub = RealtimeHub(apiary_groups={"north": [1, 2]}, keyframe_interval=5)
+    socketio = SocketIO(app, json=wire_json, client_manager=create_client_manager(broker_url, hub=hub))
+    hub.init_app(socketio, replicate=True)
+
+    @app.route("/publish", methods=["POST"])
+    def publish():
+        body = request.get_json()
+        hub.publish(body["event"], body["payload"])
+        return jsonify({"success": True})
+
+    @app.route("/stats")
+    def stats():
+        return jsonify(hub.get_stats())
+
+    socketio.run(app, host="127.0.0.1", port=port, log_output=False)
+
+
+# ========== TEST DRIVER ==========
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def listening(port):
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+def wait_until(condition, timeout=10.0, message="condition"):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return
+        time.sleep(0.05)
+    raise AssertionError(f"Timed out waiting for {message}")
+
+
+def http(port, path, body=None):
+    import requests
+    url = f"http://127.0.0.1:{port}{path}"
+    response = requests.post(url, json=body, timeout=5) if body is not None else requests.get(url, timeout=5)
+    return response.json()
+
+
+class Dashboard:
+    """socketio.Client that records snapshots and update frames"""
+
+    def __init__(self, port, subscription):
+        import socketio
+        self.frames = []
+        self.snapshots = []
+        self._lock = threading.Lock()
+        self.client = socketio.Client()
+        self.client.on("snapshot", lambda data: self._record(self.snapshots, data))
+        self.client.on("synchronized_update", lambda data: self._record(self.frames, data))
+        self.client.connect(f"http://127.0.0.1:{port}", transports=["polling"])
+        self.ack = self.client.call("subscribe", subscription, timeout=5)
+
+    def _record(self, target, data):
+        with self._lock:
+            target.append(data)
+
+    def seqs(self):
+        with self._lock:
+            return [(frame["hive_id"], frame["seq"]) for frame in self.frames]
+
+
+def update(hive_id, tick):
+    return {"hive_id": hive_id, "timestamp": f"2025-01-01T00:{tick:02d}:00",
+            "sensors": {"temperature": 30 + tick, "humidity": 65}, "api_usage": {"adafruit_calls": 4}}
+
+
+def start_workers():
+    """Spawn WORKERS web workers sharing one broker; returns (processes, ports)"""
+    broker_url = BROKER_URL.format(port=free_port())
+    ports = [free_port() for _ in range(WORKERS)]
+    processes = []
+    try:
+        for port in ports:
+            # Staggered starts: the first worker to find no broker hosts the embedded one
+            processes.append(subprocess.Popen([sys.executable, "-W", "ignore", __file__, "--worker", str(port), broker_url],
+                                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+            wait_until(lambda: listening(port), message=f"worker on port {port}")
+    except Exception:
+        stop_workers(processes)
+        raise
+    print(f"   {WORKERS} workers on ports {ports}, broker {broker_url}")
+    return processes, ports
+
+
+def stop_workers(processes):
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        process.wait()
+
+
+def open_dashboards(ports):
+    """Hive 1 subscribers on every worker, then a hive 2 subscriber on the last one"""
+    dashboards = [Dashboard(port, {"hive_ids": [1]}) for port in ports]
+    return dashboards + [Dashboard(ports[-1], {"hive_ids": [2]})]
+
+
+def close_dashboards(dashboards):
+    for dashboard in dashboards:
+        dashboard.client.disconnect()
+
+
+# ========== PYTEST FIXTURES ==========
+# The checks below share one cluster and run in file order: publish, snapshot, failover
+@pytest.fixture(scope="module")
+def cluster():
+    processes, ports = start_workers()
+    yield processes, ports
+    stop_workers(processes)
+
+
+@pytest.fixture(scope="module")
+def dashboards(cluster):
+    opened = open_dashboards(cluster[1])
+    yield opened
+    close_dashboards(opened)
+
+
+def test_fanout(cluster, dashboards):
+    print("\n🧪 Updates published in worker 0 reach subscribers on every worker")
+    _, ports = cluster
+    dashboards, other_hive = dashboards[:-1], dashboards[-1]
+    assert all(dashboard.ack["success"] for dashboard in dashboards + [other_hive])
+
+    for tick in range(6):
+        http(ports[0], "/publish", {"event": "synchronized_update", "payload": update(1, tick)})
+    expected = [(1, seq) for seq in range(1, 7)]
+    for dashboard in dashboards:
+        wait_until(lambda: dashboard.seqs() == expected, message="frames on every worker")
+    time.sleep(0.3)
+    assert other_hive.frames == [], other_hive.frames
+    print(f"   {len(dashboards)} workers received frames 1-6, hive 2 subscriber received none, ✅ Passed")
+
+
+def test_replicated_snapshot(cluster):
+    print("\n🧪 A late subscriber on another worker gets the replicated snapshot")
+    _, ports = cluster
+    late = Dashboard(ports[-1], {"apiaries": ["north"]})
+    try:
+        wait_until(lambda: late.snapshots, message="snapshot")
+        hive = next(entry for entry in late.snapshots[0]["hives"] if entry["hive_id"] == 1)
+        stream = hive["updates"]["synchronized_update"]
+        assert stream["seq"] == 6 and stream["data"] == update(1, 5), stream
+    finally:
+        late.client.disconnect()
+    print(f"   remote updates applied on worker {ports[-1]}: {http(ports[-1], '/stats')['remote_updates']}, ✅ Passed")
+
+
+def test_broker_failover(cluster, dashboards):
+    print("\n🧪 Broker moves to another worker when its host exits")
+    processes, ports = cluster
+    dashboard = dashboards[WORKERS - 1]  # hive 1 subscriber on the last worker
+    processes[0].terminate()
+    processes[0].wait()
+    deadline = time.time() + 15
+    seq = 7
+    while time.time() < deadline:
+        http(ports[1], "/publish", {"event": "synchronized_update", "payload": update(1, seq)})
+        time.sleep(0.3)
+        if any(frame_seq >= 7 for _, frame_seq in dashboard.seqs()):
+            break
+        seq += 1
+    assert any(frame_seq >= 7 for _, frame_seq in dashboard.seqs()), dashboard.seqs()
+    print(f"   worker {ports[2]} receives updates published in worker {ports[1]} again, ✅ Passed")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        run_worker(int(sys.argv[2]), sys.argv[3])
+        sys.exit(0)
+
+    print("=" * 70)
+    print("🐝 SOCKET.IO MULTI-WORKER FAN-OUT")
+    print("=" * 70)
+
+    processes, ports = start_workers()
+    subscribers = []
+    try:
+        subscribers = open_dashboards(ports)
+        test_fanout((processes, ports), subscribers)
+        test_replicated_snapshot((processes, ports))
+        test_broker_failover((processes, ports), subscribers)
+    finally:
+        close_dashboards(subscribers)
+        stop_workers(processes)
+
+    print("\n" + "=" * 70)
+    print("✅ All fan-out checks passed")
+    print("=" * 70)
+    os._exit(0)  # socketio.Client reconnect threads of the stopped workers
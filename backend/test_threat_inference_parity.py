@@ -0,0 +1,57 @@
+"""
+Single-row and batch threat inference must agree on sparse payloads: missing
+keys and explicit None values both fall back to the same defaults, so a
+/threat/predict request gets the same answer whether it is served inline or
+through the micro-batcher.
+Run from the backend directory: python test_threat_inference_parity.py
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.ml_models.threat_detection.src.prediction_service_threat import predict_threat, predict_threat_batch
+from benchmark_threat_inference import same_prediction
+
+TIMESTAMP = "2025-06-01T20:15:00"
+
+SPARSE_PAYLOADS = [
+    {"timestamp": TIMESTAMP},
+    {"timestamp": TIMESTAMP, "weather_temp_c": None, "weather_humidity_pct": 80.0},
+    {"timestamp": TIMESTAMP, "hive_sound_db": None, "hive_sound_peak_freq": None, "vibration_hz": 120.0},
+    {"timestamp": TIMESTAMP, "vibration_hz": None, "vibration_var": None},
+    {"timestamp": TIMESTAMP, "hive_sound_db": 85.0, "sound_roll3": None, "vib_roll3": None,
+     "sound_var3": None, "vib_var3": None},
+    {key: None for key in ("weather_temp_c", "weather_humidity_pct", "hive_sound_db",
+                           "hive_sound_peak_freq", "vibration_hz", "vibration_var")} | {"timestamp": TIMESTAMP},
+]
+
+
+def test_none_means_default():
+    print("\n🧪 An explicit None is scored like a missing key")
+    for payload in SPARSE_PAYLOADS:
+        missing = {key: value for key, value in payload.items() if value is not None}
+        assert same_prediction(predict_threat(missing), predict_threat(payload)), payload
+    print(f"   {len(SPARSE_PAYLOADS)} payloads, ✅ Passed")
+
+
+def test_single_matches_batch():
+    print("\n🧪 predict_threat and predict_threat_batch agree on sparse payloads")
+    batch = predict_threat_batch(SPARSE_PAYLOADS)
+    for payload, batched in zip(SPARSE_PAYLOADS, batch):
+        single = predict_threat(payload)
+        assert same_prediction(single, batched), (payload, single, batched)
+    print(f"   {len(SPARSE_PAYLOADS)} payloads, ✅ Passed")
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("🐝 THREAT INFERENCE PARITY")
+    print("=" * 70)
+
+    test_none_means_default()
+    test_single_matches_batch()
+
+    print("\n" + "=" * 70)
+    print("✅ All parity checks passed")
+    print("=" * 70)